@@ -3,6 +3,36 @@ import pandas as pd
 import numpy as np
 import datetime
 import os
+import hashlib
+import threading
+import time
+import uuid
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from ingesta import (
+    CAMPOS_MAPEO, es_xlsx, hojas_excel, estimar_filas, leer_archivo_por_bloques,
+    procesar_asistencia, procesar_checadas, aplicar_esquema_empleados, aplicar_esquema_registros,
+    agregar_a_indice_nombres, nombres_por_revisar, resolver_nombres,
+    expandir_archivos, archivos_de_carpeta, nombres_unicos, columnas_archivo, clave_formato
+)
+from nomina import (
+    ALMACENAMIENTO, BASE_DATOS_SQLITE, BITACORA_CAMBIOS, EMPLEADOS_CSV, REGISTROS_CSV,
+    FECHA_BASE_SUELDOS,
+    COLUMNAS_REGISTROS, COLUMNAS_MONEDA, AlmacenDatos, firma_datos, cargar_en_almacen,
+    marcar_guardado, actualizar_empleados, guardar_datos, registrar_cambio,
+    rango_fechas_sqlite, huella_archivo, limpiar_archivos_procesados,
+    construir_agregados, cargar_mapeos_columnas, guardar_mapeos_columnas, calcular_sueldos,
+    reporte_por_intervalo, excel_streaming, LoteIngesta, ingestar_lote, generar_reporte_nomina,
+    posiciones_periodo, rango_fechas, registrar_sueldo, limpiar_historial_sueldos,
+    aplicar_sueldos_vigentes,
+    filtrar_registros_periodo, asignar_trabajador, consultar_registros_sqlite,
+    contar_registros_sqlite, registros_completos, totales_registros, hay_registros,
+    registros_recientes, registros_sin_trabajador, lotes_registrados,
+    MAX_MEDICIONES, BITACORA_TIEMPOS, mediciones, registrar_medicion, medir_etapa,
+    tabla_mediciones, resumen_mediciones
+)
+from reglas_lft import CONCEPTOS_LFT
 from io import BytesIO
 import base64
 
@@ -13,107 +43,378 @@ st.set_page_config(
     layout="wide"
 )
 
-# Rutas de archivos (usando los archivos de tu repositorio)
-EMPLEADOS_CSV = "empleados.csv"
-REGISTROS_CSV = "registros_horas.csv"
+# Almacén compartido por todas las sesiones del proceso
+@st.cache_resource
+def almacen_compartido():
+    """Devuelve la única instancia del almacén para este proceso"""
+    return AlmacenDatos()
 
-# Cargar datos existentes o inicializar DataFrames vacíos
-def cargar_datos():
-    """Carga los datos de empleados y registros desde archivos CSV"""
-    try:
-        empleados_df = pd.read_csv(EMPLEADOS_CSV)
-        # Asegurar que las columnas necesarias existan
-        columnas_requeridas = ['ID', 'Nombre', 'Sueldo_Semanal', 'Sueldo_Diario', 'Sueldo_Hora', 'Fecha_Alta', 'Activo']
-        for col in columnas_requeridas:
-            if col not in empleados_df.columns:
-                empleados_df[col] = np.nan
-    except FileNotFoundError:
-        # Crear DataFrame vacío con las columnas necesarias
-        empleados_df = pd.DataFrame(columns=[
-            'ID', 'Nombre', 'Sueldo_Semanal', 'Sueldo_Diario', 
-            'Sueldo_Hora', 'Fecha_Alta', 'Activo'
-        ])
-    
-    try:
-        registros_df = pd.read_csv(REGISTROS_CSV)
-        # Asegurar que las columnas necesarias existan
-        columnas_registros = ['ID_Trabajador', 'Nombre', 'Fecha', 'Hora_Entrada', 
-                              'Hora_Salida', 'Horas_Trabajadas', 'Minutos_Trabajados', 
-                              'Total_Horas_Decimal']
-        for col in columnas_registros:
-            if col not in registros_df.columns:
-                registros_df[col] = np.nan
-    except FileNotFoundError:
-        registros_df = pd.DataFrame(columns=[
-            'ID_Trabajador', 'Nombre', 'Fecha', 'Hora_Entrada', 
-            'Hora_Salida', 'Horas_Trabajadas', 'Minutos_Trabajados', 
-            'Total_Horas_Decimal'
-        ])
-    
-    return empleados_df, registros_df
-
-# Guardar datos a CSV
-def guardar_datos(empleados_df, registros_df):
-    """Guarda los DataFrames a archivos CSV"""
-    empleados_df.to_csv(EMPLEADOS_CSV, index=False)
-    registros_df.to_csv(REGISTROS_CSV, index=False)
-
-# Cargar datos al inicio
-if 'datos_cargados' not in st.session_state:
-    st.session_state.empleados, st.session_state.registros = cargar_datos()
-    st.session_state.datos_cargados = True
+def obtener_almacen():
+    """Devuelve el almacén compartido, recargándolo solo si los archivos cambiaron"""
+    almacen = almacen_compartido()
+    with almacen.candado:
+        if almacen.version != firma_datos():
+            with st.spinner("Cargando datos..."):
+                cargar_en_almacen(almacen)
+        elif almacen.fecha_sueldos != datetime.date.today():
+            # Cambió el día: los aumentos con fecha futura que ya se cumplieron pasan al trabajador
+            if aplicar_sueldos_vigentes(almacen):
+                marcar_guardado(almacen)
+    return almacen
+
+# Tiempo total de esta ejecución del script (se registra al final de la página)
+inicio_pagina = time.perf_counter()
 
 # Título principal
 st.title("👕 Sistema de Nómina - Maquiladora Textil")
 st.markdown("---")
 
-# Función para calcular sueldos según ley mexicana
-def calcular_sueldos(sueldo_semanal):
-    """Calcula sueldo diario y por hora según ley mexicana"""
-    sueldo_diario = sueldo_semanal / 7
-    sueldo_hora = sueldo_diario / 8
-    return round(sueldo_diario, 2), round(sueldo_hora, 2)
-
 # Función para procesar archivo Excel
 def procesar_excel(uploaded_file):
     """Lee y procesa el archivo Excel del mostrador"""
     try:
-        # Leer el archivo Excel
-        df = pd.read_excel(uploaded_file)
-        
-        st.success(f"Archivo cargado: {uploaded_file.name}")
-        st.write("Vista previa de datos:")
-        st.dataframe(df.head())
+        # Leer el archivo Excel por bloques; la vista previa sale del primero
+        bloques = []
+        for bloque in leer_archivo_por_bloques(uploaded_file):
+            if not bloques:
+                st.success(f"Archivo cargado: {uploaded_file.name}")
+                st.write("Vista previa de datos:")
+                st.dataframe(bloque.head())
+            bloques.append(bloque)
         
+        df = pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame()
         return df
     except Exception as e:
         st.error(f"Error al leer el archivo: {str(e)}")
         return None
 
-# Función para calcular horas trabajadas
-def calcular_horas_trabajadas(entrada, salida):
-    """Calcula horas y minutos trabajados"""
-    if pd.isna(entrada) or pd.isna(salida):
-        return 0, 0, 0
+# Exportaciones en caché por versión de los datos (la del almacén es compartida por todas
+# las sesiones; lo que depende de una sesión usa un caché propio en st.session_state)
+MAX_EXPORTACIONES_EN_CACHE = 8
+
+def exportacion_en_cache(almacen, clave, cache=None):
+    """Devuelve el archivo ya generado si los datos no cambiaron desde entonces (o None)"""
+    cache = almacen.exportaciones if cache is None else cache
+    guardado = cache.get(clave)
+    if guardado and guardado[0] == almacen.version_datos:
+        return guardado[1]
+    return None
+
+def generar_exportacion(almacen, clave, generar, cache=None):
+    """Genera el archivo y lo guarda en caché con la versión actual de los datos"""
+    cache = almacen.exportaciones if cache is None else cache
+    version = almacen.version_datos
+    with medir_etapa('exportacion', clave):
+        datos = generar()
+    
+    with almacen.candado:
+        # Las de versiones anteriores ya no se pueden servir; de las demás se guardan pocas
+        for vieja in [c for c, (v, _) in cache.items() if v != version]:
+            del cache[vieja]
+        cache.pop(clave, None)
+        cache[clave] = (version, datos)
+        while len(cache) > MAX_EXPORTACIONES_EN_CACHE:
+            del cache[next(iter(cache))]
+    return datos
+
+def boton_exportacion(almacen, clave, etiqueta, generar, file_name, mime, cache=None):
+    """Genera la exportación solo al pedirla y después ofrece la descarga"""
+    datos = exportacion_en_cache(almacen, clave, cache)
+    if datos is None and st.button(f"⚙️ Preparar {etiqueta}", key=f"preparar_{clave}"):
+        with st.spinner(f"Generando {etiqueta}..."):
+            datos = generar_exportacion(almacen, clave, generar, cache)
+    
+    if datos is not None:
+        st.download_button(
+            label=f"📥 Descargar {etiqueta}",
+            data=datos,
+            file_name=file_name,
+            mime=mime,
+            key=f"descargar_{clave}"
+        )
+
+# Reporte personalizado de la sesión
+def generar_reporte_personalizado(almacen, tipo_reporte, intervalo):
+    """Reporte por intervalo guardado en la sesión con la versión de los datos que lo generó"""
+    version = almacen.version_datos
+    with medir_etapa('reporte_intervalo', tipo_reporte) as medicion:
+        df_reporte = reporte_por_intervalo(
+            almacen.agregados['dia'], almacen.empleados,
+            intervalo, almacen.indice_empleados, almacen.sueldos
+        )
+        medicion['filas'] = len(df_reporte)
+    st.session_state.reporte_personalizado = (tipo_reporte, version, df_reporte)
+    return df_reporte
+
+# --- Trabajos en segundo plano ---
+MAX_TRABAJOS_SIMULTANEOS = 2
+MAX_TRABAJOS_EN_TABLA = 50
+CARPETA_TEMPORAL = os.path.join(tempfile.gettempdir(), "nomina_trabajos")
+
+class Trabajo:
+    """Estado y resultado de un trabajo en segundo plano"""
+    
+    def __init__(self, tipo, descripcion):
+        self.id = uuid.uuid4().hex[:8]
+        self.tipo = tipo
+        self.descripcion = descripcion
+        self.estado = "en cola"
+        self.filas = 0
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self.error = None
+        self.resultado = None
+        self.total_filas = None
+        self.archivos = []  # archivos temporales del resultado (se borran con el trabajo)
+    
+    def tiempo_transcurrido(self):
+        """Segundos de ejecución (hasta ahora si sigue en proceso)"""
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.time()) - self.inicio
+
+class AdministradorTrabajos:
+    """Pool de hilos y tabla de trabajos compartidos por todas las sesiones"""
+    
+    def __init__(self, max_hilos=MAX_TRABAJOS_SIMULTANEOS):
+        self.ejecutor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="nomina")
+        self.trabajos = {}
+        self.candado = threading.Lock()
+    
+    def enviar(self, tipo, descripcion, funcion, *args, **kwargs):
+        """Encola una función; recibe el trabajo como primer argumento para reportar avance"""
+        trabajo = Trabajo(tipo, descripcion)
+        with self.candado:
+            self.trabajos[trabajo.id] = trabajo
+            # Conservar solo los trabajos más recientes
+            while len(self.trabajos) > MAX_TRABAJOS_EN_TABLA:
+                descartado = self.trabajos.pop(next(iter(self.trabajos)))
+                for ruta in descartado.archivos:
+                    if os.path.exists(ruta):
+                        os.remove(ruta)
+        
+        def ejecutar():
+            trabajo.estado = "en proceso"
+            trabajo.inicio = time.time()
+            try:
+                trabajo.resultado = funcion(trabajo, *args, **kwargs)
+                trabajo.estado = "terminado"
+            except Exception as e:
+                trabajo.error = str(e)
+                trabajo.estado = "fallido"
+            finally:
+                trabajo.fin = time.time()
+        
+        self.ejecutor.submit(ejecutar)
+        return trabajo
+    
+    def obtener(self, id_trabajo):
+        """Busca un trabajo por su ID (None si ya no está en la tabla)"""
+        return self.trabajos.get(id_trabajo)
+    
+    def tabla(self):
+        """Tabla de trabajos para mostrar en Configuración (más recientes primero)"""
+        filas = [
+            {
+                'ID': t.id,
+                'Tipo': t.tipo,
+                'Descripción': t.descripcion,
+                'Estado': t.estado,
+                'Filas': t.filas,
+                'Tiempo (s)': round(t.tiempo_transcurrido(), 1),
+                'Error': t.error or ''
+            }
+            for t in reversed(list(self.trabajos.values()))
+        ]
+        return pd.DataFrame(filas)
+
+@st.cache_resource
+def administrador_trabajos():
+    """Devuelve el administrador de trabajos único del proceso"""
+    return AdministradorTrabajos()
+
+# Trabajo de ingesta de asistencia
+def ejecutar_ingesta(trabajo, almacen, bloques, columnas, huella, nombre_archivo):
+    """Guarda cada bloque del archivo al procesarlo y confirma el lote al final"""
+    col_nombre, col_fecha, col_entrada, col_salida = columnas
+    ingesta = LoteIngesta(almacen, trabajo.id)
+    
+    # Tiempo acumulado de cada etapa (la lectura ocurre al pedir el siguiente bloque)
+    tiempos = {'lectura_archivo': 0.0, 'calculo_horas': 0.0, 'deduplicacion': 0.0}
+    
+    try:
+        marca = time.perf_counter()
+        for bloque in bloques:
+            ahora = time.perf_counter()
+            tiempos['lectura_archivo'] += ahora - marca
+            
+            nuevos_bloque = procesar_asistencia(
+                bloque, col_nombre, col_fecha, col_entrada, col_salida,
+                almacen.empleados, almacen.indice_nombres
+            )
+            marca = time.perf_counter()
+            tiempos['calculo_horas'] += marca - ahora
+            
+            # Descartar registros ya cargados (mismo trabajador, fecha y entrada) y guardar
+            # los nuevos sin confirmar: en memoria solo queda la vista previa
+            ingesta.agregar(nuevos_bloque)
+            trabajo.filas += len(bloque)
+            
+            ahora = time.perf_counter()
+            tiempos['deduplicacion'] += ahora - marca
+            marca = ahora
+        tiempos['lectura_archivo'] += time.perf_counter() - marca
+        
+        for etapa, segundos in tiempos.items():
+            registrar_medicion(etapa, segundos, trabajo.filas, nombre_archivo)
+        
+        # Confirmar el lote en disco y en memoria de una sola vez
+        ingesta.confirmar([(huella, nombre_archivo, ingesta.nuevos)])
+    except Exception:
+        # Deshacer lo guardado y liberar las claves reservadas para poder reintentarlo
+        ingesta.descartar()
+        raise
+    
+    return ingesta.resultado()
+
+# Trabajo de ingesta de checadas crudas (un evento por fila)
+def ejecutar_ingesta_checadas(trabajo, almacen, bloques, columnas, huella, nombre_archivo):
+    """Empareja las checadas de todo el archivo y confirma los turnos nuevos"""
+    col_nombre, col_fecha, col_hora = columnas
+    ingesta = LoteIngesta(almacen, trabajo.id)
+    
+    try:
+        # Los turnos pueden cruzar bloques: se empareja el archivo completo
+        with medir_etapa('lectura_archivo', nombre_archivo) as medicion:
+            checadas = pd.concat(list(bloques), ignore_index=True)
+            medicion['filas'] = len(checadas)
+        trabajo.filas = len(checadas)
+        
+        with medir_etapa('emparejar_checadas', nombre_archivo) as medicion:
+            nuevos_df, sueltas = procesar_checadas(
+                checadas, col_nombre, col_fecha, col_hora,
+                almacen.empleados, almacen.indice_nombres
+            )
+            medicion['filas'] = len(checadas)
+        
+        with medir_etapa('deduplicacion', nombre_archivo) as medicion:
+            medicion['filas'] = ingesta.agregar(nuevos_df)
+        
+        ingesta.confirmar([(huella, nombre_archivo, ingesta.nuevos)])
+    except Exception:
+        ingesta.descartar()
+        raise
+    
+    resultado = ingesta.resultado()
+    resultado['sueltas'] = sueltas
+    return resultado
+
+# Trabajo de ingesta de varios archivos en paralelo
+def ejecutar_ingesta_lote(trabajo, almacen, archivos, mapeos):
+    """Procesa varios archivos en un pool de procesos y confirma todo en un solo lote"""
+    def al_terminar(nombre_archivo, registros_df):
+        trabajo.filas += len(registros_df)
     
-    # Convertir a datetime si son strings
-    if isinstance(entrada, str):
-        entrada = pd.to_datetime(entrada, errors='coerce')
-    if isinstance(salida, str):
-        salida = pd.to_datetime(salida, errors='coerce')
+    return ingestar_lote(almacen, trabajo.id, archivos, mapeos, al_terminar=al_terminar)
+
+# Trabajo de generación del reporte de nómina
+def ejecutar_reporte_nomina(trabajo, almacen, fecha_inicio, fecha_fin):
+    """Genera el reporte del período en segundo plano"""
+    reporte = generar_reporte_nomina(almacen, fecha_inicio, fecha_fin)
+    trabajo.filas = reporte['filas']
+    return reporte
+
+# Trabajo de generación de recibos individuales
+def ejecutar_recibos(trabajo, almacen, resultado):
+    """Genera un recibo por trabajador del reporte en un .zip en disco; devuelve su ruta"""
+    # openpyxl y el pool de procesos se importan solo cuando se piden los recibos
+    from recibos import recibos_en_zip
     
-    if pd.isna(entrada) or pd.isna(salida):
-        return 0, 0, 0
+    def al_terminar(recibos):
+        trabajo.filas += recibos
     
-    # Calcular diferencia
-    diferencia = salida - entrada
-    horas = diferencia.seconds // 3600
-    minutos = (diferencia.seconds % 3600) // 60
+    periodo = f"{resultado['fecha_inicio']} al {resultado['fecha_fin']}"
+    with medir_etapa('recibos', periodo) as medicion:
+        registros_periodo = filtrar_registros_periodo(
+            almacen.registros, resultado['fecha_inicio'], resultado['fecha_fin']
+        )
+        # El .zip se escribe en disco conforme terminan los recibos (no queda en memoria)
+        os.makedirs(CARPETA_TEMPORAL, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=CARPETA_TEMPORAL, prefix=f"recibos_{trabajo.id}_", suffix=".zip", delete=False
+        ) as salida:
+            trabajo.archivos.append(salida.name)
+            medicion['filas'] = recibos_en_zip(
+                resultado['resumen'], registros_periodo, salida, al_terminar=al_terminar
+            )
+    return salida.name
+
+# Historial de registros paginado
+def filtrar_historial(registros_df, nombres=None, fecha_inicio=None,
+                      fecha_fin=None, lote=None):
+    """Posiciones de los registros que cumplen los filtros (sin copiar el DataFrame)"""
+    # Las fechas acotan un tramo de los registros ordenados; el resto se filtra dentro
+    inicio, fin = 0, len(registros_df)
+    if fecha_inicio is not None or fecha_fin is not None:
+        inicio, fin = posiciones_periodo(registros_df, fecha_inicio, fecha_fin)
+    tramo = registros_df.iloc[inicio:fin]
     
-    # Convertir a horas decimales (ej: 8:30 = 8.5)
-    total_decimal = horas + (minutos / 60)
+    mascara = np.ones(len(tramo), dtype=bool)
+    if nombres:
+        mascara &= tramo['Nombre'].isin(nombres).to_numpy()
+    if lote is not None:
+        mascara &= (tramo['Lote'] == lote).to_numpy()
+    return inicio + np.flatnonzero(mascara)
+
+def pagina_historial(registros_df, posiciones, pagina, tamano_pagina):
+    """Solo las filas de la página pedida (lo único que se envía al navegador)"""
+    inicio = (pagina - 1) * tamano_pagina
+    return registros_df.iloc[posiciones[inicio:inicio + tamano_pagina]]
+
+def filtros_historial_sqlite(almacen, nombres=None, fecha_inicio=None,
+                             fecha_fin=None, lote=None):
+    """Filtros del historial para SQLite: los trabajadores registrados se buscan por su ID"""
+    filas = [almacen.indice_empleados[n] for n in nombres or [] if n in almacen.indice_empleados]
+    ids = almacen.empleados['ID'].loc[filas].dropna().tolist()
+    return {
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'id_trabajador': ids or None,
+        # Los registros sin trabajador asignado solo se encuentran por nombre
+        'nombres': nombres or None,
+        'lote': lote
+    }
+
+def etiquetas_lotes(lotes, archivos_procesados):
+    """Diccionario lote -> descripción con los archivos que lo formaron"""
+    archivos_por_lote = {}
+    for info in archivos_procesados.values():
+        if pd.notna(info.get('Lote')):
+            archivos_por_lote.setdefault(info['Lote'], []).append(str(info['Archivo']))
     
-    return horas, minutos, round(total_decimal, 2)
+    return {
+        lote: f"{lote} ({', '.join(archivos_por_lote.get(lote, []))})"
+        for lote in lotes
+    }
+
+# Mostrar el estado de un trabajo de la sesión
+def mostrar_estado_trabajo(trabajo):
+    """Muestra el avance de un trabajo pendiente; devuelve True si ya terminó"""
+    if trabajo.estado in ("en cola", "en proceso"):
+        filas = f"{trabajo.filas} de {trabajo.total_filas}" if trabajo.total_filas else trabajo.filas
+        st.info(
+            f"⏳ Trabajo {trabajo.id} {trabajo.estado}: {filas} filas, "
+            f"{trabajo.tiempo_transcurrido():.1f} s"
+        )
+        if trabajo.total_filas:
+            st.progress(min(trabajo.filas / trabajo.total_filas, 1.0))
+        st.button("🔄 Actualizar estado", key=f"actualizar_{trabajo.id}")
+        return False
+    if trabajo.estado == "fallido":
+        st.error(f"❌ El trabajo {trabajo.id} falló: {trabajo.error}")
+        return False
+    return True
 
 # Barra lateral para navegación
 st.sidebar.title("📊 Navegación")
@@ -123,31 +424,17 @@ opcion = st.sidebar.radio(
      "📊 Reporte de Nómina", "💾 Exportar Datos", "⚙️ Configuración"]
 )
 
+# Los datos se cargan después de dibujar la navegación (una vez por proceso, no por
+# sesión); Inicio muestra primero su contenido fijo y carga los datos al final
+if opcion != "🏠 Inicio":
+    almacen = obtener_almacen()
+
 # --- PÁGINA DE INICIO ---
 if opcion == "🏠 Inicio":
     st.header("Bienvenido al Sistema de Nómina")
     
     col1, col2, col3 = st.columns(3)
     
-    with col1:
-        if 'Activo' in st.session_state.empleados.columns:
-            trabajadores_activos = st.session_state.empleados[
-                st.session_state.empleados['Activo'] == True
-            ]
-            st.metric("Trabajadores Activos", len(trabajadores_activos))
-        else:
-            st.metric("Trabajadores Activos", 0)
-    
-    with col2:
-        st.metric("Registros de Asistencia", len(st.session_state.registros))
-    
-    with col3:
-        if 'Total_Horas_Decimal' in st.session_state.registros.columns:
-            total_horas = st.session_state.registros['Total_Horas_Decimal'].sum()
-            st.metric("Horas Totales Trabajadas", f"{total_horas:.1f}")
-        else:
-            st.metric("Horas Totales Trabajadas", 0)
-    
     st.markdown("---")
     st.subheader("📋 Instrucciones Rápidas")
     
@@ -160,15 +447,34 @@ if opcion == "🏠 Inicio":
     """
     st.info(instrucciones)
     
+    # Las métricas se llenan en sus columnas cuando los datos ya están cargados
+    almacen = obtener_almacen()
+    
+    with col1:
+        if 'Activo' in almacen.empleados.columns:
+            trabajadores_activos = almacen.empleados[
+                almacen.empleados['Activo'] == True
+            ]
+            st.metric("Trabajadores Activos", len(trabajadores_activos))
+        else:
+            st.metric("Trabajadores Activos", 0)
+    
+    total_registros, total_horas = totales_registros(almacen)
+    with col2:
+        st.metric("Registros de Asistencia", total_registros)
+    
+    with col3:
+        st.metric("Horas Totales Trabajadas", f"{total_horas:.1f}")
+    
     # Mostrar vista previa de datos
     with st.expander("📁 Vista previa de datos"):
         col1, col2 = st.columns(2)
         with col1:
             st.write("**Empleados:**")
-            st.dataframe(st.session_state.empleados.head(), use_container_width=True)
+            st.dataframe(almacen.empleados.head(), use_container_width=True)
         with col2:
             st.write("**Registros recientes:**")
-            st.dataframe(st.session_state.registros.head(), use_container_width=True)
+            st.dataframe(registros_recientes(almacen), use_container_width=True)
 
 # --- ALTA DE TRABAJADORES ---
 elif opcion == "👥 Alta de Trabajadores":
@@ -197,12 +503,12 @@ elif opcion == "👥 Alta de Trabajadores":
         
         if submitted and nombre:
             # Verificar si el nombre ya existe
-            if nombre in st.session_state.empleados['Nombre'].values:
+            if nombre in almacen.indice_empleados:
                 st.error(f"❌ El trabajador {nombre} ya está registrado.")
             else:
                 # Generar ID único
-                if not st.session_state.empleados.empty and 'ID' in st.session_state.empleados.columns:
-                    nuevo_id = st.session_state.empleados['ID'].max() + 1
+                if not almacen.empleados.empty and 'ID' in almacen.empleados.columns:
+                    nuevo_id = almacen.empleados['ID'].max() + 1
                 else:
                     nuevo_id = 1
                 
@@ -210,7 +516,7 @@ elif opcion == "👥 Alta de Trabajadores":
                 sueldo_diario, sueldo_hora = calcular_sueldos(sueldo_semanal)
                 
                 # Crear nuevo registro
-                nuevo_trabajador = pd.DataFrame([{
+                nuevo_trabajador = aplicar_esquema_empleados(pd.DataFrame([{
                     'ID': nuevo_id,
                     'Nombre': nombre,
                     'Sueldo_Semanal': sueldo_semanal,
@@ -218,25 +524,37 @@ elif opcion == "👥 Alta de Trabajadores":
                     'Sueldo_Hora': sueldo_hora,
                     'Fecha_Alta': datetime.date.today().strftime("%Y-%m-%d"),
                     'Activo': True
-                }])
-                
-                # Agregar a la lista
-                st.session_state.empleados = pd.concat(
-                    [st.session_state.empleados, nuevo_trabajador],
-                    ignore_index=True
-                )
+                }]))
                 
-                # Guardar en CSV
-                guardar_datos(st.session_state.empleados, st.session_state.registros)
+                with almacen.candado:
+                    # Agregar a la lista y actualizar el índice sin reconstruirlo
+                    almacen.empleados = pd.concat(
+                        [almacen.empleados, nuevo_trabajador],
+                        ignore_index=True
+                    )
+                    almacen.indice_empleados[nombre] = almacen.empleados.index[-1]
+                    almacen.sueldos = registrar_sueldo(
+                        almacen.sueldos, nuevo_id, sueldo_semanal, datetime.date.today()
+                    )
+                    agregar_a_indice_nombres(
+                        almacen.indice_nombres, nombre, almacen.empleados.index[-1]
+                    )
+                    
+                    # Registrar el alta en la bitácora
+                    registrar_cambio(
+                        'alta_empleado', almacen.empleados, almacen.registros,
+                        fila=nuevo_trabajador.iloc[0].to_dict()
+                    )
+                    marcar_guardado(almacen)
                 
                 st.success(f"✅ Trabajador {nombre} registrado exitosamente!")
     
     st.markdown("---")
     st.subheader("📋 Lista de Trabajadores")
     
-    if not st.session_state.empleados.empty:
+    if not almacen.empleados.empty:
         # Mostrar tabla de trabajadores
-        trabajadores_display = st.session_state.empleados.copy()
+        trabajadores_display = almacen.empleados.copy()
         
         # Filtrar columnas si existen
         columnas_a_mostrar = ['ID', 'Nombre', 'Sueldo_Semanal', 'Sueldo_Diario', 
@@ -251,9 +569,9 @@ elif opcion == "👥 Alta de Trabajadores":
         
         # Opción para desactivar/activar trabajador
         with st.expander("🔧 Gestión de Trabajadores"):
-            trabajadores_activos = st.session_state.empleados[
-                (st.session_state.empleados['Activo'] == True) | 
-                (pd.isna(st.session_state.empleados['Activo']))
+            trabajadores_activos = almacen.empleados[
+                (almacen.empleados['Activo'] == True) | 
+                (pd.isna(almacen.empleados['Activo']))
             ]
             
             if not trabajadores_activos.empty:
@@ -262,49 +580,75 @@ elif opcion == "👥 Alta de Trabajadores":
                     options=trabajadores_activos['Nombre'].tolist()
                 )
                 
+                idx = almacen.indice_empleados[trabajador_a_editar]
+                
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("Desactivar Trabajador"):
-                        idx = st.session_state.empleados[
-                            st.session_state.empleados['Nombre'] == trabajador_a_editar
-                        ].index[0]
-                        st.session_state.empleados.at[idx, 'Activo'] = False
-                        guardar_datos(st.session_state.empleados, st.session_state.registros)
+                        with almacen.candado:
+                            almacen.empleados.at[idx, 'Activo'] = False
+                            registrar_cambio(
+                                'actualizar_empleado', almacen.empleados, almacen.registros,
+                                id=almacen.empleados.at[idx, 'ID'], campos={'Activo': False}
+                            )
+                            marcar_guardado(almacen)
                         st.success(f"Trabajador {trabajador_a_editar} desactivado")
                         st.rerun()
                     
                     # Mostrar estado actual
-                    estado_actual = st.session_state.empleados[
-                        st.session_state.empleados['Nombre'] == trabajador_a_editar
-                    ]['Activo'].values[0]
+                    estado_actual = almacen.empleados.at[idx, 'Activo']
                     st.write(f"Estado actual: {'Activo' if estado_actual else 'Inactivo'}")
                 
                 with col2:
                     # Actualizar sueldo
-                    sueldo_actual = float(st.session_state.empleados[
-                        st.session_state.empleados['Nombre'] == trabajador_a_editar
-                    ]['Sueldo_Semanal'].values[0])
+                    sueldo_actual = float(almacen.empleados.at[idx, 'Sueldo_Semanal'])
                     
                     nuevo_sueldo = st.number_input(
                         "Nuevo sueldo semanal",
                         value=sueldo_actual,
                         key="nuevo_sueldo"
                     )
+                    vigente_desde = st.date_input(
+                        "Vigente desde",
+                        value=datetime.date.today(),
+                        key="vigente_desde",
+                        help="Los reportes de fechas anteriores conservan el sueldo que tenían"
+                    )
                     
                     if st.button("Actualizar Sueldo"):
-                        idx = st.session_state.empleados[
-                            st.session_state.empleados['Nombre'] == trabajador_a_editar
-                        ].index[0]
-                        
-                        st.session_state.empleados.at[idx, 'Sueldo_Semanal'] = nuevo_sueldo
-                        sueldo_diario, sueldo_hora = calcular_sueldos(nuevo_sueldo)
-                        st.session_state.empleados.at[idx, 'Sueldo_Diario'] = sueldo_diario
-                        st.session_state.empleados.at[idx, 'Sueldo_Hora'] = sueldo_hora
-                        
-                        guardar_datos(st.session_state.empleados, st.session_state.registros)
+                        id_empleado = almacen.empleados.at[idx, 'ID']
+                        with almacen.candado:
+                            # Primer cambio: se guarda también el sueldo que tenía hasta ahora
+                            if not (almacen.sueldos['ID'] == id_empleado).any():
+                                almacen.sueldos = registrar_sueldo(
+                                    almacen.sueldos, id_empleado, sueldo_actual,
+                                    almacen.empleados.at[idx, 'Fecha_Alta']
+                                    if pd.notna(almacen.empleados.at[idx, 'Fecha_Alta'])
+                                    else FECHA_BASE_SUELDOS
+                                )
+                            almacen.sueldos = registrar_sueldo(
+                                almacen.sueldos, id_empleado, nuevo_sueldo, vigente_desde
+                            )
+                            
+                            # El sueldo actual del trabajador es el del historial vigente hoy
+                            # (uno con fecha futura se le pasa cuando llegue esa fecha)
+                            aplicar_sueldos_vigentes(almacen)
+                            marcar_guardado(almacen)
                         
                         st.success("Sueldo actualizado!")
                         st.rerun()
+                
+                # Historial de sueldos del trabajador seleccionado
+                historial_trabajador = almacen.sueldos[
+                    almacen.sueldos['ID'] == almacen.empleados.at[idx, 'ID']
+                ]
+                if not historial_trabajador.empty:
+                    st.write("**Historial de sueldos:**")
+                    st.dataframe(
+                        historial_trabajador.sort_values('Vigente_Desde'),
+                        use_container_width=True,
+                        hide_index=True
+                    )
     else:
         st.info("No hay trabajadores registrados. Agrega el primero usando el formulario arriba.")
 
@@ -321,18 +665,54 @@ elif opcion == "📤 Cargar Asistencia":
       - Hora de salida
     """)
     
-    # Uploader de archivo
-    uploaded_file = st.file_uploader(
-        "Sube el archivo Excel del mostrador",
-        type=['xlsx', 'xls', 'csv']
+    modo_carga = st.radio(
+        "Modo de carga:",
+        ["Un archivo", "Varios archivos (lote)"],
+        horizontal=True
     )
     
+    # Uploader de archivo
+    uploaded_file = None
+    if modo_carga == "Un archivo":
+        uploaded_file = st.file_uploader(
+            "Sube el archivo Excel del mostrador",
+            type=['xlsx', 'xls', 'csv']
+        )
+    
     if uploaded_file:
+        modo_bloques = st.checkbox(
+            "Procesar por bloques (archivos muy grandes)",
+            help="Lee y guarda el archivo en bloques de filas sin cargarlo completo en memoria"
+        )
+        
+        # Verificar si el archivo ya fue procesado antes
+        huella = huella_archivo(uploaded_file)
+        procesado_antes = almacen.archivos_procesados.get(huella)
+        reprocesar = True
+        if procesado_antes:
+            st.warning(
+                f"⚠️ Este archivo ya fue procesado el {procesado_antes['Fecha_Proceso']} "
+                f"({procesado_antes['Archivo']}, {procesado_antes['Registros']} registros)."
+            )
+            reprocesar = st.checkbox(
+                "Procesar de todos modos (los registros repetidos se omitirán)"
+            )
+        
+        # Seleccionar hoja si el libro tiene varias
+        hoja = None
+        if es_xlsx(uploaded_file.name):
+            hojas = hojas_excel(uploaded_file)
+            if len(hojas) > 1:
+                hoja = st.selectbox("Hoja del libro:", options=hojas)
+        
         # Determinar tipo de archivo
-        if uploaded_file.name.endswith('.csv'):
+        if modo_bloques:
+            # Solo se lee el primer bloque para la vista previa
+            df = next(leer_archivo_por_bloques(uploaded_file, hoja), pd.DataFrame())
+        elif uploaded_file.name.endswith('.csv'):
             df = pd.read_csv(uploaded_file)
         else:
-            df = pd.read_excel(uploaded_file)
+            df = pd.read_excel(uploaded_file, sheet_name=hoja or 0)
         
         st.success(f"Archivo cargado: {uploaded_file.name}")
         st.write("Vista previa de datos:")
@@ -345,112 +725,321 @@ elif opcion == "📤 Cargar Asistencia":
         st.write("**Columnas en tu archivo:**")
         st.write(df.columns.tolist())
         
-        col1, col2, col3, col4 = st.columns(4)
+        formato_archivo = st.radio(
+            "Formato del archivo:",
+            ["Entrada y salida por fila", "Checadas crudas (una checada por fila)"],
+            horizontal=True,
+            help="Checadas crudas: el reloj exporta un renglón por cada vez que el trabajador checa"
+        )
+        checadas_crudas = formato_archivo != "Entrada y salida por fila"
         
-        with col1:
-            col_nombre = st.selectbox(
-                "Columna con Nombres:",
-                options=df.columns.tolist()
+        if checadas_crudas:
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                col_nombre = st.selectbox(
+                    "Columna con Nombres:",
+                    options=df.columns.tolist()
+                )
+            
+            with col2:
+                col_fecha = st.selectbox(
+                    "Columna con Fecha (o fecha y hora):",
+                    options=df.columns.tolist()
+                )
+            
+            with col3:
+                col_hora = st.selectbox(
+                    "Columna con Hora (opcional):",
+                    options=["(incluida en la fecha)"] + df.columns.tolist()
+                )
+                if col_hora == "(incluida en la fecha)":
+                    col_hora = None
+            
+            st.caption(
+                "Las checadas se emparejan en orden (entrada, salida, entrada, salida...). "
+                "Descansos de hasta 4 horas forman parte del mismo turno y los turnos "
+                "nocturnos se asignan al día en que empezaron."
             )
+        else:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                col_nombre = st.selectbox(
+                    "Columna con Nombres:",
+                    options=df.columns.tolist()
+                )
+            
+            with col2:
+                col_fecha = st.selectbox(
+                    "Columna con Fecha:",
+                    options=df.columns.tolist()
+                )
+            
+            with col3:
+                col_entrada = st.selectbox(
+                    "Columna Hora Entrada:",
+                    options=df.columns.tolist()
+                )
+            
+            with col4:
+                col_salida = st.selectbox(
+                    "Columna Hora Salida:",
+                    options=df.columns.tolist()
+                )
         
-        with col2:
-            col_fecha = st.selectbox(
-                "Columna con Fecha:",
-                options=df.columns.tolist()
+        if st.button("Procesar Asistencia", type="primary", disabled=not reprocesar):
+            if modo_bloques:
+                # Copia del archivo: el trabajo sigue leyéndolo tras el rerun
+                copia = BytesIO(uploaded_file.getvalue())
+                copia.name = uploaded_file.name
+                bloques = leer_archivo_por_bloques(copia, hoja)
+                total_filas = estimar_filas(copia, hoja) if es_xlsx(uploaded_file.name) else None
+            else:
+                bloques = [df]
+                total_filas = len(df)
+            
+            if checadas_crudas:
+                trabajo = administrador_trabajos().enviar(
+                    "Ingesta", uploaded_file.name, ejecutar_ingesta_checadas, almacen, bloques,
+                    (col_nombre, col_fecha, col_hora), huella, uploaded_file.name
+                )
+            else:
+                trabajo = administrador_trabajos().enviar(
+                    "Ingesta", uploaded_file.name, ejecutar_ingesta, almacen, bloques,
+                    (col_nombre, col_fecha, col_entrada, col_salida),
+                    huella, uploaded_file.name
+                )
+            trabajo.total_filas = total_filas
+            st.session_state.trabajo_ingesta = trabajo.id
+    
+    # Carga por lotes: varios archivos (o un .zip) con mapeo guardado por formato
+    if modo_carga == "Varios archivos (lote)":
+        archivos_subidos = st.file_uploader(
+            "Sube los archivos de los relojes checadores (o un .zip con ellos)",
+            type=['xlsx', 'xls', 'csv', 'zip'],
+            accept_multiple_files=True
+        )
+        carpeta = st.text_input("O ruta de una carpeta en el servidor (opcional)")
+        
+        archivos = expandir_archivos(archivos_subidos or [])
+        if carpeta:
+            if os.path.isdir(carpeta):
+                archivos += archivos_de_carpeta(carpeta)
+            else:
+                st.error(f"No se encontró la carpeta {carpeta}")
+        # Los checadores exportan con el mismo nombre: cada archivo debe tener uno propio
+        archivos = nombres_unicos(archivos)
+        
+        if archivos:
+            # Agrupar archivos por formato (mismas columnas)
+            formatos = {}
+            formato_de = {}
+            for nombre_archivo, contenido in archivos:
+                columnas = columnas_archivo(nombre_archivo, contenido)
+                formato_de[nombre_archivo] = clave_formato(columnas)
+                formatos.setdefault(formato_de[nombre_archivo], (columnas, []))[1].append(nombre_archivo)
+            
+            huellas = {
+                nombre_archivo: hashlib.sha256(contenido).hexdigest()
+                for nombre_archivo, contenido in archivos
+            }
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        'Archivo': nombre_archivo,
+                        'Formato': list(formatos).index(formato_de[nombre_archivo]) + 1,
+                        'Ya procesado': huellas[nombre_archivo] in almacen.archivos_procesados
+                    }
+                    for nombre_archivo, _ in archivos
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            # Mapeo de columnas por formato (se guarda para la próxima semana)
+            st.subheader("🔧 Configurar Columnas por Formato")
+            mapeos_guardados = cargar_mapeos_columnas()
+            mapeos_formato = {}
+            for numero, (clave, (columnas, nombres)) in enumerate(formatos.items(), start=1):
+                guardado = mapeos_guardados.get(clave, {})
+                with st.expander(f"Formato {numero}: {len(nombres)} archivo(s)", expanded=clave not in mapeos_guardados):
+                    st.write(", ".join(nombres))
+                    cols = st.columns(len(CAMPOS_MAPEO))
+                    mapeo = {}
+                    for col, campo in zip(cols, CAMPOS_MAPEO):
+                        with col:
+                            mapeo[campo] = st.selectbox(
+                                f"Columna {campo}:",
+                                options=columnas,
+                                index=columnas.index(guardado[campo]) if guardado.get(campo) in columnas else 0,
+                                key=f"mapeo_{numero}_{campo}"
+                            )
+                    mapeos_formato[clave] = mapeo
+            
+            incluir_procesados = st.checkbox(
+                "Incluir archivos ya procesados (los registros repetidos se omitirán)"
             )
+            
+            if st.button("Procesar Lote", type="primary"):
+                mapeos_guardados.update(mapeos_formato)
+                guardar_mapeos_columnas(mapeos_guardados)
+                
+                seleccion = [
+                    (nombre_archivo, contenido) for nombre_archivo, contenido in archivos
+                    if incluir_procesados or huellas[nombre_archivo] not in almacen.archivos_procesados
+                ]
+                mapeos = {
+                    nombre_archivo: mapeos_formato[formato_de[nombre_archivo]]
+                    for nombre_archivo, _ in seleccion
+                }
+                
+                if seleccion:
+                    trabajo = administrador_trabajos().enviar(
+                        "Ingesta por lote", f"{len(seleccion)} archivos",
+                        ejecutar_ingesta_lote, almacen, seleccion, mapeos
+                    )
+                    st.session_state.trabajo_ingesta = trabajo.id
+                else:
+                    st.warning("Todos los archivos ya fueron procesados.")
+    
+    # Estado del último trabajo de ingesta de esta sesión
+    trabajo = administrador_trabajos().obtener(st.session_state.get('trabajo_ingesta'))
+    if trabajo and mostrar_estado_trabajo(trabajo):
+        resultado = trabajo.resultado
+        if resultado['omitidos']:
+            st.info(f"ℹ️ {resultado['omitidos']} registros duplicados omitidos (ya estaban cargados).")
         
-        with col3:
-            col_entrada = st.selectbox(
-                "Columna Hora Entrada:",
-                options=df.columns.tolist()
+        por_revisar = resultado.get('por_revisar')
+        if por_revisar is not None and not por_revisar.empty:
+            st.warning(
+                f"⚠️ {len(por_revisar)} nombres del archivo no coinciden con ningún trabajador "
+                "(o coinciden con varios, o solo se parecen a uno); sus registros no entran en la "
+                "nómina hasta corregirlos o confirmarlos en \"Revisar nombres sin trabajador\":"
             )
+            st.dataframe(por_revisar, use_container_width=True)
         
-        with col4:
-            col_salida = st.selectbox(
-                "Columna Hora Salida:",
-                options=df.columns.tolist()
+        sueltas = resultado.get('sueltas')
+        if sueltas is not None and not sueltas.empty:
+            st.warning(
+                f"⚠️ {len(sueltas)} checadas sin pareja (falta la entrada o la salida); "
+                "no se contaron horas para ellas. Revísalas con el trabajador:"
             )
+            st.dataframe(sueltas.head(100), use_container_width=True)
         
-        if st.button("Procesar Asistencia", type="primary"):
-            with st.spinner("Procesando registros..."):
-                nuevos_registros = []
-                
-                for idx, row in df.iterrows():
-                    nombre = row[col_nombre]
-                    fecha = row[col_fecha]
-                    entrada = row[col_entrada]
-                    salida = row[col_salida]
-                    
-                    # Calcular horas trabajadas
-                    horas, minutos, total_decimal = calcular_horas_trabajadas(entrada, salida)
-                    
-                    # Buscar ID del trabajador
-                    trabajador_info = st.session_state.empleados[
-                        st.session_state.empleados['Nombre'] == nombre
-                    ]
-                    
-                    id_trabajador = trabajador_info['ID'].values[0] if not trabajador_info.empty else None
-                    
-                    nuevo_registro = {
-                        'ID_Trabajador': id_trabajador,
-                        'Nombre': nombre,
-                        'Fecha': fecha,
-                        'Hora_Entrada': entrada,
-                        'Hora_Salida': salida,
-                        'Horas_Trabajadas': horas,
-                        'Minutos_Trabajados': minutos,
-                        'Total_Horas_Decimal': total_decimal
-                    }
-                    
-                    nuevos_registros.append(nuevo_registro)
+        if resultado['nuevos']:
+            st.success(
+                f"✅ {resultado['nuevos']} registros procesados exitosamente! "
+                f"({trabajo.descripcion}, {trabajo.tiempo_transcurrido():.1f} s)"
+            )
+            
+            # Mostrar resumen
+            st.subheader("📈 Resumen del Procesamiento")
+            st.dataframe(
+                resultado['vista'],
+                use_container_width=True
+            )
+    
+    # Nombres sin trabajador: los parecidos se asignan solo al confirmarlos aquí
+    if hay_registros(almacen) and st.checkbox("🔎 Revisar nombres sin trabajador"):
+        pendientes = nombres_por_revisar(registros_sin_trabajador(almacen), almacen.indice_nombres)
+        if pendientes.empty:
+            st.success("Todos los registros tienen un trabajador asignado.")
+        else:
+            st.dataframe(pendientes, use_container_width=True, hide_index=True)
+            
+            por_confirmar = pendientes.loc[pendientes['Candidatos'] != '', 'Nombre']
+            if not por_confirmar.empty:
+                col1, col2 = st.columns(2)
+                with col1:
+                    nombre_revisar = st.selectbox("Nombre del archivo:", options=por_confirmar)
+                with col2:
+                    candidatos = resolver_nombres(
+                        [nombre_revisar], almacen.indice_nombres
+                    )['Candidatos'].iloc[0]
+                    elegido = st.selectbox("Es el trabajador:", options=candidatos)
                 
-                # Agregar a registros existentes
-                if nuevos_registros:
-                    nuevos_df = pd.DataFrame(nuevos_registros)
-                    st.session_state.registros = pd.concat(
-                        [st.session_state.registros, nuevos_df],
-                        ignore_index=True
-                    )
-                    
-                    # Guardar en CSV
-                    guardar_datos(st.session_state.empleados, st.session_state.registros)
-                    
-                    st.success(f"✅ {len(nuevos_registros)} registros procesados exitosamente!")
-                    
-                    # Mostrar resumen
-                    st.subheader("📈 Resumen del Procesamiento")
-                    st.dataframe(
-                        nuevos_df.head(10),
-                        use_container_width=True
-                    )
+                if st.button("Confirmar trabajador"):
+                    id_elegido = almacen.empleados.at[almacen.indice_empleados[elegido], 'ID']
+                    cambiados = asignar_trabajador(almacen, nombre_revisar, id_elegido)
+                    st.success(f"✅ {cambiados} registros de \"{nombre_revisar}\" asignados a {elegido}")
+                    st.rerun()
     
-    # Mostrar historial de registros
-    if not st.session_state.registros.empty:
+    # Mostrar historial de registros (paginado y filtrado en el servidor)
+    if hay_registros(almacen):
         st.markdown("---")
         st.subheader("📋 Historial de Registros")
         
-        st.dataframe(
-            st.session_state.registros,
-            use_container_width=True
-        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            filtro_nombres = st.multiselect(
+                "Trabajadores:",
+                options=sorted(almacen.agregados['dia'].index.get_level_values('Nombre').unique())
+            )
+        with col2:
+            filtrar_fechas = st.checkbox("Filtrar por fecha")
+            filtro_inicio = filtro_fin = None
+            if filtrar_fechas:
+                filtro_inicio = st.date_input("Desde", key="historial_desde")
+                filtro_fin = st.date_input("Hasta", key="historial_hasta")
+        with col3:
+            lotes = etiquetas_lotes(lotes_registrados(almacen), almacen.archivos_procesados)
+            filtro_lote = st.selectbox(
+                "Lote de carga:",
+                options=[None] + list(lotes),
+                format_func=lambda lote: "Todos" if lote is None else lotes[lote]
+            )
+        
+        if ALMACENAMIENTO == "sqlite":
+            # Consultas indexadas: solo se leen de la base las filas de la página
+            filtros = filtros_historial_sqlite(
+                almacen, filtro_nombres, filtro_inicio, filtro_fin, filtro_lote
+            )
+            encontrados = contar_registros_sqlite(**filtros)[0]
+        else:
+            posiciones = filtrar_historial(
+                almacen.registros, filtro_nombres,
+                filtro_inicio, filtro_fin, filtro_lote
+            )
+            encontrados = len(posiciones)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            tamano_pagina = st.selectbox("Registros por página:", options=[50, 100, 500], index=1)
+        total_paginas = max(1, -(-encontrados // tamano_pagina))
+        with col2:
+            pagina = st.number_input("Página:", min_value=1, max_value=total_paginas, value=1)
+        
+        st.caption(f"{encontrados} registros encontrados — página {pagina} de {total_paginas}")
+        if ALMACENAMIENTO == "sqlite":
+            vista_pagina = aplicar_esquema_registros(consultar_registros_sqlite(
+                **filtros, limite=tamano_pagina, desplazamiento=(pagina - 1) * tamano_pagina
+            ))
+        else:
+            vista_pagina = pagina_historial(almacen.registros, posiciones, pagina, tamano_pagina)
+        st.dataframe(vista_pagina, use_container_width=True)
 
 # --- REPORTE DE NÓMINA ---
 elif opcion == "📊 Reporte de Nómina":
     st.header("📊 Reporte de Nómina")
     
-    if st.session_state.registros.empty:
+    if not hay_registros(almacen):
         st.warning("No hay registros de asistencia para generar reporte.")
     else:
         # Seleccionar período
         col1, col2 = st.columns(2)
         
         with col1:
-            # Convertir fecha a formato datetime para obtener min/max
+            # Registros ordenados por fecha: min/max son la primera y la última fila
             try:
-                registros_fecha = st.session_state.registros.copy()
-                registros_fecha['Fecha'] = pd.to_datetime(registros_fecha['Fecha'], errors='coerce')
-                fecha_min = registros_fecha['Fecha'].min().date()
-                fecha_max = registros_fecha['Fecha'].max().date()
+                if ALMACENAMIENTO == "sqlite":
+                    fecha_min, fecha_max = (
+                        datetime.date.fromisoformat(f) for f in rango_fechas_sqlite()
+                    )
+                else:
+                    fecha_min, fecha_max = (
+                        f.date() for f in rango_fechas(almacen.registros)
+                    )
             except:
                 fecha_min = datetime.date.today()
                 fecha_max = datetime.date.today()
@@ -467,65 +1056,40 @@ elif opcion == "📊 Reporte de Nómina":
             )
         
         if st.button("Generar Reporte de Nómina", type="primary"):
-            # Filtrar por fecha
-            registros_filtrados = st.session_state.registros.copy()
-            registros_filtrados['Fecha_dt'] = pd.to_datetime(registros_filtrados['Fecha'], errors='coerce').dt.date
-            
-            if fecha_inicio and fecha_fin:
-                registros_filtrados = registros_filtrados[
-                    (registros_filtrados['Fecha_dt'] >= fecha_inicio) &
-                    (registros_filtrados['Fecha_dt'] <= fecha_fin)
-                ]
-            
-            # Agrupar por trabajador
-            resumen_nomina = []
-            
-            for nombre in registros_filtrados['Nombre'].unique():
-                registros_trabajador = registros_filtrados[
-                    registros_filtrados['Nombre'] == nombre
-                ]
-                
-                # Obtener información del trabajador
-                trabajador_info = st.session_state.empleados[
-                    st.session_state.empleados['Nombre'] == nombre
-                ]
-                
-                if not trabajador_info.empty:
-                    sueldo_hora = trabajador_info['Sueldo_Hora'].values[0]
-                    
-                    # Calcular totales
-                    total_horas = registros_trabajador['Total_Horas_Decimal'].sum()
-                    total_pagar = total_horas * sueldo_hora
-                    
-                    resumen_nomina.append({
-                        'Trabajador': nombre,
-                        'Días Trabajados': len(registros_trabajador),
-                        'Horas Totales': round(total_horas, 2),
-                        'Sueldo por Hora': f"${sueldo_hora:.2f}",
-                        'Total a Pagar': f"${total_pagar:.2f}",
-                        'Período': f"{fecha_inicio} al {fecha_fin}"
-                    })
+            trabajo = administrador_trabajos().enviar(
+                "Reporte de nómina", f"{fecha_inicio} al {fecha_fin}",
+                ejecutar_reporte_nomina, almacen, fecha_inicio, fecha_fin
+            )
+            st.session_state.trabajo_reporte = trabajo.id
+        
+        # Resultado del último reporte solicitado en esta sesión
+        trabajo = administrador_trabajos().obtener(st.session_state.get('trabajo_reporte'))
+        if trabajo and mostrar_estado_trabajo(trabajo):
+            resultado = trabajo.resultado
+            df_resumen = resultado['resumen']
             
-            if resumen_nomina:
-                df_resumen = pd.DataFrame(resumen_nomina)
+            if not df_resumen.empty:
+                st.success(f"Reporte generado para {len(df_resumen)} trabajadores")
                 
-                st.success(f"Reporte generado para {len(resumen_nomina)} trabajadores")
-                
-                # Mostrar reporte
+                # Mostrar reporte (el formato de moneda solo se aplica al mostrar)
                 st.subheader("📋 Resumen de Nómina")
-                st.dataframe(df_resumen, use_container_width=True)
+                st.dataframe(
+                    df_resumen,
+                    use_container_width=True,
+                    column_config={
+                        col: st.column_config.NumberColumn(format="$%.2f")
+                        for col in COLUMNAS_MONEDA
+                    }
+                )
                 
                 # Estadísticas
                 col1, col2, col3 = st.columns(3)
                 
                 total_horas = df_resumen['Horas Totales'].sum()
-                total_pagar = sum([
-                    float(x.replace('$', '').replace(',', '')) 
-                    for x in df_resumen['Total a Pagar']
-                ])
+                total_pagar = df_resumen['Total a Pagar'].sum()
                 
                 with col1:
-                    st.metric("Total Trabajadores", len(resumen_nomina))
+                    st.metric("Total Trabajadores", len(df_resumen))
                 
                 with col2:
                     st.metric("Horas Totales", f"{total_horas:.1f}")
@@ -533,6 +1097,16 @@ elif opcion == "📊 Reporte de Nómina":
                 with col3:
                     st.metric("Total a Pagar", f"${total_pagar:.2f}")
                 
+                # Desglose de la nómina por concepto (LFT)
+                st.subheader("🧾 Desglose por Concepto")
+                desglose = df_resumen[CONCEPTOS_LFT + ['Total a Pagar']].sum().rename('Importe')
+                st.dataframe(
+                    desglose.rename_axis('Concepto').reset_index(),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={'Importe': st.column_config.NumberColumn(format="$%.2f")}
+                )
+                
                 # Gráfico de horas por trabajador
                 st.subheader("📊 Distribución de Horas")
                 chart_data = df_resumen[['Trabajador', 'Horas Totales']].copy()
@@ -541,17 +1115,33 @@ elif opcion == "📊 Reporte de Nómina":
                 
                 # Opción para descargar reporte
                 st.markdown("---")
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df_resumen.to_excel(writer, sheet_name='Resumen_Nomina', index=False)
-                    registros_filtrados.to_excel(writer, sheet_name='Detalle_Registros', index=False)
-                
                 st.download_button(
                     label="📥 Descargar Reporte Completo (Excel)",
-                    data=output.getvalue(),
-                    file_name=f"reporte_nomina_{fecha_inicio}_al_{fecha_fin}.xlsx",
+                    data=resultado['excel'],
+                    file_name=f"reporte_nomina_{resultado['fecha_inicio']}_al_{resultado['fecha_fin']}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
+                
+                # Recibos individuales (un .xlsx por trabajador dentro de un .zip)
+                if st.button("🧾 Generar Recibos por Trabajador"):
+                    trabajo_recibos = administrador_trabajos().enviar(
+                        "Recibos de nómina", f"{resultado['fecha_inicio']} al {resultado['fecha_fin']}",
+                        ejecutar_recibos, almacen, resultado
+                    )
+                    trabajo_recibos.total_filas = len(df_resumen)
+                    st.session_state.trabajo_recibos = trabajo_recibos.id
+                
+                trabajo_recibos = administrador_trabajos().obtener(
+                    st.session_state.get('trabajo_recibos')
+                )
+                if trabajo_recibos and mostrar_estado_trabajo(trabajo_recibos):
+                    with open(trabajo_recibos.resultado, 'rb') as archivo_recibos:
+                        st.download_button(
+                            label=f"📥 Descargar Recibos ({trabajo_recibos.descripcion})",
+                            data=archivo_recibos,
+                            file_name=f"recibos_nomina_{trabajo_recibos.descripcion.replace(' ', '_')}.zip",
+                            mime="application/zip"
+                        )
             else:
                 st.warning("No hay datos para el período seleccionado.")
 
@@ -563,52 +1153,41 @@ elif opcion == "💾 Exportar Datos":
     
     with col1:
         st.subheader("Exportar Trabajadores")
-        if not st.session_state.empleados.empty:
-            # Convertir a Excel
-            output_trabajadores = BytesIO()
-            with pd.ExcelWriter(output_trabajadores, engine='openpyxl') as writer:
-                st.session_state.empleados.to_excel(writer, sheet_name='Trabajadores', index=False)
-            
-            st.download_button(
-                label="📥 Descargar Lista de Trabajadores (Excel)",
-                data=output_trabajadores.getvalue(),
-                file_name=f"trabajadores_{datetime.date.today()}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        if not almacen.empleados.empty:
+            # Los archivos se generan solo al pedirlos y se reutilizan mientras no cambien los datos
+            boton_exportacion(
+                almacen, "trabajadores_xlsx", "Lista de Trabajadores (Excel)",
+                lambda: excel_streaming([('Trabajadores', almacen.empleados)]),
+                f"trabajadores_{datetime.date.today()}.xlsx",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
             
             # También ofrecer CSV
-            csv_trabajadores = st.session_state.empleados.to_csv(index=False)
-            st.download_button(
-                label="📥 Descargar Lista de Trabajadores (CSV)",
-                data=csv_trabajadores,
-                file_name=f"trabajadores_{datetime.date.today()}.csv",
-                mime="text/csv"
+            boton_exportacion(
+                almacen, "trabajadores_csv", "Lista de Trabajadores (CSV)",
+                lambda: almacen.empleados.to_csv(index=False),
+                f"trabajadores_{datetime.date.today()}.csv",
+                "text/csv"
             )
         else:
             st.info("No hay trabajadores para exportar.")
     
     with col2:
         st.subheader("Exportar Asistencia")
-        if not st.session_state.registros.empty:
-            # Convertir a Excel
-            output_asistencia = BytesIO()
-            with pd.ExcelWriter(output_asistencia, engine='openpyxl') as writer:
-                st.session_state.registros.to_excel(writer, sheet_name='Asistencia', index=False)
-            
-            st.download_button(
-                label="📥 Descargar Registros de Asistencia (Excel)",
-                data=output_asistencia.getvalue(),
-                file_name=f"asistencia_{datetime.date.today()}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        if hay_registros(almacen):
+            boton_exportacion(
+                almacen, "asistencia_xlsx", "Registros de Asistencia (Excel)",
+                lambda: excel_streaming([('Asistencia', registros_completos(almacen))]),
+                f"asistencia_{datetime.date.today()}.xlsx",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
             
             # También ofrecer CSV
-            csv_asistencia = st.session_state.registros.to_csv(index=False)
-            st.download_button(
-                label="📥 Descargar Registros de Asistencia (CSV)",
-                data=csv_asistencia,
-                file_name=f"asistencia_{datetime.date.today()}.csv",
-                mime="text/csv"
+            boton_exportacion(
+                almacen, "asistencia_csv", "Registros de Asistencia (CSV)",
+                lambda: registros_completos(almacen).to_csv(index=False),
+                f"asistencia_{datetime.date.today()}.csv",
+                "text/csv"
             )
         else:
             st.info("No hay registros de asistencia para exportar.")
@@ -622,24 +1201,73 @@ elif opcion == "💾 Exportar Datos":
         ["Resumen Semanal", "Resumen Mensual", "Detallado por Trabajador"]
     )
     
+    # Tamaño de intervalo de cada tipo de reporte
+    intervalos_reporte = {
+        "Resumen Semanal": "semana",
+        "Resumen Mensual": "mes",
+        "Detallado por Trabajador": "dia"
+    }
+    
     if st.button("Generar Reporte Personalizado"):
-        if not st.session_state.registros.empty:
+        if hay_registros(almacen):
             with st.spinner("Generando reporte..."):
-                # Aquí puedes personalizar el reporte según el tipo seleccionado
-                st.success("Reporte generado exitosamente!")
-                
-                # Ejemplo simple de reporte personalizado
-                if tipo_reporte == "Resumen Semanal":
-                    st.write("**Resumen Semanal**")
-                    # Agregar lógica específica
-                elif tipo_reporte == "Resumen Mensual":
-                    st.write("**Resumen Mensual**")
-                    # Agregar lógica específica
-                else:
-                    st.write("**Detallado por Trabajador**")
-                    # Agregar lógica específica
+                generar_reporte_personalizado(almacen, tipo_reporte, intervalos_reporte[tipo_reporte])
         else:
             st.warning("No hay datos para generar el reporte.")
+    
+    reporte_guardado = st.session_state.get('reporte_personalizado')
+    if reporte_guardado and reporte_guardado[0] == tipo_reporte:
+        _, version_reporte, df_reporte = reporte_guardado
+        if version_reporte != almacen.version_datos:
+            # Los datos cambiaron desde que se generó: se recalcula antes de mostrarlo o exportarlo
+            with st.spinner("Actualizando reporte..."):
+                df_reporte = generar_reporte_personalizado(
+                    almacen, tipo_reporte, intervalos_reporte[tipo_reporte]
+                )
+        st.success("Reporte generado exitosamente!")
+        st.write(f"**{tipo_reporte}**")
+        
+        if tipo_reporte == "Detallado por Trabajador":
+            # Detalle diario de los trabajadores seleccionados
+            seleccion = st.multiselect(
+                "Trabajadores:",
+                options=sorted(df_reporte['Trabajador'].unique())
+            )
+            if seleccion:
+                df_reporte = df_reporte[df_reporte['Trabajador'].isin(seleccion)]
+        else:
+            # Tabla cruzada de horas: trabajadores x intervalos
+            st.dataframe(
+                df_reporte.pivot_table(
+                    index='Trabajador', columns='Inicio',
+                    values='Horas Totales', aggfunc='sum', fill_value=0
+                ),
+                use_container_width=True
+            )
+        
+        st.dataframe(
+            df_reporte,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col: st.column_config.NumberColumn(format="$%.2f")
+                for col in COLUMNAS_MONEDA
+            }
+        )
+        
+        # El libro se genera solo al pedirlo; depende de la selección de esta sesión,
+        # así que no se comparte con las demás
+        nombre_reporte = tipo_reporte.lower().replace(' ', '_')
+        clave_reporte = f"reporte_{nombre_reporte}"
+        if tipo_reporte == "Detallado por Trabajador" and seleccion:
+            clave_reporte += "_" + hashlib.sha256("|".join(seleccion).encode()).hexdigest()[:12]
+        boton_exportacion(
+            almacen, clave_reporte, "Reporte (Excel)",
+            lambda: excel_streaming([('Reporte', df_reporte)], COLUMNAS_MONEDA),
+            f"{nombre_reporte}_{datetime.date.today()}.xlsx",
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            cache=st.session_state.setdefault('exportaciones_sesion', {})
+        )
 
 # --- CONFIGURACIÓN ---
 elif opcion == "⚙️ Configuración":
@@ -647,6 +1275,12 @@ elif opcion == "⚙️ Configuración":
     
     st.subheader("📁 Archivos de Datos")
     
+    if ALMACENAMIENTO == "sqlite":
+        st.write(f"**Base de datos SQLite:** {BASE_DATOS_SQLITE}")
+        if os.path.exists(BASE_DATOS_SQLITE):
+            db_size = os.path.getsize(BASE_DATOS_SQLITE) / 1024  # KB
+            st.write(f"Tamaño: {db_size:.2f} KB")
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -654,7 +1288,7 @@ elif opcion == "⚙️ Configuración":
         if os.path.exists(EMPLEADOS_CSV):
             file_size = os.path.getsize(EMPLEADOS_CSV) / 1024  # KB
             st.write(f"Tamaño: {file_size:.2f} KB")
-            st.write(f"Registros: {len(st.session_state.empleados)}")
+            st.write(f"Registros: {len(almacen.empleados)}")
             
             with open(EMPLEADOS_CSV, "rb") as file:
                 st.download_button(
@@ -671,7 +1305,7 @@ elif opcion == "⚙️ Configuración":
         if os.path.exists(REGISTROS_CSV):
             file_size = os.path.getsize(REGISTROS_CSV) / 1024  # KB
             st.write(f"Tamaño: {file_size:.2f} KB")
-            st.write(f"Registros: {len(st.session_state.registros)}")
+            st.write(f"Registros: {totales_registros(almacen)[0]}")
             
             with open(REGISTROS_CSV, "rb") as file:
                 st.download_button(
@@ -683,26 +1317,73 @@ elif opcion == "⚙️ Configuración":
         else:
             st.warning("Archivo no encontrado")
     
+    st.markdown("---")
+    st.subheader("⏱️ Trabajos en Segundo Plano")
+    
+    tabla_trabajos = administrador_trabajos().tabla()
+    if tabla_trabajos.empty:
+        st.info("No se han ejecutado trabajos en este proceso.")
+    else:
+        st.dataframe(tabla_trabajos, use_container_width=True, hide_index=True)
+        st.button("🔄 Actualizar tabla de trabajos")
+    
+    st.markdown("---")
+    st.subheader("⏲️ Tiempos por Etapa")
+    
+    if not mediciones:
+        st.info("Todavía no hay mediciones en este proceso.")
+    else:
+        st.write("**Resumen por etapa (segundos):**")
+        st.dataframe(resumen_mediciones(), use_container_width=True, hide_index=True)
+        with st.expander(f"Últimas mediciones ({len(mediciones)} de máximo {MAX_MEDICIONES})"):
+            st.dataframe(tabla_mediciones(), use_container_width=True, hide_index=True)
+        if st.button("Vaciar mediciones"):
+            mediciones.clear()
+            st.rerun()
+    
+    if BITACORA_TIEMPOS:
+        st.write(f"**Bitácora de tiempos:** {BITACORA_TIEMPOS}")
+    else:
+        st.caption("Para guardar las mediciones en un archivo, define la variable NOMINA_BITACORA_TIEMPOS.")
+    
     st.markdown("---")
     st.subheader("🔄 Mantenimiento")
     
     if st.button("Recargar Datos desde Archivos"):
-        st.session_state.empleados, st.session_state.registros = cargar_datos()
+        cargar_en_almacen(almacen)
         st.success("Datos recargados exitosamente!")
         st.rerun()
     
+    # Estado de la bitácora de cambios (SQLite aplica cada cambio directamente en la base)
+    if ALMACENAMIENTO != "sqlite":
+        if os.path.exists(BITACORA_CAMBIOS):
+            bitacora_kb = os.path.getsize(BITACORA_CAMBIOS) / 1024  # KB
+            st.write(f"**Bitácora de cambios:** {BITACORA_CAMBIOS} ({bitacora_kb:.2f} KB pendientes de compactar)")
+        else:
+            st.write("**Bitácora de cambios:** sin cambios pendientes")
+        
+        if st.button("Compactar Bitácora"):
+            with almacen.candado:
+                guardar_datos(almacen.empleados, almacen.registros)
+                marcar_guardado(almacen)
+            st.success("Bitácora compactada en los archivos base")
+            st.rerun()
+    
     st.warning("⚠️ **Zona de peligro**")
     
     col1, col2 = st.columns(2)
     
     with col1:
         if st.button("Limpiar Registros de Asistencia"):
-            st.session_state.registros = pd.DataFrame(columns=[
-                'ID_Trabajador', 'Nombre', 'Fecha', 'Hora_Entrada', 
-                'Hora_Salida', 'Horas_Trabajadas', 'Minutos_Trabajados', 
-                'Total_Horas_Decimal'
-            ])
-            guardar_datos(st.session_state.empleados, st.session_state.registros)
+            with almacen.candado:
+                vacios = aplicar_esquema_registros(pd.DataFrame(columns=COLUMNAS_REGISTROS))
+                # En SQLite los registros no se guardan en memoria
+                almacen.registros = None if ALMACENAMIENTO == "sqlite" else vacios
+                almacen.claves_registros = set()
+                almacen.agregados = construir_agregados(vacios)
+                limpiar_archivos_procesados(almacen.archivos_procesados)
+                guardar_datos(almacen.empleados, vacios)
+                marcar_guardado(almacen)
             st.success("Registros de asistencia limpiados")
             st.rerun()
     
@@ -730,8 +1411,11 @@ elif opcion == "⚙️ Configuración":
                 }
             ])
             
-            st.session_state.empleados = empleados_ejemplo
-            guardar_datos(st.session_state.empleados, st.session_state.registros)
+            with almacen.candado:
+                actualizar_empleados(almacen, aplicar_esquema_empleados(empleados_ejemplo))
+                almacen.sueldos = limpiar_historial_sueldos()
+                guardar_datos(almacen.empleados, almacen.registros)
+                marcar_guardado(almacen)
             st.success("Datos de ejemplo restaurados")
             st.rerun()
 
@@ -746,3 +1430,6 @@ st.sidebar.code("""
 pip install streamlit pandas openpyxl
 streamlit run app.py
 """)
+
+# Tiempo total de la ejecución (las que terminan en st.rerun() no llegan aquí)
+registrar_medicion('pagina', time.perf_counter() - inicio_pagina, detalle=opcion)
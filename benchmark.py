@@ -0,0 +1,320 @@
+# Benchmarks de carga, ingesta, reporte, exportación y guardado con datos sintéticos
+#
+# Ejemplo:
+#   python benchmark.py --trabajadores 10000 --registros 5000000 --repeticiones 3
+#
+# Cada corrida se agrega a benchmarks/resultados.csv junto con la versión (commit de git);
+# al terminar se compara contra la corrida anterior con los mismos parámetros y contra
+# los objetivos de arranque de la aplicación.
+import argparse
+import datetime
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import nomina
+import recibos
+import reglas_lft
+from datos_sinteticos import generar_empleados, generar_checadas
+
+DIRECTORIO_CODIGO = os.path.dirname(os.path.abspath(__file__))
+RESULTADOS_CSV = os.path.join(DIRECTORIO_CODIGO, 'benchmarks', 'resultados.csv')
+TOLERANCIA_REGRESION = 1.2  # 20% más lento que la corrida anterior
+
+# Tiempo máximo (s) de las pruebas de arranque: importar los módulos de la aplicación en
+# un proceso nuevo y volver a ejecutar la página con los datos ya cargados
+OBJETIVOS_S = {
+    'arranque_importaciones': 1.0,
+    'app_rerun': 0.25
+}
+
+# Se ejecuta en un proceso nuevo: tiempo de importación y si se cargó openpyxl
+CODIGO_ARRANQUE = (
+    "import sys, time; inicio = time.perf_counter(); "
+    "import nomina, ingesta, reglas_lft; "
+    "print(time.perf_counter() - inicio, 'openpyxl' in sys.modules)"
+)
+
+def version_codigo():
+    """Commit actual del repositorio (o 'desconocida' fuera de git)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=DIRECTORIO_CODIGO
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocida'
+
+def medir(funcion, repeticiones, preparar=None):
+    """Tiempos (s) de cada repetición; preparar() se ejecuta antes de cada una sin medirse"""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos, resultado
+
+def medir_importaciones(repeticiones):
+    """Tiempos de importación en frío de los módulos de la aplicación (un proceso por repetición)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', CODIGO_ARRANQUE], capture_output=True, text=True, check=True,
+            cwd=DIRECTORIO_CODIGO
+        ).stdout.split()
+        if salida[1] == 'True':
+            raise AssertionError("Importar la aplicación carga openpyxl (debe importarse al usarse)")
+        tiempos.append(float(salida[0]))
+    return tiempos
+
+def medir_app(repeticiones, n_registros):
+    """Primera ejecución de la aplicación (con la carga de datos) y reruns con los datos en memoria"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # El almacén compartido se descarta para que la primera ejecución cargue los datos
+    st.cache_resource.clear()
+    app = AppTest.from_file(os.path.join(DIRECTORIO_CODIGO, 'app.py'), default_timeout=600)
+    primera, _ = medir(app.run, 1)
+    if app.exception:
+        raise AssertionError(f"La aplicación falló al arrancar: {app.exception[0].message}")
+
+    tiempos, _ = medir(app.run, repeticiones)
+    return [
+        ('app_primera_ejecucion', primera, n_registros),
+        ('app_rerun', tiempos, n_registros)
+    ]
+
+def nomina_referencia(diario):
+    """Reglas LFT trabajador por trabajador y semana por semana (para validar la versión vectorizada)"""
+    datos = diario.reset_index()
+    anios = range(datos['Fecha'].min().year, datos['Fecha'].max().year + 1)
+    festivos = set(reglas_lft.dias_festivos(anios).date)
+    resultados = {}
+
+    for nombre, dias in datos.groupby('Nombre', sort=False, observed=True):
+        semanas = {}
+        for fila in dias.itertuples(index=False):
+            lunes = fila.Fecha - datetime.timedelta(days=fila.Fecha.dayofweek)
+            semanas.setdefault(lunes, []).append(fila)
+
+        totales = dict.fromkeys(reglas_lft.CONCEPTOS_LFT, 0.0)
+        for filas in semanas.values():
+            horas = sum(fila.Horas for fila in filas)
+            pago = sum(0.0 if pd.isna(fila.Pago) else fila.Pago for fila in filas)
+            tarifa = pago / horas if horas > 0 else 0.0
+            extra = max(horas - reglas_lft.JORNADA_SEMANAL, 0)
+            dobles = min(extra, reglas_lft.MAX_HORAS_DOBLES)
+            dias_trabajados = sum(1 for fila in filas if fila.Horas > 0)
+
+            totales['Sueldo Base'] += pago - extra * tarifa
+            totales['Horas Extra Dobles'] += dobles * tarifa * reglas_lft.FACTOR_HORAS_DOBLES
+            totales['Horas Extra Triples'] += (extra - dobles) * tarifa * reglas_lft.FACTOR_HORAS_TRIPLES
+            totales['Séptimo Día'] += (
+                tarifa * reglas_lft.HORAS_JORNADA
+                * min(dias_trabajados, reglas_lft.DIAS_LABORALES) / reglas_lft.DIAS_LABORALES
+            )
+            for fila in filas:
+                if fila.Horas <= 0 or pd.isna(fila.Pago):
+                    continue
+                salario_dia = fila.Pago / fila.Horas * reglas_lft.HORAS_JORNADA
+                if fila.Fecha.dayofweek == 6:
+                    totales['Prima Dominical'] += salario_dia * reglas_lft.PRIMA_DOMINICAL
+                if fila.Fecha.date() in festivos:
+                    totales['Día Festivo'] += salario_dia * reglas_lft.FACTOR_FESTIVO
+
+        totales['Total a Pagar'] = sum(totales.values())
+        resultados[nombre] = totales
+    return pd.DataFrame.from_dict(resultados, orient='index')
+
+def limpiar_directorio():
+    """Borra los archivos de datos del directorio de trabajo del benchmark"""
+    for ruta in [nomina.EMPLEADOS_CSV, nomina.REGISTROS_CSV, nomina.BITACORA_CAMBIOS,
+                 nomina.BITACORA_COMPACTANDO,
+                 nomina.ARCHIVOS_PROCESADOS_CSV, nomina.BASE_DATOS_SQLITE,
+                 f"{nomina.BASE_DATOS_SQLITE}-wal", f"{nomina.BASE_DATOS_SQLITE}-shm"]:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+def ejecutar_benchmarks(n_trabajadores, n_registros, repeticiones, semilla=0):
+    """Ejecuta cada prueba y devuelve una fila de resultados por prueba"""
+    empleados = generar_empleados(n_trabajadores, semilla)
+    checadas = generar_checadas(empleados, n_registros, semilla=semilla)
+    contenido = checadas.to_csv(index=False).encode('utf-8')
+    mapeos = {'checadas.csv': {campo: campo for campo in ['Nombre', 'Fecha', 'Entrada', 'Salida']}}
+    almacen = nomina.AlmacenDatos()
+
+    def preparar_ingesta():
+        limpiar_directorio()
+        nomina.guardar_datos(empleados, empleados.iloc[:0].reindex(columns=nomina.COLUMNAS_REGISTROS))
+        nomina.cargar_en_almacen(almacen)
+
+    pruebas = []
+
+    # Ingesta: lectura del archivo, cálculo de horas, deduplicación y confirmación en disco
+    tiempos, _ = medir(
+        lambda: nomina.ingestar_lote(almacen, uuid.uuid4().hex[:8], [('checadas.csv', contenido)], mapeos),
+        repeticiones, preparar_ingesta
+    )
+    pruebas.append(('ingesta', tiempos, n_registros))
+    empleados_df, registros_df = almacen.empleados, nomina.registros_completos(almacen)
+
+    # Guardar los datos completos y volver a cargarlos
+    tiempos, _ = medir(lambda: nomina.guardar_datos(empleados_df, registros_df), repeticiones)
+    pruebas.append(('guardar_datos', tiempos, len(registros_df)))
+
+    tiempos, _ = medir(nomina.cargar_datos, repeticiones)
+    pruebas.append(('cargar_datos', tiempos, len(registros_df)))
+
+    # Reporte de la última semana con datos y su libro de Excel
+    fecha_fin = registros_df['Fecha'].max().date()
+    fecha_inicio = fecha_fin - datetime.timedelta(days=6)
+    nomina.cargar_en_almacen(almacen)
+    tiempos, reporte = medir(
+        lambda: nomina.calcular_resumen_desde_agregados(
+            almacen.agregados['dia'], almacen.empleados, fecha_inicio, fecha_fin,
+            almacen.indice_empleados, almacen.sueldos
+        ),
+        repeticiones
+    )
+    pruebas.append(('reporte_nomina', tiempos, len(reporte)))
+
+    # Reglas LFT de todo el historial: vectorizadas contra la referencia por trabajador
+    diario = nomina.agregado_con_pago(
+        almacen.agregados['dia'], almacen.empleados, almacen.sueldos, almacen.indice_empleados
+    )
+    tiempos, vectorizado = medir(lambda: reglas_lft.nomina_por_trabajador(diario), repeticiones)
+    pruebas.append(('reglas_lft', tiempos, len(diario)))
+
+    tiempos, referencia = medir(lambda: nomina_referencia(diario), 1)
+    pruebas.append(('reglas_lft_referencia', tiempos, len(diario)))
+
+    columnas = reglas_lft.CONCEPTOS_LFT + ['Total a Pagar']
+    if not np.allclose(vectorizado[columnas], referencia.loc[vectorizado.index, columnas]):
+        raise AssertionError("Las reglas LFT vectorizadas no coinciden con la referencia")
+
+    tiempos, periodo = medir(
+        lambda: nomina.filtrar_registros_periodo(almacen.registros, fecha_inicio, fecha_fin),
+        repeticiones
+    )
+    pruebas.append(('filtrar_periodo', tiempos, len(periodo)))
+    
+    tiempos, _ = medir(lambda: nomina.excel_reporte_nomina(reporte, periodo), repeticiones)
+    pruebas.append(('excel_reporte', tiempos, len(periodo)))
+
+    # Recibos individuales de la semana (pool de procesos, escritos a un .zip en memoria)
+    tiempos, n_recibos = medir(
+        lambda: recibos.recibos_en_zip(reporte, periodo, BytesIO()), repeticiones
+    )
+    pruebas.append(('recibos', tiempos, n_recibos))
+
+    # Exportación de los registros del último mes (como en Exportar Datos)
+    mes = nomina.filtrar_registros_periodo(
+        almacen.registros, fecha_fin - datetime.timedelta(days=29), fecha_fin
+    )
+    tiempos, _ = medir(lambda: nomina.excel_streaming([('Registros', mes)]), repeticiones)
+    pruebas.append(('excel_exportacion', tiempos, len(mes)))
+
+    # Arranque: importaciones en un proceso nuevo y la aplicación completa (si hay Streamlit)
+    pruebas.append(('arranque_importaciones', medir_importaciones(repeticiones), 1))
+    if importlib.util.find_spec('streamlit') is not None:
+        pruebas.extend(medir_app(repeticiones, len(registros_df)))
+
+    return [
+        {
+            'Prueba': prueba,
+            'Mejor_s': round(min(tiempos), 4),
+            'Mediana_s': round(statistics.median(tiempos), 4),
+            'Filas': filas,
+            'Filas_por_s': round(filas / min(tiempos)) if min(tiempos) > 0 else None
+        }
+        for prueba, tiempos, filas in pruebas
+    ]
+
+def guardar_resultados(resultados, ruta=RESULTADOS_CSV):
+    """Agrega los resultados al historial y devuelve el historial anterior"""
+    try:
+        anteriores = pd.read_csv(ruta)
+    except FileNotFoundError:
+        anteriores = pd.DataFrame()
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    resultados.to_csv(ruta, mode='a', index=False, header=not os.path.exists(ruta))
+    return anteriores
+
+def comparar(resultados, anteriores, tolerancia=TOLERANCIA_REGRESION):
+    """Relación contra la corrida anterior con los mismos parámetros (> tolerancia = regresión)"""
+    claves = ['Prueba', 'Trabajadores', 'Registros', 'Almacenamiento']
+    if anteriores.empty:
+        return resultados.assign(Anterior_s=float('nan'), Relacion=float('nan'), Regresion=False)
+
+    ultima = anteriores.drop_duplicates(subset=claves, keep='last')[claves + ['Mejor_s']]
+    comparado = resultados.merge(
+        ultima.rename(columns={'Mejor_s': 'Anterior_s'}), on=claves, how='left'
+    )
+    comparado['Relacion'] = (comparado['Mejor_s'] / comparado['Anterior_s']).round(2)
+    comparado['Regresion'] = comparado['Relacion'] > tolerancia
+    return comparado
+
+def sobre_objetivo(resultados, objetivos=OBJETIVOS_S):
+    """Pruebas cuyo mejor tiempo supera su objetivo"""
+    objetivo = resultados['Prueba'].map(objetivos)
+    return resultados.loc[resultados['Mejor_s'] > objetivo, 'Prueba'].tolist()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks del motor de nómina")
+    parser.add_argument('--trabajadores', type=int, default=1000)
+    parser.add_argument('--registros', type=int, default=200000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--almacenamiento', choices=['csv', 'sqlite'], default='csv')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_REGRESION)
+    parser.add_argument('--resultados', default=RESULTADOS_CSV)
+    args = parser.parse_args()
+
+    nomina.ALMACENAMIENTO = args.almacenamiento
+    resultados_ruta = os.path.abspath(args.resultados)
+    directorio_original = os.getcwd()
+
+    # Los archivos de datos se escriben en un directorio temporal
+    with tempfile.TemporaryDirectory(prefix='benchmark_nomina_') as directorio:
+        os.chdir(directorio)
+        try:
+            filas = ejecutar_benchmarks(
+                args.trabajadores, args.registros, args.repeticiones, args.semilla
+            )
+        finally:
+            os.chdir(directorio_original)
+
+    resultados = pd.DataFrame(filas).assign(
+        Fecha=datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        Version=version_codigo(),
+        Trabajadores=args.trabajadores,
+        Registros=args.registros,
+        Almacenamiento=args.almacenamiento,
+        Repeticiones=args.repeticiones
+    )
+    anteriores = guardar_resultados(resultados, resultados_ruta)
+    comparado = comparar(resultados, anteriores, args.tolerancia)
+
+    print(comparado[['Prueba', 'Filas', 'Mejor_s', 'Mediana_s', 'Filas_por_s',
+                     'Anterior_s', 'Relacion']].to_string(index=False))
+    if comparado['Regresion'].any():
+        print("\n⚠️ Regresiones: " + ", ".join(comparado.loc[comparado['Regresion'], 'Prueba']))
+    lentas = sobre_objetivo(comparado)
+    if lentas:
+        print("\n⚠️ Sobre el objetivo de arranque: " + ", ".join(
+            f"{prueba} (> {OBJETIVOS_S[prueba]} s)" for prueba in lentas
+        ))
@@ -0,0 +1,120 @@
+# Generador reproducible de datos de prueba (empleados y checadas del mostrador)
+#
+# Ejemplo (10 mil trabajadores, 5 millones de checadas):
+#   python datos_sinteticos.py --trabajadores 10000 --registros 5000000 --carpeta datos_prueba
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingesta import procesar_asistencia
+from nomina import COLUMNAS_EMPLEADOS, EMPLEADOS_CSV, REGISTROS_CSV
+
+NOMBRES = [
+    'Juan', 'María', 'José', 'Guadalupe', 'Francisco', 'Juana', 'Antonio', 'Rosa',
+    'Jesús', 'Margarita', 'Miguel', 'Verónica', 'Pedro', 'Leticia', 'Alejandro', 'Patricia',
+    'Manuel', 'Gabriela', 'Ricardo', 'Elizabeth', 'Fernando', 'Alejandra', 'Roberto', 'Adriana',
+    'Luis', 'Silvia', 'Carlos', 'Teresa', 'Javier', 'Claudia'
+]
+APELLIDOS = [
+    'Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez',
+    'Torres', 'Díaz', 'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Moreno',
+    'Castillo', 'Romero', 'Álvarez', 'Méndez', 'Chávez', 'Rivera'
+]
+
+# Horas de entrada de cada turno (en minutos desde medianoche)
+ENTRADA_DIURNA = 7 * 60
+ENTRADA_NOCTURNA = 22 * 60
+
+def generar_nombres(n_trabajadores, rng):
+    """Nombres completos únicos (nombre y dos apellidos; con número si no alcanzan)"""
+    combinaciones = len(NOMBRES) * len(APELLIDOS) ** 2
+    elegidos = rng.permutation(max(n_trabajadores, combinaciones))[:n_trabajadores]
+    i_nombre, resto = np.divmod(elegidos % combinaciones, len(APELLIDOS) ** 2)
+    i_paterno, i_materno = np.divmod(resto, len(APELLIDOS))
+
+    nombres = [
+        f"{NOMBRES[n]} {APELLIDOS[p]} {APELLIDOS[m]}"
+        for n, p, m in zip(i_nombre, i_paterno, i_materno)
+    ]
+    # Más trabajadores que combinaciones: se distinguen con un número
+    return [
+        nombre if elegido < combinaciones else f"{nombre} {elegido // combinaciones + 1}"
+        for nombre, elegido in zip(nombres, elegidos)
+    ]
+
+def generar_empleados(n_trabajadores, semilla=0):
+    """Catálogo de empleados con sueldos calculados igual que en el alta"""
+    rng = np.random.default_rng(semilla)
+    sueldo_semanal = rng.integers(2000, 5001, n_trabajadores).astype(float)
+
+    return pd.DataFrame({
+        'ID': np.arange(1, n_trabajadores + 1),
+        'Nombre': generar_nombres(n_trabajadores, rng),
+        'Sueldo_Semanal': sueldo_semanal,
+        'Sueldo_Diario': (sueldo_semanal / 7).round(2),
+        'Sueldo_Hora': (sueldo_semanal / 7 / 8).round(2),
+        'Fecha_Alta': '2024-01-01',
+        'Activo': True
+    }, columns=COLUMNAS_EMPLEADOS)
+
+def generar_checadas(empleados, n_registros, fecha_inicio='2024-01-01', semilla=0,
+                     prob_nocturno=0.1, prob_faltante=0.02):
+    """Archivo del mostrador: una checada por trabajador y día, con turnos nocturnos y faltantes"""
+    rng = np.random.default_rng(semilla)
+    n_trabajadores = len(empleados)
+
+    # Los trabajadores checan en orden cada día hasta completar los registros
+    posicion = np.arange(n_registros)
+    trabajador = posicion % n_trabajadores
+    dia = posicion // n_trabajadores
+
+    # Entrada con variación de ±30 min; el turno nocturno cruza la medianoche
+    nocturno = rng.random(n_registros) < prob_nocturno
+    entrada = np.where(nocturno, ENTRADA_NOCTURNA, ENTRADA_DIURNA) + rng.integers(-30, 31, n_registros)
+    salida = (entrada + rng.integers(7 * 60, 10 * 60 + 1, n_registros)) % (24 * 60)
+
+    # Tablas de texto: se indexan en lugar de formatear millones de valores
+    horas_texto = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
+    fechas_texto = pd.date_range(fecha_inicio, periods=dia.max() + 1 if n_registros else 0)
+    fechas_texto = fechas_texto.strftime('%Y-%m-%d').to_numpy(dtype=object)
+
+    checadas = pd.DataFrame({
+        'Nombre': empleados['Nombre'].to_numpy(dtype=object)[trabajador],
+        'Fecha': fechas_texto[dia],
+        'Entrada': horas_texto[entrada],
+        'Salida': horas_texto[salida]
+    })
+
+    # Checadas faltantes (olvidó checar la entrada o la salida)
+    for col in ['Entrada', 'Salida']:
+        checadas.loc[rng.random(n_registros) < prob_faltante / 2, col] = np.nan
+    return checadas
+
+def generar_registros(empleados, checadas):
+    """Registros de horas ya procesados a partir de las checadas"""
+    return procesar_asistencia(checadas, 'Nombre', 'Fecha', 'Entrada', 'Salida', empleados)
+
+def guardar_conjunto(carpeta, n_trabajadores, n_registros, semilla=0):
+    """Escribe empleados, registros procesados y el archivo de checadas en una carpeta"""
+    os.makedirs(carpeta, exist_ok=True)
+    empleados = generar_empleados(n_trabajadores, semilla)
+    checadas = generar_checadas(empleados, n_registros, semilla=semilla)
+
+    empleados.to_csv(os.path.join(carpeta, EMPLEADOS_CSV), index=False)
+    generar_registros(empleados, checadas).to_csv(os.path.join(carpeta, REGISTROS_CSV), index=False)
+    checadas.to_csv(os.path.join(carpeta, 'checadas.csv'), index=False)
+    return empleados, checadas
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera datos de prueba reproducibles")
+    parser.add_argument('--trabajadores', type=int, default=1000)
+    parser.add_argument('--registros', type=int, default=100000)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--carpeta', default='datos_prueba')
+    args = parser.parse_args()
+
+    guardar_conjunto(args.carpeta, args.trabajadores, args.registros, args.semilla)
+    print(f"{args.trabajadores} trabajadores y {args.registros} checadas en {args.carpeta}/")
@@ -0,0 +1,598 @@
+# Lectura y cálculo de asistencia sin dependencias de Streamlit
+# (se importa desde los procesos del pool de carga por lotes; openpyxl solo se
+# importa dentro de las funciones que leen archivos .xlsx)
+import os
+import warnings
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+# Índice nombre -> fila de empleados para búsquedas O(1)
+def construir_indice_empleados(empleados_df):
+    """Construye un diccionario nombre -> etiqueta de fila (primera coincidencia)"""
+    nombres = empleados_df['Nombre']
+    primeros = ~nombres.duplicated()
+    return dict(zip(nombres[primeros], empleados_df.index[primeros]))
+
+# Índice de nombres para el mostrador: claves sin acentos, mayúsculas ni espacios extra,
+# palabras en cualquier orden y trigramas para nombres mal escritos (los parecidos por
+# trigramas solo se proponen: el trabajador se asigna hasta que alguien lo confirma)
+SIMILITUD_MINIMA = 0.75    # coeficiente de Dice entre trigramas para proponer un parecido
+MARGEN_AMBIGUEDAD = 0.05   # otro empleado casi igual de parecido vuelve ambiguo el nombre
+
+def normalizar_nombres(nombres):
+    """Clave de comparación: sin acentos ni signos, en minúsculas y con espacios simples"""
+    return (
+        pd.Series(np.asarray(nombres, dtype=object)).fillna('').astype(str)
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+    )
+
+def clave_palabras(clave):
+    """Clave normalizada con las palabras ordenadas ("perez juan" = "juan perez")"""
+    return ' '.join(sorted(clave.split()))
+
+def trigramas(clave):
+    """Trigramas de la clave con espacios al inicio y al final"""
+    relleno = f"  {clave} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+def registrar_nombre(indice, nombre, etiqueta, clave):
+    """Agrega un nombre a los diccionarios del índice; devuelve su posición y trigramas"""
+    posicion = len(indice['etiquetas'])
+    indice['etiquetas'].append(etiqueta)
+    indice['nombres'].append(nombre)
+    indice['exactos'].setdefault(nombre, posicion)
+    indice['claves'].setdefault(clave, []).append(posicion)
+    indice['palabras'].setdefault(clave_palabras(clave), []).append(posicion)
+    return posicion, trigramas(clave)
+
+def construir_indice_nombres(empleados_df):
+    """Índice de búsqueda de empleados por nombre exacto, normalizado y por trigramas"""
+    indice = {'etiquetas': [], 'nombres': [], 'exactos': {}, 'claves': {}, 'palabras': {}}
+    nombres = empleados_df['Nombre'].astype(str).tolist()
+    claves = normalizar_nombres(nombres).tolist()
+    
+    # Listas de posiciones por trigrama; se guardan como arreglos para sumarlas rápido
+    listas = {}
+    n_trigramas = []
+    for nombre, etiqueta, clave in zip(nombres, empleados_df.index, claves):
+        posicion, tris = registrar_nombre(indice, nombre, etiqueta, clave)
+        n_trigramas.append(len(tris))
+        for tri in tris:
+            listas.setdefault(tri, []).append(posicion)
+    
+    indice['trigramas'] = {tri: np.array(lista, dtype=np.int32) for tri, lista in listas.items()}
+    indice['n_trigramas'] = np.array(n_trigramas, dtype=np.int32)
+    return indice
+
+def agregar_a_indice_nombres(indice, nombre, etiqueta):
+    """Agrega un empleado al índice de nombres sin reconstruirlo"""
+    posicion, tris = registrar_nombre(indice, nombre, etiqueta, normalizar_nombres([nombre])[0])
+    indice['n_trigramas'] = np.append(indice['n_trigramas'], np.int32(len(tris)))
+    for tri in tris:
+        indice['trigramas'][tri] = np.append(
+            indice['trigramas'].get(tri, np.empty(0, dtype=np.int32)), np.int32(posicion)
+        )
+
+def candidatos_por_trigramas(clave, indice):
+    """Posiciones de los empleados más parecidos según el coeficiente de Dice"""
+    tris = trigramas(clave)
+    listas = [indice['trigramas'][t] for t in tris if t in indice['trigramas']]
+    if not listas:
+        return []
+    
+    # Trigramas compartidos con cada empleado que aparece en alguna lista
+    compartidos = np.bincount(np.concatenate(listas), minlength=len(indice['etiquetas']))
+    similitud = 2 * compartidos / (len(tris) + indice['n_trigramas'])
+    mejor = similitud.max()
+    if mejor < SIMILITUD_MINIMA:
+        return []
+    return np.flatnonzero(similitud >= mejor - MARGEN_AMBIGUEDAD).tolist()
+
+def resolver_nombres(nombres, indice):
+    """Resuelve nombres únicos contra el índice; devuelve Fila, Estado y Candidatos por nombre"""
+    nombres = pd.unique(pd.Series(np.asarray(nombres, dtype=object)).dropna())
+    claves = normalizar_nombres(nombres).tolist()
+    
+    posiciones, estados = [], []
+    for nombre, clave in zip(nombres, claves):
+        # De la coincidencia más estricta a la más flexible
+        if nombre in indice['exactos']:
+            encontrados, estado = [indice['exactos'][nombre]], 'exacto'
+        elif clave in indice['claves']:
+            encontrados, estado = indice['claves'][clave], 'normalizado'
+        elif clave_palabras(clave) in indice['palabras']:
+            encontrados, estado = indice['palabras'][clave_palabras(clave)], 'normalizado'
+        else:
+            encontrados, estado = candidatos_por_trigramas(clave, indice), 'aproximado'
+        
+        if not encontrados:
+            estado = 'sin coincidencia'
+        elif len(encontrados) > 1:
+            estado = 'ambiguo'
+        posiciones.append(encontrados)
+        estados.append(estado)
+    
+    # Solo las coincidencias exactas o normalizadas se asignan sin revisión
+    return pd.DataFrame({
+        'Fila': [
+            indice['etiquetas'][encontrados[0]] if estado in ('exacto', 'normalizado') else None
+            for encontrados, estado in zip(posiciones, estados)
+        ],
+        'Estado': estados,
+        'Candidatos': [[indice['nombres'][p] for p in encontrados] for encontrados in posiciones]
+    }, index=pd.Index(nombres, name='Nombre'))
+
+def resolver_trabajadores(nombres, empleados_df, indice):
+    """IDs de trabajador y nombre registrado de cada fila (el del archivo si no se asignó)"""
+    codigos, unicos = pd.factorize(pd.Series(np.asarray(nombres, dtype=object)))
+    filas = resolver_nombres(unicos, indice)['Fila'].reindex(unicos)
+    
+    # Una búsqueda por nombre distinto; -1 (nombre vacío) toma el último valor (nulo)
+    ids = np.append(empleados_df['ID'].reindex(filas).to_numpy(dtype=float, na_value=np.nan), np.nan)
+    registrados = empleados_df['Nombre'].reindex(filas).to_numpy(dtype=object)
+    registrados = np.append(np.where(pd.notna(filas), registrados, unicos), None)
+    return ids[codigos], registrados[codigos]
+
+def nombres_de_archivo(originales, registrados):
+    """Nombre tal como venía en el archivo cuando se asignó otro (vacío si es el mismo)"""
+    originales = pd.Series(np.asarray(originales, dtype=object))
+    return originales.where(originales != pd.Series(registrados, dtype=object)).to_numpy(dtype=object)
+
+def nombres_por_revisar(registros_df, indice):
+    """Nombres del archivo sin trabajador asignado (sin coincidencia, ambiguos o aproximados)"""
+    pendientes = registros_df.loc[registros_df['ID_Trabajador'].isna(), 'Nombre']
+    conteo = pendientes.astype(object).value_counts()
+    resolucion = resolver_nombres(conteo.index, indice)
+    return pd.DataFrame({
+        'Nombre': conteo.index,
+        'Registros': conteo.to_numpy(),
+        'Estado': resolucion['Estado'].reindex(conteo.index).to_numpy(),
+        'Candidatos': resolucion['Candidatos'].reindex(conteo.index).map(', '.join).to_numpy()
+    })
+
+# Lectura por bloques para archivos muy grandes
+TAMANO_BLOQUE = 5000
+
+def es_xlsx(nombre_archivo):
+    """Indica si el archivo puede leerse en modo solo lectura con openpyxl"""
+    return nombre_archivo.lower().endswith(('.xlsx', '.xlsm'))
+
+def hojas_excel(archivo):
+    """Devuelve los nombres de las hojas de un libro .xlsx sin cargar su contenido"""
+    from openpyxl import load_workbook
+    archivo.seek(0)
+    libro = load_workbook(archivo, read_only=True)
+    try:
+        return libro.sheetnames
+    finally:
+        libro.close()
+
+def estimar_filas(archivo, hoja=None):
+    """Número aproximado de filas de datos de una hoja .xlsx (None si no se conoce)"""
+    from openpyxl import load_workbook
+    archivo.seek(0)
+    libro = load_workbook(archivo, read_only=True)
+    try:
+        hoja_excel = libro[hoja] if hoja else libro.active
+        return hoja_excel.max_row - 1 if hoja_excel.max_row else None
+    finally:
+        libro.close()
+
+def leer_archivo_por_bloques(archivo, hoja=None, tamano_bloque=TAMANO_BLOQUE):
+    """Genera DataFrames de tamaño acotado sin cargar el archivo completo en memoria"""
+    archivo.seek(0)
+    nombre = getattr(archivo, 'name', '')
+    
+    if nombre.lower().endswith('.csv'):
+        yield from pd.read_csv(archivo, chunksize=tamano_bloque)
+        return
+    
+    if not es_xlsx(nombre):
+        # Formato .xls: openpyxl no lo soporta, se lee completo y se divide
+        df = pd.read_excel(archivo, sheet_name=hoja or 0)
+        for inicio in range(0, len(df), tamano_bloque):
+            yield df.iloc[inicio:inicio + tamano_bloque]
+        return
+    
+    from openpyxl import load_workbook
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja_excel = libro[hoja] if hoja else libro.active
+        filas = hoja_excel.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        
+        columnas = [
+            str(c) if c is not None else f"Unnamed: {i}"
+            for i, c in enumerate(encabezado)
+        ]
+        ancho = len(columnas)
+        
+        bloque = []
+        for fila in filas:
+            if all(valor is None for valor in fila):
+                continue
+            bloque.append(tuple(fila[:ancho]) + (None,) * (ancho - len(fila)))
+            if len(bloque) >= tamano_bloque:
+                yield pd.DataFrame(bloque, columns=columnas)
+                bloque = []
+        
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas)
+    finally:
+        libro.close()
+
+# Convertir una columna de horas a datetime en una sola pasada
+def convertir_a_datetime(serie):
+    """Convierte una columna completa de fechas/horas a datetime64"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    
+    # Las celdas de hora de Excel llegan como datetime.time; se pasan a texto
+    texto = serie[serie.notna()].astype(str)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        convertidas = pd.to_datetime(texto, errors='coerce')
+    
+    # Formatos mezclados en el mismo archivo: reintentar solo las filas fallidas
+    fallidas = convertidas.isna()
+    if fallidas.any():
+        convertidas[fallidas] = pd.to_datetime(
+            texto[fallidas], errors='coerce', format='mixed'
+        )
+    
+    return convertidas.reindex(serie.index)
+
+# Función vectorizada para calcular horas trabajadas
+def calcular_horas_vectorizado(entradas, salidas):
+    """Calcula horas, minutos y horas decimales para columnas completas"""
+    entradas = convertir_a_datetime(pd.Series(entradas))
+    salidas = convertir_a_datetime(pd.Series(salidas)).set_axis(entradas.index)
+    
+    # Igual que timedelta.seconds: segundos dentro del día (0 a 86399)
+    segundos = (salidas - entradas).dt.total_seconds() % 86400
+    segundos = segundos.fillna(0).astype('int64')
+    
+    horas = segundos // 3600
+    minutos = (segundos % 3600) // 60
+    
+    # Convertir a horas decimales (ej: 8:30 = 8.5)
+    total_decimal = (horas + minutos / 60).round(2)
+    
+    return horas, minutos, total_decimal
+
+# Función para calcular horas trabajadas
+def calcular_horas_trabajadas(entrada, salida):
+    """Calcula horas y minutos trabajados"""
+    if pd.isna(entrada) or pd.isna(salida):
+        return 0, 0, 0
+    
+    horas, minutos, total_decimal = calcular_horas_vectorizado(
+        pd.Series([entrada], dtype=object), pd.Series([salida], dtype=object)
+    )
+    
+    return int(horas.iloc[0]), int(minutos.iloc[0]), float(total_decimal.iloc[0])
+
+# --- Esquema compacto de tipos para empleados y registros ---
+COLUMNAS_CATEGORICAS = ['Nombre', 'Lote', 'Nombre_Archivo']
+
+def aplicar_esquema_empleados(empleados_df):
+    """IDs enteros, fechas datetime64, sueldos float y Activo booleano (vacío = activo)"""
+    empleados_df = empleados_df.copy()
+    empleados_df['ID'] = pd.to_numeric(empleados_df['ID'], errors='coerce').astype('Int32')
+    empleados_df['Nombre'] = empleados_df['Nombre'].astype(object)
+    for col in ['Sueldo_Semanal', 'Sueldo_Diario', 'Sueldo_Hora']:
+        empleados_df[col] = pd.to_numeric(empleados_df[col], errors='coerce').astype('float64')
+    empleados_df['Fecha_Alta'] = convertir_a_datetime(empleados_df['Fecha_Alta']).astype('datetime64[ns]')
+    
+    texto = empleados_df['Activo'].astype(str).str.lower()
+    empleados_df['Activo'] = ~texto.isin(['false', '0', '0.0'])
+    return empleados_df
+
+def aplicar_esquema_sueldos(sueldos_df):
+    """IDs enteros, sueldos float y fecha de vigencia datetime64"""
+    sueldos_df = sueldos_df.copy()
+    sueldos_df['ID'] = pd.to_numeric(sueldos_df['ID'], errors='coerce').astype('Int32')
+    for col in ['Sueldo_Semanal', 'Sueldo_Diario', 'Sueldo_Hora']:
+        sueldos_df[col] = pd.to_numeric(sueldos_df[col], errors='coerce').astype('float64')
+    sueldos_df['Vigente_Desde'] = (
+        convertir_a_datetime(sueldos_df['Vigente_Desde']).dt.normalize().astype('datetime64[ns]')
+    )
+    return sueldos_df
+
+def horas_en_fecha(fechas, horas):
+    """Fecha del registro + hora del día (las horas llegan como texto, time o datetime)"""
+    horas = convertir_a_datetime(horas)
+    return fechas + (horas - horas.dt.normalize())
+
+def aplicar_esquema_registros(registros_df):
+    """Nombres categóricos, fecha y horas datetime64, horas/minutos enteros pequeños"""
+    registros_df = registros_df.copy()
+    registros_df['ID_Trabajador'] = pd.to_numeric(
+        registros_df['ID_Trabajador'], errors='coerce'
+    ).astype('Int32')
+    fechas = convertir_a_datetime(registros_df['Fecha']).dt.normalize().astype('datetime64[ns]')
+    registros_df['Fecha'] = fechas
+    for col in ['Hora_Entrada', 'Hora_Salida']:
+        registros_df[col] = horas_en_fecha(fechas, registros_df[col])
+    # Turno nocturno: la salida antes de la entrada es del día siguiente
+    nocturno = registros_df['Hora_Salida'] < registros_df['Hora_Entrada']
+    registros_df.loc[nocturno, 'Hora_Salida'] += pd.Timedelta(days=1)
+    for col in ['Horas_Trabajadas', 'Minutos_Trabajados']:
+        registros_df[col] = pd.to_numeric(registros_df[col], errors='coerce').astype('Int8')
+    registros_df['Total_Horas_Decimal'] = pd.to_numeric(
+        registros_df['Total_Horas_Decimal'], errors='coerce'
+    ).astype('float64')
+    for col in COLUMNAS_CATEGORICAS:
+        if col in registros_df.columns:
+            valores = registros_df[col]
+            registros_df[col] = valores.where(valores.isna(), valores.astype(str)).astype('category')
+    return registros_df
+
+def concatenar_registros(partes):
+    """Une bloques ya tipados conservando las columnas categóricas"""
+    registros_df = pd.concat(partes, ignore_index=True)
+    for col in COLUMNAS_CATEGORICAS:
+        if col not in registros_df.columns:
+            continue
+        # Se recodifican los códigos de cada bloque; no se vuelven a comparar los textos
+        # (un bloque sin la columna la aporta vacía)
+        columnas = [
+            (parte[col] if col in parte.columns else pd.Series(index=parte.index, dtype=object))
+            .astype('category').cat
+            for parte in partes
+        ]
+        categorias = columnas[0].categories.append([c.categories for c in columnas[1:]]).unique()
+        codigos = [
+            np.append(categorias.get_indexer(c.categories), -1)[c.codes]
+            for c in columnas
+        ]
+        registros_df[col] = pd.Categorical.from_codes(np.concatenate(codigos), categorias)
+    return registros_df
+
+# Función para procesar asistencia de forma columnar
+def procesar_asistencia(df, col_nombre, col_fecha, col_entrada, col_salida,
+                        empleados, indice=None):
+    """Convierte el archivo del mostrador en nuevos registros de horas"""
+    horas, minutos, total_decimal = calcular_horas_vectorizado(
+        df[col_entrada], df[col_salida]
+    )
+    
+    # Buscar ID del trabajador en lote usando el índice de nombres
+    if indice is None:
+        indice = construir_indice_nombres(empleados)
+    ids, nombres = resolver_trabajadores(df[col_nombre], empleados, indice)
+    
+    nuevos_df = pd.DataFrame({
+        'ID_Trabajador': ids,
+        'Nombre': nombres,
+        'Fecha': df[col_fecha],
+        'Hora_Entrada': df[col_entrada],
+        'Hora_Salida': df[col_salida],
+        'Horas_Trabajadas': horas,
+        'Minutos_Trabajados': minutos,
+        'Total_Horas_Decimal': total_decimal,
+        'Nombre_Archivo': nombres_de_archivo(df[col_nombre], nombres)
+    })
+    
+    return aplicar_esquema_registros(nuevos_df.reset_index(drop=True))
+
+# --- Checadas crudas: (trabajador, fecha y hora) con 2 a 6 eventos por día ---
+REBOTE_SEGUNDOS = 120              # checadas repetidas del mismo trabajador se ignoran
+MAX_TRAMO_SEGUNDOS = 12 * 3600     # un hueco mayor siempre reinicia en "entrada"
+MAX_DESCANSO_SEGUNDOS = 4 * 3600   # descansos más cortos son parte del mismo turno
+
+def emparejar_checadas(nombres, momentos):
+    """Empareja entrada/salida por trabajador y agrupa los pares en turnos; devuelve (turnos, sueltas)"""
+    eventos = pd.DataFrame({
+        'Nombre': pd.Series(nombres).to_numpy(),
+        'Momento': convertir_a_datetime(pd.Series(momentos)).to_numpy()
+    }).dropna()
+    
+    # Un solo ordenamiento por (trabajador, momento) usando los códigos de categoría
+    codigos = pd.Categorical(eventos['Nombre']).codes
+    momento = eventos['Momento'].to_numpy(dtype='datetime64[ns]')
+    orden = np.lexsort((momento, codigos))
+    codigos, momento = codigos[orden], momento[orden]
+    nombre = eventos['Nombre'].to_numpy()[orden]
+    
+    def huecos(codigos, momento):
+        mismo = np.zeros(len(codigos), dtype=bool)
+        mismo[1:] = codigos[1:] == codigos[:-1]
+        hueco = np.full(len(codigos), np.inf)
+        hueco[1:] = (momento[1:] - momento[:-1]) / np.timedelta64(1, 's')
+        return mismo, hueco
+    
+    # Descartar rebotes (el trabajador checó dos veces seguidas)
+    mismo, hueco = huecos(codigos, momento)
+    conservar = ~(mismo & (hueco < REBOTE_SEGUNDOS))
+    codigos, momento, nombre = codigos[conservar], momento[conservar], nombre[conservar]
+    mismo, hueco = huecos(codigos, momento)
+    
+    # Tramos: las checadas alternan entrada/salida; un hueco largo o una checada
+    # faltante se corrige reiniciando en "entrada" al empezar el siguiente tramo
+    nuevo_tramo = ~mismo | (hueco > MAX_TRAMO_SEGUNDOS)
+    tramo = np.cumsum(nuevo_tramo) - 1
+    posicion = np.arange(len(tramo)) - np.flatnonzero(nuevo_tramo)[tramo]
+    siguiente_mismo_tramo = np.append(tramo[1:], -1) == tramo
+    entradas = np.flatnonzero((posicion % 2 == 0) & siguiente_mismo_tramo)
+    salidas = entradas + 1
+    
+    # Entradas sin salida (checada faltante): se devuelven aparte para revisarlas
+    emparejada = np.zeros(len(tramo), dtype=bool)
+    emparejada[entradas] = emparejada[salidas] = True
+    sueltas = pd.DataFrame({'Nombre': nombre[~emparejada], 'Momento': momento[~emparejada]})
+    
+    # Sin ningún par (bloque vacío o una sola checada por trabajador): todo queda suelto
+    if len(entradas) == 0:
+        turnos = pd.DataFrame({
+            'Nombre': pd.Series(dtype=object),
+            'Fecha': pd.Series(dtype='datetime64[ns]'),
+            'Entrada': pd.Series(dtype='datetime64[ns]'),
+            'Salida': pd.Series(dtype='datetime64[ns]'),
+            'Segundos': pd.Series(dtype='int64'),
+            'Checadas': pd.Series(dtype='int64')
+        })
+        return turnos, sueltas
+    
+    # Turnos: pares del mismo tramo separados por descansos cortos (comida)
+    descanso = np.full(len(entradas), np.inf)
+    descanso[1:] = (momento[entradas[1:]] - momento[salidas[:-1]]) / np.timedelta64(1, 's')
+    nuevo_turno = np.ones(len(entradas), dtype=bool)
+    nuevo_turno[1:] = (tramo[entradas[1:]] != tramo[entradas[:-1]]) | (descanso[1:] > MAX_DESCANSO_SEGUNDOS)
+    turno = np.cumsum(nuevo_turno) - 1
+    primero = np.flatnonzero(nuevo_turno)
+    ultimo = np.append(primero[1:], len(turno)) - 1
+    
+    segundos = (momento[salidas] - momento[entradas]) / np.timedelta64(1, 's')
+    turnos = pd.DataFrame({
+        'Nombre': nombre[entradas[primero]],
+        'Fecha': pd.to_datetime(momento[entradas[primero]]).normalize(),
+        'Entrada': momento[entradas[primero]],
+        'Salida': momento[salidas[ultimo]],
+        'Segundos': np.bincount(turno, weights=segundos, minlength=len(primero)).astype('int64'),
+        'Checadas': 2 * np.bincount(turno, minlength=len(primero))
+    })
+    return turnos, sueltas
+
+def procesar_checadas(df, col_nombre, col_fecha, col_hora, empleados, indice=None):
+    """Convierte checadas crudas en registros de horas (uno por turno); devuelve también las sueltas"""
+    if col_hora:
+        fechas = convertir_a_datetime(df[col_fecha]).dt.normalize()
+        momentos = horas_en_fecha(fechas, df[col_hora])
+    else:
+        momentos = df[col_fecha]
+    turnos, sueltas = emparejar_checadas(df[col_nombre], momentos)
+    
+    if indice is None:
+        indice = construir_indice_nombres(empleados)
+    ids, nombres = resolver_trabajadores(turnos['Nombre'], empleados, indice)
+    
+    horas = turnos['Segundos'] // 3600
+    minutos = (turnos['Segundos'] % 3600) // 60
+    nuevos_df = pd.DataFrame({
+        'ID_Trabajador': ids,
+        'Nombre': nombres,
+        'Fecha': turnos['Fecha'],
+        'Hora_Entrada': turnos['Entrada'],
+        'Hora_Salida': turnos['Salida'],
+        'Horas_Trabajadas': horas,
+        'Minutos_Trabajados': minutos,
+        'Total_Horas_Decimal': (horas + minutos / 60).round(2),
+        'Nombre_Archivo': nombres_de_archivo(turnos['Nombre'], nombres)
+    })
+    
+    return aplicar_esquema_registros(nuevos_df), sueltas
+
+# --- Carga por lotes: varios archivos procesados en paralelo ---
+EXTENSIONES_ASISTENCIA = ('.xlsx', '.xlsm', '.xls', '.csv')
+CAMPOS_MAPEO = ['Nombre', 'Fecha', 'Entrada', 'Salida']
+
+def abrir_en_memoria(nombre_archivo, contenido):
+    """Envuelve el contenido de un archivo en un objeto tipo archivo con nombre"""
+    archivo = BytesIO(contenido)
+    archivo.name = nombre_archivo
+    return archivo
+
+def expandir_archivos(archivos):
+    """Convierte archivos subidos (incluidos .zip) en una lista de (nombre, contenido)"""
+    expandidos = []
+    for archivo in archivos:
+        contenido = archivo.getvalue()
+        if not archivo.name.lower().endswith('.zip'):
+            expandidos.append((archivo.name, contenido))
+            continue
+        
+        with zipfile.ZipFile(BytesIO(contenido)) as comprimido:
+            for info in comprimido.infolist():
+                if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                    continue
+                if info.filename.lower().endswith(EXTENSIONES_ASISTENCIA):
+                    expandidos.append((info.filename, comprimido.read(info)))
+    return expandidos
+
+def archivos_de_carpeta(carpeta):
+    """Lee los archivos de asistencia de una carpeta como lista de (nombre, contenido)"""
+    archivos = []
+    for nombre_archivo in sorted(os.listdir(carpeta)):
+        ruta = os.path.join(carpeta, nombre_archivo)
+        if os.path.isfile(ruta) and nombre_archivo.lower().endswith(EXTENSIONES_ASISTENCIA):
+            with open(ruta, 'rb') as f:
+                archivos.append((nombre_archivo, f.read()))
+    return archivos
+
+def nombres_unicos(archivos):
+    """Renombra los archivos repetidos ("asistencia (2).csv") para que cada nombre sea un solo archivo"""
+    # Los checadores suelen exportar siempre con el mismo nombre de archivo
+    vistos = set()
+    unicos = []
+    for nombre_archivo, contenido in archivos:
+        base, extension = os.path.splitext(nombre_archivo)
+        nombre, copia = nombre_archivo, 2
+        while nombre in vistos:
+            nombre, copia = f"{base} ({copia}){extension}", copia + 1
+        vistos.add(nombre)
+        unicos.append((nombre, contenido))
+    return unicos
+
+def columnas_archivo(nombre_archivo, contenido):
+    """Lee solo el encabezado de un archivo para identificar su formato"""
+    primer_bloque = next(
+        leer_archivo_por_bloques(abrir_en_memoria(nombre_archivo, contenido), tamano_bloque=1),
+        None
+    )
+    return [] if primer_bloque is None else [str(c) for c in primer_bloque.columns]
+
+def clave_formato(columnas):
+    """Identificador del formato de un archivo a partir de sus columnas"""
+    return "|".join(columnas)
+
+def procesar_archivo_lote(nombre_archivo, contenido, mapeo, empleados_ids, indice=None):
+    """Lee un archivo completo y calcula sus registros (se ejecuta en un proceso del pool)"""
+    bloques = list(leer_archivo_por_bloques(abrir_en_memoria(nombre_archivo, contenido)))
+    if not bloques:
+        return pd.DataFrame()
+    
+    df = pd.concat(bloques, ignore_index=True)
+    df.columns = [str(c) for c in df.columns]
+    return procesar_asistencia(
+        df, mapeo['Nombre'], mapeo['Fecha'], mapeo['Entrada'], mapeo['Salida'],
+        empleados_ids, indice
+    )
+
+def pool_procesos(max_procesos=None):
+    """Pool de procesos para trabajo pesado (lectura de archivos, recibos)"""
+    # "spawn" evita heredar hilos y candados del servidor de Streamlit
+    return ProcessPoolExecutor(max_workers=max_procesos, mp_context=get_context("spawn"))
+
+def procesar_lote_paralelo(archivos, mapeos, empleados_ids, max_procesos=None, al_terminar=None,
+                           indice=None):
+    """Procesa varios archivos en un pool de procesos; devuelve [(nombre, registros)] en orden"""
+    if not archivos:
+        return []
+    
+    max_procesos = max_procesos or min(len(archivos), os.cpu_count() or 1)
+    # Resultados por posición: dos archivos pueden llamarse igual
+    resultados = [None] * len(archivos)
+    
+    with pool_procesos(max_procesos) as pool:
+        futuros = {
+            pool.submit(
+                procesar_archivo_lote, nombre, contenido, mapeos[nombre], empleados_ids, indice
+            ): posicion
+            for posicion, (nombre, contenido) in enumerate(archivos)
+        }
+        for futuro in as_completed(futuros):
+            posicion = futuros[futuro]
+            resultados[posicion] = futuro.result()
+            if al_terminar:
+                al_terminar(archivos[posicion][0], resultados[posicion])
+    
+    return [(nombre, registros_df) for (nombre, _), registros_df in zip(archivos, resultados)]
@@ -0,0 +1,1436 @@
+# Motor de nómina sin dependencias de Streamlit
+# (lo usan la aplicación web y el cierre por línea de comandos, nomina_cli.py)
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from ingesta import (
+    TAMANO_BLOQUE, convertir_a_datetime, construir_indice_empleados, construir_indice_nombres,
+    nombres_por_revisar,
+    aplicar_esquema_empleados, aplicar_esquema_registros, aplicar_esquema_sueldos,
+    concatenar_registros,
+    procesar_lote_paralelo
+)
+from reglas_lft import CONCEPTOS_LFT, agregar_festivos, nomina_por_trabajador, semanas_completas
+
+# Rutas de archivos (usando los archivos de tu repositorio)
+EMPLEADOS_CSV = "empleados.csv"
+REGISTROS_CSV = "registros_horas.csv"
+
+# Almacenamiento: "csv" (por defecto) o "sqlite" (base de datos embebida)
+ALMACENAMIENTO = os.environ.get("NOMINA_ALMACENAMIENTO", "csv")
+BASE_DATOS_SQLITE = os.environ.get("NOMINA_BASE_DATOS", "nomina.db")
+
+# Bitácora de cambios (solo se agregan líneas; se compacta en los CSV base)
+BITACORA_CAMBIOS = "cambios_nomina.jsonl"
+BITACORA_COMPACTANDO = f"{BITACORA_CAMBIOS}.compactando"  # apartada mientras se compacta
+COMPACTAR_BITACORA_BYTES = 20 * 1024 * 1024  # 20 MB
+LOTES_ABIERTOS = set()  # ingestas con bloques en la bitácora que aún no se confirman
+
+# Registro de archivos de asistencia ya procesados (huella SHA-256)
+ARCHIVOS_PROCESADOS_CSV = "archivos_procesados.csv"
+COLUMNAS_ARCHIVOS = ['Huella', 'Archivo', 'Fecha_Proceso', 'Registros', 'Lote']
+
+# Historial de sueldos: cada tarifa con la fecha desde la que aplica
+HISTORIAL_SUELDOS_CSV = "historial_sueldos.csv"
+COLUMNAS_SUELDOS = ['ID', 'Sueldo_Semanal', 'Sueldo_Diario', 'Sueldo_Hora', 'Vigente_Desde']
+FECHA_BASE_SUELDOS = pd.Timestamp('1900-01-01')
+
+# Mapeo de columnas guardado por formato de archivo (carga por lotes)
+MAPEOS_COLUMNAS_JSON = "mapeos_columnas.json"
+
+COLUMNAS_EMPLEADOS = ['ID', 'Nombre', 'Sueldo_Semanal', 'Sueldo_Diario', 
+                      'Sueldo_Hora', 'Fecha_Alta', 'Activo']
+COLUMNAS_REGISTROS = ['ID_Trabajador', 'Nombre', 'Fecha', 'Hora_Entrada', 
+                      'Hora_Salida', 'Horas_Trabajadas', 'Minutos_Trabajados', 
+                      'Total_Horas_Decimal', 'Lote', 'Nombre_Archivo']
+
+# --- Tiempos por etapa: buffer circular en memoria y bitácora opcional ---
+MAX_MEDICIONES = 1000
+BITACORA_TIEMPOS = os.environ.get("NOMINA_BITACORA_TIEMPOS", "")  # vacío = sin archivo
+COLUMNAS_MEDICIONES = ['Fecha', 'Etapa', 'Detalle', 'Segundos', 'Filas']
+
+mediciones = deque(maxlen=MAX_MEDICIONES)
+
+def registrar_medicion(etapa, segundos, filas=None, detalle=''):
+    """Guarda una medición en el buffer (y en la bitácora de tiempos si está configurada)"""
+    medicion = {
+        'Fecha': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'Etapa': etapa,
+        'Detalle': detalle,
+        'Segundos': round(segundos, 4),
+        'Filas': filas
+    }
+    mediciones.append(medicion)
+    
+    if BITACORA_TIEMPOS:
+        try:
+            with open(BITACORA_TIEMPOS, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(medicion, default=valor_json, ensure_ascii=False) + "\n")
+        except OSError:
+            # La instrumentación nunca debe interrumpir la operación medida
+            pass
+
+@contextmanager
+def medir_etapa(etapa, detalle=''):
+    """Mide el bloque with; el bloque puede indicar las filas en medicion['filas']"""
+    medicion = {'filas': None}
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        registrar_medicion(etapa, time.perf_counter() - inicio, medicion['filas'], detalle)
+
+def tabla_mediciones():
+    """Mediciones del buffer, más recientes primero"""
+    return pd.DataFrame(list(reversed(mediciones)), columns=COLUMNAS_MEDICIONES)
+
+def resumen_mediciones():
+    """Veces, promedio, máximo y última duración de cada etapa"""
+    tabla = pd.DataFrame(list(mediciones), columns=COLUMNAS_MEDICIONES)
+    return tabla.groupby('Etapa').agg(
+        Veces=('Segundos', 'size'),
+        Promedio_s=('Segundos', 'mean'),
+        Maximo_s=('Segundos', 'max'),
+        Ultimo_s=('Segundos', 'last'),
+        Filas=('Filas', 'sum')
+    ).round(4).sort_values('Promedio_s', ascending=False).reset_index()
+
+# Cargar datos existentes o inicializar DataFrames vacíos
+def cargar_datos():
+    """Carga empleados y registros desde el almacenamiento configurado (ya tipados)"""
+    with medir_etapa('cargar_datos', ALMACENAMIENTO) as medicion:
+        if ALMACENAMIENTO == "sqlite":
+            empleados_df, registros_df = cargar_datos_sqlite()
+        else:
+            empleados_df, registros_df = cargar_datos_csv()
+        
+        # Esquema compacto: enteros, categorías y datetime64 en lugar de texto
+        empleados_df = aplicar_esquema_empleados(empleados_df.reindex(columns=COLUMNAS_EMPLEADOS))
+        registros_df = aplicar_esquema_registros(registros_df.reindex(columns=COLUMNAS_REGISTROS))
+        medicion['filas'] = len(registros_df)
+    return empleados_df, registros_df
+
+def cargar_datos_csv():
+    """Carga los CSV base y aplica encima los cambios pendientes de la bitácora"""
+    try:
+        empleados_df = pd.read_csv(EMPLEADOS_CSV)
+        # Asegurar que las columnas necesarias existan
+        for col in COLUMNAS_EMPLEADOS:
+            if col not in empleados_df.columns:
+                empleados_df[col] = np.nan
+    except FileNotFoundError:
+        # Crear DataFrame vacío con las columnas necesarias
+        empleados_df = pd.DataFrame(columns=COLUMNAS_EMPLEADOS)
+    
+    try:
+        registros_df = pd.read_csv(REGISTROS_CSV, dtype={'Lote': str})
+        # Asegurar que las columnas necesarias existan
+        for col in COLUMNAS_REGISTROS:
+            if col not in registros_df.columns:
+                registros_df[col] = np.nan
+    except FileNotFoundError:
+        registros_df = pd.DataFrame(columns=COLUMNAS_REGISTROS)
+    
+    # Compactación interrumpida: sus cambios pueden estar ya en alguno de los archivos base,
+    # así que se aplican junto con la bitácora actual y se quitan las repeticiones
+    if os.path.exists(BITACORA_COMPACTANDO):
+        empleados_df, registros_df = aplicar_bitacora(
+            empleados_df, registros_df, leer_bitacora(BITACORA_COMPACTANDO) + leer_bitacora()
+        )
+        return quitar_repetidos(empleados_df, registros_df)
+    
+    return aplicar_bitacora(empleados_df, registros_df, leer_bitacora())
+
+def quitar_repetidos(empleados_df, registros_df):
+    """Quita altas (mismo ID) y registros (misma clave) que se aplicaron dos veces"""
+    empleados_df = empleados_df.drop_duplicates(subset='ID', keep='first', ignore_index=True)
+    repetidos = pd.Series(claves_registros(registros_df)).duplicated().to_numpy()
+    return empleados_df, registros_df[~repetidos].reset_index(drop=True)
+
+# Escribir un CSV de forma atómica (archivo temporal + reemplazo)
+def escribir_csv_atomico(df, ruta):
+    """Escribe el CSV completo sin dejar archivos a medio escribir"""
+    temporal = f"{ruta}.tmp"
+    df.to_csv(temporal, index=False)
+    os.replace(temporal, ruta)
+
+# Guardar datos
+def guardar_datos(empleados_df, registros_df):
+    """Guarda los DataFrames completos en el almacenamiento configurado (SQLite: registros None los conserva)"""
+    with medir_etapa('guardar_datos', ALMACENAMIENTO) as medicion:
+        medicion['filas'] = 0 if registros_df is None else len(registros_df)
+        if ALMACENAMIENTO == "sqlite":
+            guardar_datos_sqlite(empleados_df, registros_df)
+        else:
+            guardar_datos_csv(empleados_df, registros_df)
+
+def guardar_datos_csv(empleados_df, registros_df):
+    """Guarda los DataFrames completos a CSV y vacía la bitácora (compactación)"""
+    # La bitácora se aparta antes de reescribir los archivos base y se borra solo cuando
+    # ambos quedaron escritos; si el proceso muere antes, cargar_datos_csv la recupera
+    apartar_bitacora()
+    escribir_csv_atomico(empleados_df, EMPLEADOS_CSV)
+    escribir_csv_atomico(registros_df, REGISTROS_CSV)
+    conservar_lotes_abiertos()
+    if os.path.exists(BITACORA_COMPACTANDO):
+        os.remove(BITACORA_COMPACTANDO)
+
+def apartar_bitacora():
+    """Mueve la bitácora a la apartada (se agrega al final si quedó una de antes)"""
+    if not os.path.exists(BITACORA_CAMBIOS):
+        return
+    if not os.path.exists(BITACORA_COMPACTANDO):
+        os.replace(BITACORA_CAMBIOS, BITACORA_COMPACTANDO)
+        return
+    
+    with open(BITACORA_CAMBIOS, 'rb') as origen, open(BITACORA_COMPACTANDO, 'ab') as destino:
+        # Salto de línea por si la apartada terminó con una línea incompleta
+        destino.write(b"\n")
+        shutil.copyfileobj(origen, destino)
+        destino.flush()
+        os.fsync(destino.fileno())
+    os.remove(BITACORA_CAMBIOS)
+
+def conservar_lotes_abiertos():
+    """Copia a la bitácora nueva los bloques de las ingestas en curso (aún no están en los CSV base)"""
+    if not LOTES_ABIERTOS or not os.path.exists(BITACORA_COMPACTANDO):
+        return
+    
+    with open(BITACORA_CAMBIOS, 'a', encoding='utf-8') as f:
+        for cambio in leer_bitacora(BITACORA_COMPACTANDO):
+            if cambio['op'] == 'agregar_registros' and cambio.get('lote') in LOTES_ABIERTOS:
+                f.write(json.dumps(cambio, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+# Convertir valores de pandas/numpy a tipos que acepta JSON
+def valor_json(valor):
+    """Serializa valores no nativos (numpy, Timestamp, fechas) para la bitácora"""
+    if pd.isna(valor):
+        return None
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return str(valor)
+
+# Registrar un cambio en la bitácora
+def registrar_cambio(operacion, empleados_df, registros_df, **datos):
+    """Agrega un cambio a la bitácora y compacta si ya creció demasiado"""
+    if ALMACENAMIENTO == "sqlite":
+        aplicar_cambio_sqlite(operacion, datos)
+        return
+    
+    linea = json.dumps({'op': operacion, **datos}, default=valor_json, ensure_ascii=False)
+    with open(BITACORA_CAMBIOS, 'a', encoding='utf-8') as f:
+        f.write(linea + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    
+    compactar_si_es_necesario(empleados_df, registros_df)
+
+# Registrar un lote de registros de forma atómica
+def registrar_lote_registros(bloques, lote):
+    """Guarda varios bloques de registros nuevos; el lote solo cuenta si se confirma completo"""
+    if ALMACENAMIENTO == "sqlite":
+        agregar_lote_sqlite(bloques)
+        return
+    
+    for bloque in bloques:
+        registrar_bloque_lote(bloque, lote)
+    confirmar_lote_bitacora(lote)
+
+def registrar_bloque_lote(bloque, lote):
+    """Agrega a la bitácora un bloque de un lote (se ignora al cargar si el lote no se confirma)"""
+    linea = json.dumps(
+        {'op': 'agregar_registros', 'lote': lote, 'filas': bloque.to_dict('records')},
+        default=valor_json, ensure_ascii=False
+    )
+    with open(BITACORA_CAMBIOS, 'a', encoding='utf-8') as f:
+        f.write(linea + "\n")
+
+def confirmar_lote_bitacora(lote):
+    """Escribe la línea de confirmación del lote después de todos sus bloques"""
+    with open(BITACORA_CAMBIOS, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'confirmar_lote', 'lote': lote}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def compactar_si_es_necesario(empleados_df, registros_df):
+    """Compacta la bitácora en los archivos base si superó el tamaño límite"""
+    if ALMACENAMIENTO == "sqlite" or not os.path.exists(BITACORA_CAMBIOS):
+        return
+    if os.path.getsize(BITACORA_CAMBIOS) > COMPACTAR_BITACORA_BYTES:
+        guardar_datos(empleados_df, registros_df)
+
+# Leer los cambios pendientes de la bitácora
+def leer_bitacora(ruta=None):
+    """Devuelve la lista de cambios registrados desde la última compactación"""
+    ruta = ruta or BITACORA_CAMBIOS
+    cambios = []
+    if not os.path.exists(ruta):
+        return cambios
+    
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                cambios.append(json.loads(linea))
+            except json.JSONDecodeError:
+                # Línea incompleta por un cierre inesperado: se ignora
+                continue
+    return cambios
+
+# Reproducir la bitácora sobre los datos base
+def aplicar_bitacora(empleados_df, registros_df, cambios):
+    """Aplica en orden los cambios de la bitácora a empleados y registros"""
+    nuevos_registros = []
+    lotes_pendientes = {}
+    
+    for cambio in cambios:
+        operacion = cambio['op']
+        if operacion == 'agregar_registros':
+            bloque = pd.DataFrame(cambio['filas'], columns=COLUMNAS_REGISTROS)
+            if 'lote' in cambio:
+                # Los bloques de un lote se aplican solo al encontrar su confirmación
+                lotes_pendientes.setdefault(cambio['lote'], []).append(bloque)
+            else:
+                nuevos_registros.append(bloque)
+        elif operacion == 'confirmar_lote':
+            nuevos_registros.extend(lotes_pendientes.pop(cambio['lote'], []))
+        elif operacion == 'alta_empleado':
+            empleados_df = pd.concat(
+                [empleados_df, pd.DataFrame([cambio['fila']])],
+                ignore_index=True
+            )
+        elif operacion == 'actualizar_empleado':
+            filas = empleados_df['ID'] == cambio['id']
+            for col, valor in cambio['campos'].items():
+                empleados_df.loc[filas, col] = valor
+        elif operacion == 'asignar_trabajador':
+            # Aplica a todos los registros anteriores a la confirmación
+            registros_df = pd.concat([registros_df] + nuevos_registros, ignore_index=True)
+            nuevos_registros = []
+            registros_df, _ = aplicar_asignacion(
+                registros_df, cambio['nombre'], cambio['id'], cambio['nombre_registrado']
+            )
+    
+    if nuevos_registros:
+        registros_df = pd.concat([registros_df] + nuevos_registros, ignore_index=True)
+    
+    return empleados_df, registros_df
+
+# --- Almacenamiento SQLite ---
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS empleados (
+    ID INTEGER, Nombre TEXT, Sueldo_Semanal REAL, Sueldo_Diario REAL,
+    Sueldo_Hora REAL, Fecha_Alta TEXT, Activo INTEGER
+);
+CREATE TABLE IF NOT EXISTS registros (
+    ID_Trabajador INTEGER, Nombre TEXT, Fecha TEXT, Hora_Entrada TEXT,
+    Hora_Salida TEXT, Horas_Trabajadas INTEGER, Minutos_Trabajados INTEGER,
+    Total_Horas_Decimal REAL, Lote TEXT, Nombre_Archivo TEXT
+);
+CREATE TABLE IF NOT EXISTS sueldos (
+    ID INTEGER, Sueldo_Semanal REAL, Sueldo_Diario REAL, Sueldo_Hora REAL, Vigente_Desde TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_empleados_id ON empleados (ID);
+CREATE INDEX IF NOT EXISTS idx_empleados_nombre ON empleados (Nombre);
+CREATE INDEX IF NOT EXISTS idx_registros_trabajador_fecha ON registros (ID_Trabajador, Fecha);
+CREATE INDEX IF NOT EXISTS idx_registros_fecha ON registros (Fecha);
+CREATE INDEX IF NOT EXISTS idx_registros_lote ON registros (Lote);
+CREATE INDEX IF NOT EXISTS idx_sueldos_id_vigencia ON sueldos (ID, Vigente_Desde);
+"""
+
+def conectar_sqlite(ruta=None):
+    """Abre la base de datos SQLite en modo WAL y crea tablas e índices"""
+    conexion = sqlite3.connect(ruta or BASE_DATOS_SQLITE)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.executescript(ESQUEMA_SQLITE)
+    
+    # Bases creadas antes de las columnas Lote y Nombre_Archivo
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(registros)")}
+    for columna in ['Lote', 'Nombre_Archivo']:
+        if columna not in columnas:
+            conexion.execute(f"ALTER TABLE registros ADD COLUMN {columna} TEXT")
+    return conexion
+
+def preparar_registros_sqlite(registros_df):
+    """Normaliza Fecha a AAAA-MM-DD y las horas a HH:MM:SS para guardarlos en SQLite"""
+    registros_df = registros_df.reindex(columns=COLUMNAS_REGISTROS).copy()
+    
+    # Fecha ISO para que el índice permita consultas por rango
+    fechas = convertir_a_datetime(registros_df['Fecha']).dt.strftime('%Y-%m-%d')
+    registros_df['Fecha'] = fechas.where(fechas.notna(), registros_df['Fecha'].astype(str))
+    
+    for col in ['Hora_Entrada', 'Hora_Salida']:
+        horas = convertir_a_datetime(registros_df[col]).dt.strftime('%H:%M:%S')
+        valores = registros_df[col]
+        registros_df[col] = horas.where(horas.notna() | valores.isna(), valores.astype(str))
+    
+    return registros_df
+
+# PRAGMA user_version de la base: 1 = los CSV ya se importaron (no se vuelven a importar
+# aunque después se vacíen las tablas, por ejemplo al limpiar los registros)
+VERSION_MIGRACION_SQLITE = 1
+
+def migrar_csv_a_sqlite(conexion, ruta=None):
+    """Importa empleados, registros e historial de sueldos de los CSV una sola vez por base"""
+    if conexion.execute("PRAGMA user_version").fetchone()[0] >= VERSION_MIGRACION_SQLITE:
+        return
+    
+    # Una base con datos de antes de la marca ya se migró: solo se marca
+    vacia = conexion.execute(
+        "SELECT NOT EXISTS (SELECT 1 FROM empleados) AND NOT EXISTS (SELECT 1 FROM registros)"
+    ).fetchone()[0]
+    if vacia and (os.path.exists(EMPLEADOS_CSV) or os.path.exists(REGISTROS_CSV)):
+        guardar_datos_sqlite(*cargar_datos_csv(), ruta=ruta)
+    
+    sin_sueldos = not conexion.execute("SELECT EXISTS (SELECT 1 FROM sueldos)").fetchone()[0]
+    if sin_sueldos and os.path.exists(HISTORIAL_SUELDOS_CSV):
+        with conexion:
+            pd.read_csv(HISTORIAL_SUELDOS_CSV).reindex(columns=COLUMNAS_SUELDOS).to_sql(
+                'sueldos', conexion, if_exists='append', index=False
+            )
+    conexion.execute(f"PRAGMA user_version = {VERSION_MIGRACION_SQLITE}")
+
+def cargar_datos_sqlite(ruta=None, registros=True):
+    """Carga empleados y registros desde SQLite (importa los CSV la primera vez; registros=False: solo empleados)"""
+    with closing(conectar_sqlite(ruta)) as conexion:
+        migrar_csv_a_sqlite(conexion, ruta)
+        
+        empleados_df = pd.read_sql_query("SELECT * FROM empleados", conexion)
+        registros_df = pd.read_sql_query("SELECT * FROM registros", conexion) if registros else None
+    
+    return empleados_df, registros_df
+
+def guardar_datos_sqlite(empleados_df, registros_df, ruta=None):
+    """Reemplaza el contenido de ambas tablas en una sola transacción (registros None: no se tocan)"""
+    with closing(conectar_sqlite(ruta)) as conexion, conexion:
+        conexion.execute("DELETE FROM empleados")
+        empleados_df.reindex(columns=COLUMNAS_EMPLEADOS).to_sql(
+            'empleados', conexion, if_exists='append', index=False
+        )
+        if registros_df is not None:
+            conexion.execute("DELETE FROM registros")
+            preparar_registros_sqlite(registros_df).to_sql(
+                'registros', conexion, if_exists='append', index=False
+            )
+
+def aplicar_cambio_sqlite(operacion, datos, ruta=None):
+    """Aplica un cambio puntual (alta, actualización, asignación o registros nuevos) en SQLite"""
+    with closing(conectar_sqlite(ruta)) as conexion, conexion:
+        if operacion == 'agregar_registros':
+            insertar_registros_sqlite(
+                conexion, pd.DataFrame(datos['filas'], columns=COLUMNAS_REGISTROS)
+            )
+        elif operacion == 'alta_empleado':
+            pd.DataFrame([datos['fila']]).reindex(columns=COLUMNAS_EMPLEADOS).to_sql(
+                'empleados', conexion, if_exists='append', index=False
+            )
+        elif operacion == 'actualizar_empleado':
+            id_empleado = int(datos['id'])
+            for col, valor in datos['campos'].items():
+                if col not in COLUMNAS_EMPLEADOS:
+                    continue
+                if hasattr(valor, 'item'):
+                    valor = valor.item()
+                conexion.execute(
+                    f"UPDATE empleados SET {col} = ? WHERE ID = ?",
+                    (valor, id_empleado)
+                )
+        elif operacion == 'asignar_trabajador':
+            # El nombre del archivo se conserva para reconocer el registro si se vuelve a cargar
+            conexion.execute(
+                "UPDATE registros SET ID_Trabajador = ?, Nombre = ?, "
+                "Nombre_Archivo = COALESCE(Nombre_Archivo, Nombre) "
+                "WHERE Nombre = ? AND ID_Trabajador IS NULL",
+                (int(datos['id']), datos['nombre_registrado'], datos['nombre'])
+            )
+
+def agregar_lote_sqlite(bloques, ruta=None):
+    """Inserta varios bloques de registros en una sola transacción"""
+    with closing(conectar_sqlite(ruta)) as conexion, conexion:
+        for bloque in bloques:
+            insertar_registros_sqlite(conexion, bloque)
+
+def insertar_registros_sqlite(conexion, registros_df):
+    """Inserta registros sin confirmar la transacción (to_sql confirma en cada llamada)"""
+    filas = preparar_registros_sqlite(registros_df).astype(object)
+    filas = filas.where(filas.notna(), None)
+    conexion.executemany(
+        f"INSERT INTO registros ({', '.join(COLUMNAS_REGISTROS)}) "
+        f"VALUES ({', '.join('?' * len(COLUMNAS_REGISTROS))})",
+        filas.itertuples(index=False, name=None)
+    )
+
+def filtro_registros_sqlite(fecha_inicio=None, fecha_fin=None, id_trabajador=None,
+                            nombres=None, lote=None):
+    """Condición WHERE y parámetros de una consulta de registros"""
+    condiciones = []
+    parametros = []
+    if fecha_inicio is not None:
+        condiciones.append("Fecha >= ?")
+        parametros.append(pd.Timestamp(fecha_inicio).strftime('%Y-%m-%d'))
+    if fecha_fin is not None:
+        condiciones.append("Fecha <= ?")
+        parametros.append(pd.Timestamp(fecha_fin).strftime('%Y-%m-%d'))
+    
+    # Trabajadores por su ID; los registros sin trabajador asignado, por el nombre del archivo.
+    # Ambas condiciones usan el índice (ID_Trabajador, Fecha)
+    trabajadores = []
+    if id_trabajador is not None:
+        ids = [int(i) for i in np.atleast_1d(id_trabajador)]
+        trabajadores.append(f"ID_Trabajador IN ({', '.join('?' * len(ids))})")
+        parametros.extend(ids)
+    if nombres is not None:
+        nombres = [str(nombre) for nombre in nombres]
+        trabajadores.append(f"(ID_Trabajador IS NULL AND Nombre IN ({', '.join('?' * len(nombres))}))")
+        parametros.extend(nombres)
+    if trabajadores:
+        condiciones.append(f"({' OR '.join(trabajadores)})")
+    
+    if lote is not None:
+        condiciones.append("Lote = ?")
+        parametros.append(str(lote))
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+def consultar_registros_sqlite(fecha_inicio=None, fecha_fin=None, id_trabajador=None, ruta=None,
+                               nombres=None, lote=None, columnas=None, limite=None, desplazamiento=0):
+    """Registros ordenados por fecha de un período, trabajadores (uno o varios IDs) o lote, usando los índices"""
+    condicion, parametros = filtro_registros_sqlite(fecha_inicio, fecha_fin, id_trabajador, nombres, lote)
+    consulta = f"SELECT {', '.join(columnas) if columnas else '*'} FROM registros{condicion} ORDER BY Fecha"
+    if limite is not None:
+        consulta += " LIMIT ? OFFSET ?"
+        parametros += [int(limite), int(desplazamiento)]
+    
+    with closing(conectar_sqlite(ruta)) as conexion:
+        return pd.read_sql_query(consulta, conexion, params=parametros)
+
+def contar_registros_sqlite(fecha_inicio=None, fecha_fin=None, id_trabajador=None, ruta=None,
+                            nombres=None, lote=None):
+    """Cantidad de registros y suma de horas con los mismos filtros que consultar_registros_sqlite"""
+    condicion, parametros = filtro_registros_sqlite(fecha_inicio, fecha_fin, id_trabajador, nombres, lote)
+    with closing(conectar_sqlite(ruta)) as conexion:
+        return conexion.execute(
+            f"SELECT COUNT(*), TOTAL(Total_Horas_Decimal) FROM registros{condicion}", parametros
+        ).fetchone()
+
+def agregado_diario_sqlite(ruta=None):
+    """Agregado diario (como agregar_por_dia) calculado en la base, sin leer los registros"""
+    with closing(conectar_sqlite(ruta)) as conexion:
+        datos = pd.read_sql_query(
+            "SELECT Nombre, Fecha, TOTAL(Total_Horas_Decimal) AS Horas, COUNT(*) AS Registros "
+            "FROM registros WHERE Nombre IS NOT NULL AND Fecha IS NOT NULL GROUP BY Nombre, Fecha",
+            conexion
+        )
+    datos['Fecha'] = pd.to_datetime(datos['Fecha'], format='%Y-%m-%d', errors='coerce').astype('datetime64[ns]')
+    datos = datos.dropna(subset=['Fecha']).astype({'Horas': 'float64', 'Registros': 'int64'})
+    return ordenar_agregado(datos.set_index(['Nombre', 'Fecha']))
+
+def lotes_sqlite(ruta=None):
+    """Lotes de carga con registros (índice de Lote)"""
+    with closing(conectar_sqlite(ruta)) as conexion:
+        return [fila[0] for fila in conexion.execute(
+            "SELECT DISTINCT Lote FROM registros WHERE Lote IS NOT NULL"
+        )]
+
+def rango_fechas_sqlite(ruta=None):
+    """Devuelve la fecha mínima y máxima de registros usando el índice de Fecha"""
+    with closing(conectar_sqlite(ruta)) as conexion:
+        return conexion.execute(
+            "SELECT MIN(Fecha), MAX(Fecha) FROM registros WHERE Fecha LIKE '____-__-__'"
+        ).fetchone()
+
+# Registros ordenados por Fecha: los períodos se buscan con búsqueda binaria
+def ordenar_por_fecha(registros_df):
+    """Ordena los registros por Fecha (orden estable; fechas vacías al final)"""
+    if registros_df['Fecha'].is_monotonic_increasing:
+        return registros_df
+    return registros_df.sort_values('Fecha', kind='stable', na_position='last', ignore_index=True)
+
+def posiciones_periodo(registros_df, fecha_inicio=None, fecha_fin=None):
+    """Posiciones [inicio, fin) de los registros ordenados con Fecha dentro del período"""
+    fechas = registros_df['Fecha'].to_numpy()
+    
+    def buscar(valor, lado):
+        return int(np.searchsorted(fechas, np.datetime64(valor).astype(fechas.dtype), lado))
+    
+    # Las fechas vacías (NaT) quedan al final y nunca entran en un período
+    inicio = 0 if fecha_inicio is None else buscar(pd.Timestamp(fecha_inicio), 'left')
+    fin = buscar('NaT', 'left') if fecha_fin is None else buscar(pd.Timestamp(fecha_fin), 'right')
+    return inicio, max(inicio, fin)
+
+def rango_fechas(registros_df):
+    """Fecha mínima y máxima de los registros ordenados (primera y última con fecha)"""
+    inicio, fin = posiciones_periodo(registros_df)
+    if fin == 0:
+        return None, None
+    return registros_df['Fecha'].iat[0], registros_df['Fecha'].iat[fin - 1]
+
+def actualizar_empleados(almacen, empleados_df):
+    """Reemplaza los empleados del almacén y reconstruye sus índices"""
+    almacen.empleados = empleados_df
+    almacen.indice_empleados = construir_indice_empleados(empleados_df)
+    almacen.indice_nombres = construir_indice_nombres(empleados_df)
+
+# Claves de deduplicación de registros: (trabajador, fecha, hora de entrada)
+def claves_registros(registros_df, nombre_archivo=False):
+    """Calcula la clave normalizada de cada registro (con el nombre asignado o el del archivo)"""
+    fechas = convertir_a_datetime(registros_df['Fecha']).dt.strftime('%Y-%m-%d')
+    entradas = convertir_a_datetime(registros_df['Hora_Entrada']).dt.strftime('%H:%M')
+    
+    nombres = registros_df['Nombre'].astype(object)
+    if nombre_archivo and 'Nombre_Archivo' in registros_df.columns:
+        # Vacío: el archivo traía el mismo nombre que quedó asignado
+        nombres = registros_df['Nombre_Archivo'].astype(object).fillna(nombres)
+    
+    return list(zip(
+        nombres.astype(str),
+        fechas.fillna(registros_df['Fecha'].astype(str)),
+        entradas.fillna('')
+    ))
+
+# Un registro se reconoce por el nombre asignado y por el del archivo: un nombre confirmado
+# después (asignar_trabajador) sigue coincidiendo con el archivo si se vuelve a cargar
+def conjunto_claves(registros_df):
+    """Claves de los registros con el nombre asignado y, si era otro, con el del archivo"""
+    claves = set(claves_registros(registros_df))
+    if 'Nombre_Archivo' in registros_df.columns:
+        renombrados = registros_df[registros_df['Nombre_Archivo'].notna().to_numpy()]
+        claves.update(claves_registros(renombrados, nombre_archivo=True))
+    return claves
+
+def descartar_duplicados(nuevos_df, claves_existentes):
+    """Quita registros cuya clave ya existe (O(1) por fila) y agrega las nuevas al conjunto"""
+    conservar = []
+    for clave, clave_archivo in zip(
+        claves_registros(nuevos_df), claves_registros(nuevos_df, nombre_archivo=True)
+    ):
+        if clave in claves_existentes or clave_archivo in claves_existentes:
+            conservar.append(False)
+        else:
+            claves_existentes.add(clave)
+            claves_existentes.add(clave_archivo)
+            conservar.append(True)
+    
+    conservar = np.array(conservar, dtype=bool)
+    return nuevos_df[conservar], int((~conservar).sum())
+
+def descartar_ya_cargados(almacen, nuevos_df):
+    """Quita los registros ya cargados y reserva las claves de los nuevos (con el candado tomado)"""
+    if ALMACENAMIENTO == "sqlite" and not nuevos_df.empty:
+        # Las claves de la base se leen solo para las fechas de los registros nuevos
+        fechas = convertir_a_datetime(nuevos_df['Fecha']).dropna()
+        if not fechas.empty:
+            existentes = consultar_registros_sqlite(
+                fechas.min(), fechas.max(),
+                columnas=['Nombre', 'Fecha', 'Hora_Entrada', 'Nombre_Archivo']
+            )
+            almacen.claves_registros.update(conjunto_claves(existentes))
+    return descartar_duplicados(nuevos_df, almacen.claves_registros)
+
+# Huella y registro de archivos procesados
+def huella_archivo(archivo, tamano_lectura=1024 * 1024):
+    """Calcula el SHA-256 del contenido de un archivo subido"""
+    archivo.seek(0)
+    huella = hashlib.sha256()
+    for parte in iter(lambda: archivo.read(tamano_lectura), b''):
+        huella.update(parte)
+    archivo.seek(0)
+    return huella.hexdigest()
+
+def cargar_archivos_procesados():
+    """Devuelve un diccionario huella -> información del archivo ya procesado"""
+    try:
+        archivos_df = pd.read_csv(ARCHIVOS_PROCESADOS_CSV)
+    except FileNotFoundError:
+        return {}
+    
+    # Registros anteriores a la columna Lote: se reescribe el archivo una sola vez
+    if list(archivos_df.columns) != COLUMNAS_ARCHIVOS:
+        archivos_df = archivos_df.reindex(columns=COLUMNAS_ARCHIVOS)
+        escribir_csv_atomico(archivos_df, ARCHIVOS_PROCESADOS_CSV)
+    return {fila['Huella']: fila for fila in archivos_df.to_dict('records')}
+
+def registrar_archivo_procesado(archivos, huella, nombre_archivo, registros, lote=None):
+    """Agrega un archivo al registro de procesados (en memoria y en disco)"""
+    fila = {
+        'Huella': huella,
+        'Archivo': nombre_archivo,
+        'Fecha_Proceso': datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'Registros': registros,
+        'Lote': lote
+    }
+    archivos[huella] = fila
+    pd.DataFrame([fila], columns=COLUMNAS_ARCHIVOS).to_csv(
+        ARCHIVOS_PROCESADOS_CSV, mode='a', index=False,
+        header=not os.path.exists(ARCHIVOS_PROCESADOS_CSV)
+    )
+
+def limpiar_archivos_procesados(archivos):
+    """Vacía el registro de archivos procesados"""
+    archivos.clear()
+    if os.path.exists(ARCHIVOS_PROCESADOS_CSV):
+        os.remove(ARCHIVOS_PROCESADOS_CSV)
+
+# --- Historial de sueldos (solo se agregan tarifas; nunca se sobrescriben) ---
+def cargar_historial_sueldos():
+    """Devuelve el historial de sueldos del almacenamiento configurado (ya tipado)"""
+    if ALMACENAMIENTO == "sqlite":
+        with closing(conectar_sqlite()) as conexion:
+            # Primera vez con SQLite: se importa el historial de los CSV
+            migrar_csv_a_sqlite(conexion)
+            historial_df = pd.read_sql_query("SELECT * FROM sueldos", conexion)
+    else:
+        try:
+            historial_df = pd.read_csv(HISTORIAL_SUELDOS_CSV)
+        except FileNotFoundError:
+            historial_df = pd.DataFrame(columns=COLUMNAS_SUELDOS)
+    
+    return aplicar_esquema_sueldos(historial_df.reindex(columns=COLUMNAS_SUELDOS))
+
+def registrar_sueldo(historial_df, id_empleado, sueldo_semanal, vigente_desde):
+    """Agrega una tarifa al historial (en disco y en memoria); devuelve el historial nuevo"""
+    sueldo_diario, sueldo_hora = calcular_sueldos(sueldo_semanal)
+    fila = pd.DataFrame([{
+        'ID': id_empleado,
+        'Sueldo_Semanal': sueldo_semanal,
+        'Sueldo_Diario': sueldo_diario,
+        'Sueldo_Hora': sueldo_hora,
+        'Vigente_Desde': pd.Timestamp(vigente_desde).strftime('%Y-%m-%d')
+    }], columns=COLUMNAS_SUELDOS)
+    
+    if ALMACENAMIENTO == "sqlite":
+        with closing(conectar_sqlite()) as conexion, conexion:
+            fila.to_sql('sueldos', conexion, if_exists='append', index=False)
+    else:
+        fila.to_csv(
+            HISTORIAL_SUELDOS_CSV, mode='a', index=False,
+            header=not os.path.exists(HISTORIAL_SUELDOS_CSV)
+        )
+    return pd.concat([historial_df, aplicar_esquema_sueldos(fila)], ignore_index=True)
+
+def limpiar_historial_sueldos():
+    """Borra el historial de sueldos; devuelve un historial vacío"""
+    if ALMACENAMIENTO == "sqlite":
+        with closing(conectar_sqlite()) as conexion, conexion:
+            conexion.execute("DELETE FROM sueldos")
+    elif os.path.exists(HISTORIAL_SUELDOS_CSV):
+        os.remove(HISTORIAL_SUELDOS_CSV)
+    return historial_o_vacio(None)
+
+def tabla_sueldos(empleados_df, historial_df):
+    """Tarifas por trabajador ordenadas por vigencia; la primera de cada uno aplica también antes"""
+    # Trabajadores sin historial: su sueldo actual aplica a todas las fechas
+    sin_historial = empleados_df.loc[
+        ~empleados_df['ID'].isin(historial_df['ID']).to_numpy(), COLUMNAS_SUELDOS[:-1]
+    ]
+    tarifas = pd.DataFrame({
+        'ID': np.concatenate([
+            historial_df['ID'].to_numpy(dtype=float, na_value=np.nan),
+            sin_historial['ID'].to_numpy(dtype=float, na_value=np.nan)
+        ]),
+        'Sueldo_Hora': np.concatenate([
+            historial_df['Sueldo_Hora'].to_numpy(dtype=float),
+            sin_historial['Sueldo_Hora'].to_numpy(dtype=float)
+        ]),
+        'Vigente_Desde': np.concatenate([
+            historial_df['Vigente_Desde'].to_numpy(dtype='datetime64[ns]'),
+            np.full(len(sin_historial), FECHA_BASE_SUELDOS.to_datetime64(), dtype='datetime64[ns]')
+        ])
+    })
+    tarifas = tarifas.dropna(subset=['ID', 'Vigente_Desde']).astype({'ID': 'int64'})
+    
+    # Dos tarifas con la misma vigencia: cuenta la última registrada
+    tarifas = tarifas.sort_values('Vigente_Desde', kind='stable')
+    tarifas = tarifas.drop_duplicates(['ID', 'Vigente_Desde'], keep='last')
+    tarifas.loc[~tarifas['ID'].duplicated().to_numpy(), 'Vigente_Desde'] = FECHA_BASE_SUELDOS
+    return tarifas.sort_values('Vigente_Desde', kind='stable', ignore_index=True)
+
+def sueldo_hora_vigente(nombres, fechas, empleados_df, historial_df, indice=None):
+    """Sueldo por hora vigente en cada fecha para cada trabajador (unión as-of vectorizada)"""
+    if indice is None:
+        indice = construir_indice_empleados(empleados_df)
+    filas = pd.Series(np.asarray(nombres, dtype=object)).map(indice)
+    consultas = pd.DataFrame({
+        'ID': empleados_df['ID'].reindex(filas).to_numpy(dtype=float, na_value=np.nan),
+        'Fecha': pd.Series(fechas).to_numpy(dtype='datetime64[ns]'),
+        'Posicion': np.arange(len(filas))
+    }).dropna(subset=['ID', 'Fecha'])
+    consultas['ID'] = consultas['ID'].astype('int64')
+    
+    # Cada fecha toma la última tarifa con vigencia anterior o igual
+    unidas = pd.merge_asof(
+        consultas.sort_values('Fecha', kind='stable'), tabla_sueldos(empleados_df, historial_df),
+        left_on='Fecha', right_on='Vigente_Desde', by='ID', direction='backward'
+    )
+    sueldo_hora = np.full(len(filas), np.nan)
+    sueldo_hora[unidas['Posicion'].to_numpy()] = unidas['Sueldo_Hora'].to_numpy()
+    return sueldo_hora
+
+def sueldos_vigentes(historial_df, fecha):
+    """Sueldo semanal, diario y por hora vigente en la fecha de cada trabajador con historial (índice ID)"""
+    historial = historial_df.dropna(subset=['ID', 'Vigente_Desde'])
+    historial = historial.sort_values('Vigente_Desde', kind='stable')
+    historial = historial.drop_duplicates(['ID', 'Vigente_Desde'], keep='last')
+    
+    # Antes de la primera tarifa aplica la primera, igual que en tabla_sueldos
+    vigentes = pd.concat([
+        historial.drop_duplicates('ID'),
+        historial[(historial['Vigente_Desde'] <= pd.Timestamp(fecha)).to_numpy()]
+    ]).drop_duplicates('ID', keep='last')
+    return vigentes.set_index('ID')[COLUMNAS_SUELDOS[1:-1]]
+
+def aplicar_sueldos_vigentes(almacen, fecha=None):
+    """Pasa a cada trabajador el sueldo del historial vigente en la fecha (hoy por omisión);
+    así un aumento registrado con fecha futura llega a su fila al cumplirse. Devuelve cuántos cambiaron"""
+    fecha = fecha or datetime.date.today()
+    vigentes = sueldos_vigentes(almacen.sueldos, fecha)
+    empleados = almacen.empleados
+    filas = empleados['ID'].isin(vigentes.index).to_numpy()
+    
+    columnas = COLUMNAS_SUELDOS[1:-1]
+    nuevos = vigentes.reindex(empleados.loc[filas, 'ID'].astype('int64')).to_numpy(dtype=float)
+    actuales = empleados.loc[filas, columnas].to_numpy(dtype=float, na_value=np.nan)
+    distintos = ~np.isclose(nuevos, actuales).all(axis=1)
+    
+    for etiqueta, valores in zip(empleados.index[filas][distintos], nuevos[distintos]):
+        campos = dict(zip(columnas, valores.tolist()))
+        for col, valor in campos.items():
+            empleados.at[etiqueta, col] = valor
+        registrar_cambio(
+            'actualizar_empleado', almacen.empleados, almacen.registros,
+            id=int(empleados.at[etiqueta, 'ID']), campos=campos
+        )
+    almacen.fecha_sueldos = fecha
+    return int(distintos.sum())
+
+# --- Agregados materializados: horas y registros por trabajador y día ---
+def agregar_por_dia(registros_df):
+    """Suma horas y cuenta registros por trabajador y día (índice Nombre, Fecha; filas por fecha)"""
+    datos = pd.DataFrame({
+        'Nombre': registros_df['Nombre'].to_numpy(),
+        'Fecha': registros_df['Fecha'].to_numpy(),
+        'Horas': pd.to_numeric(registros_df['Total_Horas_Decimal'], errors='coerce').fillna(0).to_numpy()
+    }).dropna(subset=['Nombre', 'Fecha'])
+    
+    return ordenar_agregado(datos.groupby(['Nombre', 'Fecha']).agg(
+        Horas=('Horas', 'sum'),
+        Registros=('Horas', 'size')
+    ))
+
+# Los agregados se guardan ordenados por fecha: los períodos se cortan por búsqueda binaria
+def ordenar_agregado(agregado):
+    """Filas ordenadas por la fecha del índice (y después por trabajador)"""
+    return agregado.sort_index(level=1, sort_remaining=True, kind='stable')
+
+def posicion_fecha(agregado, fecha, lado='left'):
+    """Posición de una fecha en un agregado ordenado por fecha"""
+    return agregado.index.get_level_values(1).searchsorted(pd.Timestamp(fecha), side=lado)
+
+# Frecuencias de pandas para cada tamaño de intervalo de los reportes
+FRECUENCIAS_INTERVALO = {
+    'dia': 'D',
+    'semana': 'W-MON',  # semana ISO: de lunes a domingo
+    'mes': 'MS'
+}
+
+def agregar_por_intervalo(agregado_diario, frecuencia):
+    """Acumula el agregado diario en intervalos de cualquier tamaño para todos los trabajadores"""
+    frecuencia = FRECUENCIAS_INTERVALO.get(frecuencia, frecuencia)
+    datos = agregado_diario.reset_index()
+    
+    # Cada intervalo se etiqueta con su fecha de inicio
+    agrupado = datos.groupby([
+        'Nombre',
+        pd.Grouper(key='Fecha', freq=frecuencia, label='left', closed='left')
+    ])[list(agregado_diario.columns)].sum()
+    
+    return agrupado.rename_axis(['Nombre', 'Inicio'])
+
+def enrollar_agregado(agregado_diario, periodo):
+    """Acumula el agregado diario por semana ISO ('semana', inicia en lunes) o por mes ('mes')"""
+    return ordenar_agregado(agregar_por_intervalo(agregado_diario, periodo))
+
+def inicio_intervalo(fecha, periodo):
+    """Fecha de inicio de la semana (lunes) o del mes que contiene la fecha"""
+    fecha = pd.Timestamp(fecha)
+    if periodo == 'semana':
+        return fecha - pd.Timedelta(days=fecha.dayofweek)
+    return fecha.replace(day=1)
+
+def construir_agregados(registros_df):
+    """Agregados por día, semana y mes a partir de registros de asistencia"""
+    return agregados_desde_diario(agregar_por_dia(registros_df))
+
+def agregados_desde_diario(diario):
+    """Agregados por día, semana y mes a partir del agregado diario"""
+    return {
+        'dia': diario,
+        'semana': enrollar_agregado(diario, 'semana'),
+        'mes': enrollar_agregado(diario, 'mes')
+    }
+
+def actualizar_agregados(agregados, nuevos_registros):
+    """Suma los registros nuevos a los agregados; solo se rehacen las fechas desde el primero nuevo"""
+    return actualizar_agregados_diario(agregados, agregar_por_dia(nuevos_registros))
+
+def sumar_agregado_diario(actual, delta):
+    """Suma dos agregados diarios (trabajador y día) y deja el resultado ordenado por fecha"""
+    if actual is None or actual.empty:
+        return delta
+    return ordenar_agregado(actual.add(delta, fill_value=0).astype({'Registros': 'int64'}))
+
+def actualizar_agregados_diario(agregados, delta):
+    """Suma un agregado diario de registros nuevos a los agregados por día, semana y mes"""
+    actual = agregados.get('dia')
+    if delta.empty:
+        return agregados
+    if actual is None or actual.empty:
+        return agregados_desde_diario(delta)
+    
+    # Día: lo anterior a la primera fecha nueva se conserva; la cola se une con los nuevos
+    desde = delta.index.get_level_values(1).min()
+    corte = posicion_fecha(actual, desde)
+    cola = actual.iloc[corte:].add(delta, fill_value=0).astype({'Registros': 'int64'})
+    diario = pd.concat([actual.iloc[:corte], ordenar_agregado(cola)])
+    
+    # Semana y mes: se vuelven a acumular solo los intervalos que tocan las fechas nuevas
+    actualizados = {'dia': diario}
+    for periodo in ['semana', 'mes']:
+        inicio = inicio_intervalo(desde, periodo)
+        anterior = agregados[periodo]
+        actualizados[periodo] = pd.concat([
+            anterior.iloc[:posicion_fecha(anterior, inicio)],
+            enrollar_agregado(diario.iloc[posicion_fecha(diario, inicio):], periodo)
+        ])
+    return actualizados
+
+def agregado_en_periodo(agregado, fecha_inicio, fecha_fin):
+    """Filas de un agregado (diario, semanal o mensual) cuya fecha cae en el período"""
+    return agregado.iloc[
+        posicion_fecha(agregado, fecha_inicio):posicion_fecha(agregado, fecha_fin, lado='right')
+    ]
+
+# Mapeos de columnas por formato de archivo
+def cargar_mapeos_columnas():
+    """Devuelve el diccionario formato -> {campo: columna} guardado"""
+    try:
+        with open(MAPEOS_COLUMNAS_JSON, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def guardar_mapeos_columnas(mapeos):
+    """Guarda los mapeos de columnas para reutilizarlos en la siguiente carga"""
+    temporal = f"{MAPEOS_COLUMNAS_JSON}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(mapeos, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, MAPEOS_COLUMNAS_JSON)
+
+# Almacén de datos compartido por todas las sesiones del proceso
+class AlmacenDatos:
+    """Empleados, registros e índices cargados una sola vez por proceso (en SQLite los registros
+    se quedan en la base: registros es None y se consultan con índices)"""
+    
+    def __init__(self):
+        self.empleados = None
+        self.registros = None
+        self.indice_empleados = {}
+        self.indice_nombres = None
+        self.sueldos = None
+        self.claves_registros = set()
+        self.archivos_procesados = {}
+        self.agregados = {}
+        self.exportaciones = {}
+        self.version_datos = 0
+        self.version = None
+        self.fecha_sueldos = None
+        self.candado = threading.RLock()
+
+def firma_datos():
+    """Versión de los datos en disco: fecha de modificación y tamaño de cada archivo"""
+    if ALMACENAMIENTO == "sqlite":
+        rutas = [BASE_DATOS_SQLITE, f"{BASE_DATOS_SQLITE}-wal"]
+    else:
+        rutas = [EMPLEADOS_CSV, REGISTROS_CSV, BITACORA_CAMBIOS, BITACORA_COMPACTANDO]
+    
+    firma = []
+    for ruta in rutas:
+        try:
+            info = os.stat(ruta)
+            firma.append((ruta, info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            firma.append((ruta, None, None))
+    return tuple(firma)
+
+def cargar_en_almacen(almacen):
+    """Carga (o recarga) los datos desde disco al almacén compartido"""
+    with almacen.candado:
+        if ALMACENAMIENTO == "sqlite":
+            # Solo los empleados; los registros se consultan en la base y el agregado
+            # diario se calcula ahí mismo
+            empleados_df, _ = cargar_datos_sqlite(registros=False)
+            empleados_df = aplicar_esquema_empleados(empleados_df.reindex(columns=COLUMNAS_EMPLEADOS))
+            almacen.registros = None
+        else:
+            empleados_df, registros_df = cargar_datos()
+            almacen.registros = ordenar_por_fecha(registros_df)
+        with medir_etapa('indices_y_agregados') as medicion:
+            actualizar_empleados(almacen, empleados_df)
+            if almacen.registros is None:
+                # Las claves de deduplicación se leen por fechas al ingestar
+                almacen.claves_registros = set()
+                almacen.agregados = agregados_desde_diario(agregado_diario_sqlite())
+                medicion['filas'] = int(almacen.agregados['dia']['Registros'].sum())
+            else:
+                almacen.claves_registros = conjunto_claves(almacen.registros)
+                almacen.agregados = construir_agregados(almacen.registros)
+                medicion['filas'] = len(almacen.registros)
+        almacen.archivos_procesados = cargar_archivos_procesados()
+        almacen.sueldos = cargar_historial_sueldos()
+        aplicar_sueldos_vigentes(almacen)
+        almacen.version = firma_datos()
+        almacen.version_datos += 1
+
+# Confirmación manual de un nombre del archivo que solo se parecía a un trabajador
+def aplicar_asignacion(registros_df, nombre, id_trabajador, nombre_registrado):
+    """Pasa al trabajador los registros sin ID con ese nombre; devuelve registros y cuántos cambiaron"""
+    filas = (registros_df['Nombre'].astype(object) == nombre) & registros_df['ID_Trabajador'].isna()
+    if not filas.any():
+        return registros_df, 0
+    
+    registros_df = registros_df.copy()
+    # El nombre del archivo se conserva para reconocer el registro si se vuelve a cargar
+    if 'Nombre_Archivo' not in registros_df.columns:
+        registros_df['Nombre_Archivo'] = None
+    sin_nombre_archivo = filas & registros_df['Nombre_Archivo'].isna()
+    for col, valor in [('Nombre', nombre_registrado), ('Nombre_Archivo', nombre)]:
+        valores = registros_df[col]
+        if isinstance(valores.dtype, pd.CategoricalDtype) and valor not in valores.cat.categories:
+            registros_df[col] = valores.cat.add_categories([valor])
+    registros_df.loc[sin_nombre_archivo, 'Nombre_Archivo'] = nombre
+    registros_df.loc[filas, 'Nombre'] = nombre_registrado
+    registros_df.loc[filas, 'ID_Trabajador'] = id_trabajador
+    return registros_df, int(filas.sum())
+
+def asignar_trabajador(almacen, nombre, id_trabajador):
+    """Registra la confirmación en la bitácora y la aplica en memoria; devuelve cuántos registros cambiaron"""
+    with almacen.candado:
+        empleado = almacen.empleados.loc[almacen.empleados['ID'] == id_trabajador].iloc[0]
+        if almacen.registros is None:
+            # SQLite: un UPDATE en la base; el agregado diario se vuelve a calcular ahí
+            cambiados = contar_registros_sqlite(nombres=[nombre])[0]
+            registrar_cambio(
+                'asignar_trabajador', almacen.empleados, None,
+                nombre=nombre, id=int(id_trabajador), nombre_registrado=empleado['Nombre']
+            )
+            almacen.agregados = agregados_desde_diario(agregado_diario_sqlite())
+            marcar_guardado(almacen)
+            return cambiados
+        
+        almacen.registros, cambiados = aplicar_asignacion(
+            almacen.registros, nombre, int(id_trabajador), empleado['Nombre']
+        )
+        # Las claves y los agregados dependen del nombre del registro
+        almacen.claves_registros = conjunto_claves(almacen.registros)
+        almacen.agregados = construir_agregados(almacen.registros)
+        
+        # Se registra después de aplicarla (una compactación ya guarda los registros asignados)
+        registrar_cambio(
+            'asignar_trabajador', almacen.empleados, almacen.registros,
+            nombre=nombre, id=int(id_trabajador), nombre_registrado=empleado['Nombre']
+        )
+        marcar_guardado(almacen)
+    return cambiados
+
+def marcar_guardado(almacen):
+    """Registra que el almacén ya refleja lo escrito en disco (evita recargarlo)"""
+    almacen.version = firma_datos()
+    # Cualquier cambio invalida las exportaciones en caché
+    almacen.version_datos += 1
+
+# Función para calcular sueldos según ley mexicana
+def calcular_sueldos(sueldo_semanal):
+    """Calcula sueldo diario y por hora según ley mexicana"""
+    sueldo_diario = sueldo_semanal / 7
+    sueldo_hora = sueldo_diario / 8
+    return round(sueldo_diario, 2), round(sueldo_hora, 2)
+
+# Columnas de dinero del reporte de nómina (numéricas, se formatean al mostrar)
+COLUMNAS_MONEDA = ['Sueldo por Hora'] + CONCEPTOS_LFT + ['Total a Pagar', 'Pago Ordinario']
+FORMATO_MONEDA_EXCEL = '"$"#,##0.00'
+
+# Función para calcular el resumen de nómina en una sola agregación
+def calcular_resumen_nomina(registros_filtrados, empleados, fecha_inicio, fecha_fin,
+                            indice=None, historial=None):
+    """Resumen de nómina a partir de registros individuales (deben cubrir las semanas completas)"""
+    return calcular_resumen_desde_agregados(
+        agregar_por_dia(registros_filtrados), empleados, fecha_inicio, fecha_fin,
+        indice, historial
+    )
+
+def calcular_resumen_desde_agregados(agregado_diario, empleados, fecha_inicio, fecha_fin,
+                                     indice=None, historial=None):
+    """Resumen de nómina con las reglas de la LFT leyendo solo el agregado diario del período"""
+    # Los límites semanales se aplican a las semanas completas; se pagan solo los días del período
+    lunes, domingo = semanas_completas(fecha_inicio, fecha_fin)
+    
+    # Los días festivos se pagan a los trabajadores activos aunque no los hayan trabajado
+    activos = empleados.loc[empleados['Activo'].astype(bool).to_numpy(), 'Nombre']
+    semanas = agregado_con_pago(
+        agregar_festivos(agregado_en_periodo(agregado_diario, lunes, domingo), activos, lunes, domingo),
+        empleados, historial, indice, tarifa=True
+    )
+    return armar_resumen_nomina(
+        nomina_por_trabajador(semanas, fecha_inicio, fecha_fin),
+        empleados, fecha_inicio, fecha_fin, indice
+    )
+
+def historial_o_vacio(historial):
+    """Historial de sueldos o uno vacío (se usa el sueldo actual de cada trabajador)"""
+    if historial is None:
+        return aplicar_esquema_sueldos(pd.DataFrame(columns=COLUMNAS_SUELDOS))
+    return historial
+
+def agregado_con_pago(agregado_diario, empleados, historial=None, indice=None, tarifa=False):
+    """Agrega al agregado diario la columna Pago con la tarifa vigente de cada día
+    (tarifa=True: también Sueldo_Hora, que necesitan los días festivos sin horas)"""
+    sueldo_hora = sueldo_hora_vigente(
+        agregado_diario.index.get_level_values('Nombre'),
+        agregado_diario.index.get_level_values('Fecha'),
+        empleados, historial_o_vacio(historial), indice
+    )
+    agregado_diario = agregado_diario.assign(Pago=agregado_diario['Horas'].to_numpy() * sueldo_hora)
+    if tarifa:
+        agregado_diario['Sueldo_Hora'] = sueldo_hora
+    return agregado_diario
+
+def armar_resumen_nomina(por_trabajador, empleados, fecha_inicio, fecha_fin, indice=None):
+    """Une los conceptos por trabajador (índice Nombre) con los empleados registrados"""
+    # Solo se reportan trabajadores registrados
+    if indice is None:
+        indice = construir_indice_empleados(empleados)
+    filas = por_trabajador.index.map(indice)
+    por_trabajador = por_trabajador[pd.notna(filas)]
+    
+    # Con un aumento dentro del período, el sueldo por hora es el promedio ponderado
+    horas = por_trabajador['Horas'].astype(float)
+    df_resumen = pd.DataFrame({
+        'Trabajador': por_trabajador.index,
+        'Días Trabajados': por_trabajador['Registros'].to_numpy(),
+        'Horas Totales': horas.round(2).to_numpy(),
+        'Horas Dobles': por_trabajador['Horas_Dobles'].round(2).to_numpy(),
+        'Horas Triples': por_trabajador['Horas_Triples'].round(2).to_numpy(),
+        'Sueldo por Hora': (por_trabajador['Pago'] / horas.where(horas > 0)).round(2).to_numpy(),
+        **{concepto: por_trabajador[concepto].round(2).to_numpy() for concepto in CONCEPTOS_LFT},
+        'Total a Pagar': por_trabajador['Total a Pagar'].round(2).to_numpy(),
+        'Período': f"{fecha_inicio} al {fecha_fin}"
+    })
+    
+    return df_resumen
+
+# Reporte por intervalos de tiempo (semanal, mensual, diario por trabajador)
+def reporte_por_intervalo(agregado_diario, empleados, frecuencia, indice=None, historial=None):
+    """Horas, registros y pago ordinario por trabajador e intervalo en una sola agregación"""
+    # El pago se calcula por día con la tarifa vigente y después se acumula.
+    # Son horas por tarifa, sin las reglas de la LFT: no es el total del reporte de nómina
+    diario = agregado_con_pago(agregado_diario, empleados, historial, indice)
+    por_intervalo = agregar_por_intervalo(diario, frecuencia).reset_index()
+    
+    # Los trabajadores no registrados no tienen tarifa: su pago queda vacío
+    if indice is None:
+        indice = construir_indice_empleados(empleados)
+    registrado = por_intervalo['Nombre'].map(indice).notna()
+    pago = por_intervalo['Pago'].where(registrado)
+    
+    return pd.DataFrame({
+        'Trabajador': por_intervalo['Nombre'],
+        'Inicio': por_intervalo['Inicio'].dt.date,
+        'Registros': por_intervalo['Registros'].astype('int64'),
+        'Horas Totales': por_intervalo['Horas'].round(2),
+        'Sueldo por Hora': (pago / por_intervalo['Horas'].where(por_intervalo['Horas'] > 0)).round(2),
+        'Pago Ordinario': pago.round(2)
+    })
+
+# Aplicar formato de moneda a columnas de una hoja de Excel
+def aplicar_formato_moneda(worksheet, df, columnas=COLUMNAS_MONEDA):
+    """Asigna formato de moneda a las celdas numéricas de las columnas indicadas"""
+    for col in columnas:
+        if col not in df.columns:
+            continue
+        letra = worksheet.cell(row=1, column=df.columns.get_loc(col) + 1).column_letter
+        for celda in worksheet[letra][1:]:
+            celda.number_format = FORMATO_MONEDA_EXCEL
+
+# Filtrar registros por período
+def filtrar_registros_periodo(registros_df, fecha_inicio, fecha_fin):
+    """Devuelve los registros entre dos fechas (consulta indexada con SQLite)"""
+    if ALMACENAMIENTO == "sqlite":
+        # Consulta indexada: solo se leen los registros del período
+        return aplicar_esquema_registros(consultar_registros_sqlite(fecha_inicio, fecha_fin))
+    
+    # Registros ordenados por Fecha: el período es un solo tramo contiguo
+    if fecha_inicio and fecha_fin:
+        inicio, fin = posiciones_periodo(registros_df, fecha_inicio, fecha_fin)
+        return registros_df.iloc[inicio:fin]
+    return registros_df
+
+# Consultas de registros que sirven con ambos almacenamientos
+def registros_completos(almacen):
+    """Todos los registros (en SQLite se leen de la base solo al pedirlos)"""
+    if almacen.registros is None:
+        return aplicar_esquema_registros(consultar_registros_sqlite())
+    return almacen.registros
+
+def totales_registros(almacen):
+    """Cantidad de registros y horas totales"""
+    if almacen.registros is None:
+        # El agregado diario ya está en memoria (no se recorre la tabla)
+        diario = almacen.agregados['dia']
+        return int(diario['Registros'].sum()), float(diario['Horas'].sum())
+    return len(almacen.registros), float(almacen.registros['Total_Horas_Decimal'].sum())
+
+def hay_registros(almacen):
+    """Indica si hay al menos un registro de asistencia"""
+    if almacen.registros is None:
+        return not almacen.agregados['dia'].empty
+    return not almacen.registros.empty
+
+def registros_recientes(almacen, cantidad=5):
+    """Los últimos registros por fecha"""
+    if almacen.registros is None:
+        with closing(conectar_sqlite()) as conexion:
+            recientes = pd.read_sql_query(
+                "SELECT * FROM registros ORDER BY Fecha DESC LIMIT ?", conexion, params=[cantidad]
+            )
+        return aplicar_esquema_registros(recientes.iloc[::-1].reset_index(drop=True))
+    return almacen.registros.tail(cantidad)
+
+def registros_sin_trabajador(almacen):
+    """Nombres de los registros sin trabajador asignado (para revisarlos)"""
+    if almacen.registros is None:
+        with closing(conectar_sqlite()) as conexion:
+            return pd.read_sql_query(
+                "SELECT ID_Trabajador, Nombre FROM registros WHERE ID_Trabajador IS NULL", conexion
+            )
+    return almacen.registros
+
+def lotes_registrados(almacen):
+    """Lotes de carga presentes en los registros"""
+    if almacen.registros is None:
+        return lotes_sqlite()
+    return list(almacen.registros['Lote'].dropna().unique())
+
+# Generar el libro de Excel del reporte de nómina
+def excel_reporte_nomina(df_resumen, registros_filtrados):
+    """Serializa el resumen y el detalle del período a un libro de Excel"""
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df_resumen.to_excel(writer, sheet_name='Resumen_Nomina', index=False)
+        aplicar_formato_moneda(writer.sheets['Resumen_Nomina'], df_resumen)
+        registros_filtrados.to_excel(writer, sheet_name='Detalle_Registros', index=False)
+    return output.getvalue()
+
+# Escribir un libro de Excel en modo streaming
+def excel_streaming(hojas, columnas_moneda=()):
+    """Escribe hojas (nombre, DataFrame) con openpyxl en modo solo escritura, bloque por bloque"""
+    # openpyxl se importa solo al exportar (no retrasa el arranque de la aplicación)
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    
+    libro = Workbook(write_only=True)
+    for nombre_hoja, df in hojas:
+        hoja = libro.create_sheet(nombre_hoja)
+        hoja.append([str(col) for col in df.columns])
+        # Solo las celdas de moneda llevan formato (las demás se escriben como valores)
+        moneda = [i for i, col in enumerate(df.columns) if col in columnas_moneda]
+        for inicio in range(0, len(df), TAMANO_BLOQUE):
+            bloque = df.iloc[inicio:inicio + TAMANO_BLOQUE].astype(object)
+            bloque = bloque.where(bloque.notna(), None)
+            for fila in bloque.itertuples(index=False, name=None):
+                if moneda:
+                    fila = list(fila)
+                    for i in moneda:
+                        fila[i] = WriteOnlyCell(hoja, value=fila[i])
+                        fila[i].number_format = FORMATO_MONEDA_EXCEL
+                hoja.append(fila)
+    
+    output = BytesIO()
+    libro.save(output)
+    return output.getvalue()
+
+# Ingesta en curso: cada bloque se guarda al llegar y el lote se confirma al final
+FILAS_VISTA_PREVIA = 10
+
+class LoteIngesta:
+    """Guarda los bloques nuevos de una ingesta conforme llegan (CSV: en la bitácora sin confirmar;
+    SQLite: en una transacción abierta) y conserva solo lo necesario para el resumen"""
+    
+    def __init__(self, almacen, lote):
+        self.almacen = almacen
+        self.lote = lote
+        self.nuevos = 0
+        self.omitidos = 0
+        self.vista = []
+        self.por_revisar = []
+        self.claves = set()
+        self.diario = None
+        # En CSV los registros viven en memoria: los bloques se unen a ellos al confirmar
+        self.bloques = []
+        self.conexion = conectar_sqlite() if ALMACENAMIENTO == "sqlite" else None
+        with almacen.candado:
+            LOTES_ABIERTOS.add(lote)
+    
+    def agregar(self, registros_df):
+        """Descarta los registros ya cargados, guarda los nuevos y devuelve cuántos fueron"""
+        almacen = self.almacen
+        with almacen.candado:
+            nuevos_df, omitidos = descartar_ya_cargados(almacen, registros_df)
+            self.omitidos += omitidos
+            if nuevos_df.empty:
+                return 0
+            self.claves.update(conjunto_claves(nuevos_df))
+            
+            # Cada registro guarda el lote (trabajo) que lo cargó
+            bloque = nuevos_df.assign(Lote=self.lote)
+            if self.conexion is not None:
+                insertar_registros_sqlite(self.conexion, bloque)
+            else:
+                # Con el candado: una compactación no puede apartar la bitácora a media línea
+                registrar_bloque_lote(bloque, self.lote)
+                self.bloques.append(bloque)
+        
+        self.diario = sumar_agregado_diario(self.diario, agregar_por_dia(bloque))
+        if self.nuevos < FILAS_VISTA_PREVIA:
+            self.vista.append(nuevos_df.head(FILAS_VISTA_PREVIA - self.nuevos))
+        if almacen.indice_nombres is not None:
+            self.por_revisar.append(nombres_por_revisar(nuevos_df, almacen.indice_nombres))
+        self.nuevos += len(nuevos_df)
+        return len(nuevos_df)
+    
+    def confirmar(self, archivos):
+        """Confirma el lote en disco, lo suma a la memoria y registra los archivos procesados"""
+        almacen = self.almacen
+        with almacen.candado, medir_etapa('confirmar_ingesta', self.lote) as medicion:
+            medicion['filas'] = self.nuevos
+            LOTES_ABIERTOS.discard(self.lote)
+            if self.nuevos:
+                if self.conexion is not None:
+                    self.conexion.commit()
+                else:
+                    confirmar_lote_bitacora(self.lote)
+                    almacen.registros = ordenar_por_fecha(
+                        concatenar_registros([almacen.registros] + self.bloques)
+                    )
+                almacen.agregados = actualizar_agregados_diario(almacen.agregados, self.diario)
+                compactar_si_es_necesario(almacen.empleados, almacen.registros)
+                marcar_guardado(almacen)
+            
+            for huella, nombre_archivo, registros in archivos:
+                registrar_archivo_procesado(
+                    almacen.archivos_procesados, huella, nombre_archivo, registros, self.lote
+                )
+        self.cerrar()
+    
+    def descartar(self):
+        """Deshace lo guardado y libera las claves reservadas para poder reintentar la ingesta"""
+        with self.almacen.candado:
+            LOTES_ABIERTOS.discard(self.lote)
+            self.almacen.claves_registros.difference_update(self.claves)
+        self.cerrar()
+    
+    def cerrar(self):
+        """Cierra la conexión (sin confirmar, SQLite deshace la transacción) y suelta los bloques"""
+        if self.conexion is not None:
+            self.conexion.close()
+            self.conexion = None
+        self.bloques = []
+    
+    def resultado(self):
+        """Resumen que se muestra al terminar la ingesta"""
+        vista = pd.concat(self.vista, ignore_index=True) if self.vista else None
+        
+        # Nombres del archivo que no se pudieron asignar a un trabajador
+        por_revisar = None
+        if self.por_revisar:
+            por_revisar = pd.concat(self.por_revisar, ignore_index=True).groupby(
+                ['Nombre', 'Estado', 'Candidatos'], as_index=False, sort=False
+            )['Registros'].sum()[['Nombre', 'Registros', 'Estado', 'Candidatos']]
+        
+        return {
+            'nuevos': self.nuevos,
+            'omitidos': self.omitidos,
+            'vista': vista,
+            'por_revisar': por_revisar
+        }
+
+# Ingesta de varios archivos (pool de procesos) con deduplicación y confirmación única
+def ingestar_lote(almacen, lote, archivos, mapeos, al_terminar=None, max_procesos=None):
+    """Procesa archivos (nombre, contenido) en paralelo y confirma los registros nuevos"""
+    empleados_ids = almacen.empleados[['ID', 'Nombre']].copy()
+    
+    # Lectura de los archivos y cálculo de horas (en el pool de procesos)
+    with medir_etapa('lectura_y_calculo', f"{len(archivos)} archivos") as medicion:
+        resultados = procesar_lote_paralelo(
+            archivos, mapeos, empleados_ids, max_procesos=max_procesos, al_terminar=al_terminar,
+            indice=almacen.indice_nombres
+        )
+        medicion['filas'] = sum(len(registros_df) for _, registros_df in resultados)
+    
+    ingesta = LoteIngesta(almacen, lote)
+    procesados = []
+    try:
+        with medir_etapa('deduplicacion', lote) as medicion:
+            # El contenido se toma por posición (puede haber nombres repetidos)
+            for (nombre_archivo, registros_df), (_, contenido) in zip(resultados, archivos):
+                nuevos = ingesta.agregar(registros_df) if not registros_df.empty else 0
+                huella = hashlib.sha256(contenido).hexdigest()
+                procesados.append((huella, nombre_archivo, nuevos))
+            medicion['filas'] = ingesta.nuevos + ingesta.omitidos
+        
+        ingesta.confirmar(procesados)
+    except Exception:
+        ingesta.descartar()
+        raise
+    
+    return ingesta.resultado()
+
+# Reporte de nómina de un período (resumen y libro de Excel)
+def generar_reporte_nomina(almacen, fecha_inicio, fecha_fin):
+    """Resume el período desde los agregados diarios y genera el libro de Excel"""
+    periodo = f"{fecha_inicio} al {fecha_fin}"
+    with medir_etapa('reporte_resumen', periodo) as medicion:
+        df_resumen = calcular_resumen_desde_agregados(
+            almacen.agregados['dia'], almacen.empleados,
+            fecha_inicio, fecha_fin, almacen.indice_empleados, almacen.sueldos
+        )
+        medicion['filas'] = len(df_resumen)
+    
+    # Solo el detalle del libro necesita los registros individuales
+    excel = None
+    filas = 0
+    if not df_resumen.empty:
+        with medir_etapa('reporte_excel', periodo) as medicion:
+            registros_filtrados = filtrar_registros_periodo(almacen.registros, fecha_inicio, fecha_fin)
+            filas = medicion['filas'] = len(registros_filtrados)
+            excel = excel_reporte_nomina(df_resumen, registros_filtrados)
+    
+    return {
+        'resumen': df_resumen,
+        'excel': excel,
+        'filas': filas,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin
+    }
@@ -0,0 +1,152 @@
+# Cierre de nómina por línea de comandos (sin navegador, apto para cron)
+#
+# Ejemplos:
+#   python nomina_cli.py asistencia/ --inicio 2024-01-01 --fin 2024-01-07
+#   python nomina_cli.py semana.zip checador.xlsx --mapeo Nombre=Empleado --salida cierre.xlsx
+#   python nomina_cli.py --recibos recibos.zip
+#
+# Sin --inicio/--fin se genera la última semana completa (lunes a domingo).
+import argparse
+import datetime
+import hashlib
+import os
+import sys
+import time
+import uuid
+
+import nomina
+from ingesta import (
+    CAMPOS_MAPEO, abrir_en_memoria, expandir_archivos, archivos_de_carpeta,
+    columnas_archivo, clave_formato, nombres_unicos
+)
+
+# Leer los archivos indicados en la línea de comandos
+def leer_archivos(rutas):
+    """Convierte rutas (archivos, .zip o carpetas) en una lista de (nombre, contenido)"""
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(archivos_de_carpeta(ruta))
+            continue
+        with open(ruta, 'rb') as f:
+            archivos.extend(expandir_archivos([abrir_en_memoria(os.path.basename(ruta), f.read())]))
+    # Carpetas distintas pueden tener archivos con el mismo nombre
+    return nombres_unicos(archivos)
+
+def resolver_mapeos(archivos, mapeo_manual, mapeos_guardados):
+    """Mapeo de columnas por archivo: --mapeo, luego el guardado por formato, luego el nombre del campo"""
+    mapeos = {}
+    for nombre_archivo, contenido in archivos:
+        columnas = columnas_archivo(nombre_archivo, contenido)
+        guardado = mapeos_guardados.get(clave_formato(columnas), {})
+        mapeo = {campo: mapeo_manual.get(campo, guardado.get(campo, campo)) for campo in CAMPOS_MAPEO}
+
+        faltantes = [col for col in mapeo.values() if col not in columnas]
+        if faltantes:
+            raise ValueError(f"{nombre_archivo}: no se encontraron las columnas {faltantes}")
+        mapeos[nombre_archivo] = mapeo
+    return mapeos
+
+def semana_anterior(hoy=None):
+    """Lunes y domingo de la última semana completa"""
+    hoy = hoy or datetime.date.today()
+    lunes = hoy - datetime.timedelta(days=hoy.weekday() + 7)
+    return lunes, lunes + datetime.timedelta(days=6)
+
+def leer_argumentos(argv=None):
+    """Opciones de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Carga archivos de asistencia y genera el reporte de nómina del período"
+    )
+    parser.add_argument('archivos', nargs='*',
+                        help="archivos de asistencia (.xlsx, .xls, .csv), .zip o carpetas")
+    parser.add_argument('--inicio', type=datetime.date.fromisoformat,
+                        help="fecha inicial AAAA-MM-DD (por defecto, lunes de la semana pasada)")
+    parser.add_argument('--fin', type=datetime.date.fromisoformat,
+                        help="fecha final AAAA-MM-DD (por defecto, domingo de la semana pasada)")
+    parser.add_argument('--salida', help="ruta del libro de Excel del reporte")
+    parser.add_argument('--mapeo', action='append', default=[], metavar='CAMPO=COLUMNA',
+                        help=f"columna del archivo para cada campo ({', '.join(CAMPOS_MAPEO)})")
+    parser.add_argument('--almacenamiento', choices=['csv', 'sqlite'],
+                        default=nomina.ALMACENAMIENTO)
+    parser.add_argument('--recibos', metavar='RUTA',
+                        help="recibo por trabajador: archivo .zip o carpeta de destino")
+    parser.add_argument('--procesos', type=int,
+                        help="procesos para leer los archivos y generar los recibos")
+    args = parser.parse_args(argv)
+
+    # --mapeo CAMPO=COLUMNA: se valida cada par antes de leer los archivos
+    args.mapeo_manual = {}
+    for par in args.mapeo:
+        campo, separador, columna = par.partition('=')
+        if not separador or not columna:
+            parser.error(f"--mapeo debe tener la forma CAMPO=COLUMNA: {par!r}")
+        if campo not in CAMPOS_MAPEO:
+            parser.error(f"--mapeo: campo desconocido {campo!r} (use {', '.join(CAMPOS_MAPEO)})")
+        args.mapeo_manual[campo] = columna
+    return args
+
+def main(argv=None):
+    """Ingesta de archivos y reporte de nómina; devuelve el código de salida"""
+    args = leer_argumentos(argv)
+    nomina.ALMACENAMIENTO = args.almacenamiento
+
+    fecha_inicio, fecha_fin = semana_anterior()
+    fecha_inicio = args.inicio or fecha_inicio
+    fecha_fin = args.fin or fecha_fin
+
+    inicio = time.time()
+    almacen = nomina.AlmacenDatos()
+    nomina.cargar_en_almacen(almacen)
+
+    # Ingesta (los archivos ya procesados se omiten por su huella)
+    archivos = [
+        (nombre_archivo, contenido)
+        for nombre_archivo, contenido in leer_archivos(args.archivos)
+        if hashlib.sha256(contenido).hexdigest() not in almacen.archivos_procesados
+    ]
+    if archivos:
+        try:
+            mapeos = resolver_mapeos(archivos, args.mapeo_manual, nomina.cargar_mapeos_columnas())
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+
+        resultado = nomina.ingestar_lote(
+            almacen, uuid.uuid4().hex[:8], archivos, mapeos, max_procesos=args.procesos
+        )
+        print(f"{len(archivos)} archivos: {resultado['nuevos']} registros nuevos, "
+              f"{resultado['omitidos']} duplicados omitidos")
+        por_revisar = resultado['por_revisar']
+        if por_revisar is not None and not por_revisar.empty:
+            print(f"Nombres sin trabajador asignado ({len(por_revisar)}):", file=sys.stderr)
+            print(por_revisar.to_string(index=False), file=sys.stderr)
+    elif args.archivos:
+        print("Todos los archivos ya habían sido procesados")
+
+    # Reporte del período
+    reporte = nomina.generar_reporte_nomina(almacen, fecha_inicio, fecha_fin)
+    if reporte['excel'] is None:
+        print(f"No hay registros entre {fecha_inicio} y {fecha_fin}", file=sys.stderr)
+        return 1
+
+    salida = args.salida or f"reporte_nomina_{fecha_inicio}_{fecha_fin}.xlsx"
+    with open(salida, 'wb') as f:
+        f.write(reporte['excel'])
+
+    resumen = reporte['resumen']
+    print(f"Reporte {fecha_inicio} al {fecha_fin}: {len(resumen)} trabajadores, "
+          f"${resumen['Total a Pagar'].sum():,.2f} a pagar -> {salida}")
+
+    # Recibos individuales (se escriben conforme se generan)
+    if args.recibos:
+        from recibos import recibos_en_carpeta, recibos_en_zip
+        registros_periodo = nomina.filtrar_registros_periodo(almacen.registros, fecha_inicio, fecha_fin)
+        destino = recibos_en_zip if args.recibos.lower().endswith('.zip') else recibos_en_carpeta
+        n_recibos = destino(resumen, registros_periodo, args.recibos, max_procesos=args.procesos)
+        print(f"{n_recibos} recibos -> {args.recibos}")
+    print(f"Tiempo: {time.time() - inicio:.1f} s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# Recibos de nómina individuales (un libro de Excel por trabajador)
+#
+# Los recibos se generan por bloques en un pool de procesos y se escriben conforme
+# terminan (a un .zip o a una carpeta), así que en memoria solo hay unos cuantos
+# bloques a la vez sin importar el número de trabajadores.
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from ingesta import normalizar_nombres, pool_procesos
+from nomina import FORMATO_MONEDA_EXCEL
+from reglas_lft import CONCEPTOS_LFT
+
+RECIBOS_POR_TAREA = 100   # recibos que genera cada tarea del pool
+TAREAS_POR_PROCESO = 2    # tareas en vuelo por proceso (limita la memoria)
+COLUMNAS_HORAS_RECIBO = ['Días Trabajados', 'Horas Totales', 'Horas Dobles', 'Horas Triples']
+
+def nombres_archivos_recibos(trabajadores):
+    """Nombre de archivo de cada recibo: número consecutivo y nombre sin acentos ni espacios"""
+    claves = normalizar_nombres(trabajadores).str.replace(' ', '_')
+    return [f"recibo_{i:05d}_{clave}.xlsx" for i, clave in enumerate(claves, start=1)]
+
+def celda_moneda(hoja, valor):
+    """Celda con formato de moneda para hojas en modo solo escritura"""
+    celda = WriteOnlyCell(hoja, value=None if pd.isna(valor) else float(valor))
+    celda.number_format = FORMATO_MONEDA_EXCEL
+    return celda
+
+def generar_recibo(fila, detalle):
+    """Libro de Excel del recibo de un trabajador: percepciones, horas y registros del período"""
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Recibo')
+
+    hoja.append(['Recibo de Nómina'])
+    hoja.append(['Trabajador', fila['Trabajador']])
+    hoja.append(['Período', fila['Período']])
+    hoja.append([])
+
+    hoja.append(['Concepto', 'Importe'])
+    for concepto in CONCEPTOS_LFT:
+        hoja.append([concepto, celda_moneda(hoja, fila[concepto])])
+    hoja.append(['Total a Pagar', celda_moneda(hoja, fila['Total a Pagar'])])
+    hoja.append([])
+
+    for columna in COLUMNAS_HORAS_RECIBO:
+        hoja.append([columna, fila[columna]])
+    hoja.append(['Sueldo por Hora', celda_moneda(hoja, fila['Sueldo por Hora'])])
+    hoja.append([])
+
+    hoja.append(['Fecha', 'Entrada', 'Salida', 'Horas'])
+    for registro in detalle.itertuples(index=False, name=None):
+        hoja.append(list(registro))
+
+    salida = BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+def generar_bloque_recibos(filas, nombres, detalle):
+    """Genera los recibos de un bloque de trabajadores (se ejecuta en un proceso del pool)"""
+    # Texto de fechas y horas de todo el bloque en una sola conversión
+    detalle = pd.DataFrame({
+        'Nombre': detalle['Nombre'].astype(object).to_numpy(),
+        'Fecha': detalle['Fecha'].dt.strftime('%Y-%m-%d').to_numpy(),
+        'Entrada': detalle['Hora_Entrada'].dt.strftime('%H:%M').to_numpy(),
+        'Salida': detalle['Hora_Salida'].dt.strftime('%H:%M').to_numpy(),
+        'Horas': detalle['Total_Horas_Decimal'].astype(float).to_numpy()
+    })
+    por_trabajador = dict(tuple(detalle.groupby('Nombre', sort=False)))
+    vacio = detalle.iloc[:0]
+
+    return [
+        (nombre, generar_recibo(fila, por_trabajador.get(fila['Trabajador'], vacio).iloc[:, 1:]))
+        for fila, nombre in zip(filas, nombres)
+    ]
+
+def tareas_recibos(df_resumen, registros_periodo, tamano=RECIBOS_POR_TAREA):
+    """Divide el resumen en bloques con solo los registros de sus trabajadores"""
+    filas = df_resumen.to_dict('records')
+    nombres = nombres_archivos_recibos(df_resumen['Trabajador'])
+    trabajadores = registros_periodo['Nombre'].astype(object)
+    columnas = ['Nombre', 'Fecha', 'Hora_Entrada', 'Hora_Salida', 'Total_Horas_Decimal']
+
+    for inicio in range(0, len(filas), tamano):
+        bloque = filas[inicio:inicio + tamano]
+        en_bloque = trabajadores.isin([fila['Trabajador'] for fila in bloque]).to_numpy()
+        yield bloque, nombres[inicio:inicio + tamano], registros_periodo.loc[en_bloque, columnas]
+
+def generar_recibos(df_resumen, registros_periodo, escribir, max_procesos=None, al_terminar=None):
+    """Genera un recibo por trabajador y llama escribir(nombre, contenido) conforme terminan"""
+    tareas = tareas_recibos(df_resumen, registros_periodo)
+    max_procesos = max_procesos or os.cpu_count() or 1
+
+    # Pocos recibos o un solo proceso: no vale la pena levantar el pool
+    if max_procesos == 1 or len(df_resumen) <= RECIBOS_POR_TAREA:
+        for tarea in tareas:
+            for nombre, contenido in generar_bloque_recibos(*tarea):
+                escribir(nombre, contenido)
+            if al_terminar:
+                al_terminar(len(tarea[0]))
+        return len(df_resumen)
+
+    with pool_procesos(max_procesos) as pool:
+        pendientes = set()
+        for tarea in tareas:
+            pendientes.add(pool.submit(generar_bloque_recibos, *tarea))
+            # Ventana acotada de tareas en vuelo: se escriben antes de enviar más
+            if len(pendientes) >= max_procesos * TAREAS_POR_PROCESO:
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                escribir_terminados(terminados, escribir, al_terminar)
+        escribir_terminados(pendientes, escribir, al_terminar)
+    return len(df_resumen)
+
+def escribir_terminados(futuros, escribir, al_terminar=None):
+    """Escribe los recibos de las tareas terminadas"""
+    for futuro in futuros:
+        recibos = futuro.result()
+        for nombre, contenido in recibos:
+            escribir(nombre, contenido)
+        if al_terminar:
+            al_terminar(len(recibos))
+
+def recibos_en_zip(df_resumen, registros_periodo, salida, max_procesos=None, al_terminar=None):
+    """Escribe todos los recibos en un .zip (ruta o archivo abierto); devuelve cuántos son"""
+    # Los .xlsx ya vienen comprimidos: se guardan sin volver a comprimir
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_STORED) as archivo_zip:
+        return generar_recibos(
+            df_resumen, registros_periodo, archivo_zip.writestr, max_procesos, al_terminar
+        )
+
+def recibos_en_carpeta(df_resumen, registros_periodo, carpeta, max_procesos=None, al_terminar=None):
+    """Escribe cada recibo como archivo en una carpeta; devuelve cuántos son"""
+    os.makedirs(carpeta, exist_ok=True)
+
+    def escribir(nombre, contenido):
+        with open(os.path.join(carpeta, nombre), 'wb') as f:
+            f.write(contenido)
+
+    return generar_recibos(df_resumen, registros_periodo, escribir, max_procesos, al_terminar)
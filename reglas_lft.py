@@ -0,0 +1,177 @@
+# Reglas de la Ley Federal del Trabajo (LFT) para el cierre semanal de nómina
+#
+# Cada regla es un concepto de pago calculado con operaciones sobre arreglos a partir
+# de las bases de todos los trabajadores (una fila por trabajador y día, con los límites
+# aplicados a la semana completa), así que la planta completa se evalúa de una sola vez.
+# Un período que parte una semana (quincena, mes) paga solo sus días, y la suma de los
+# reportes consecutivos es igual a la de la semana completa.
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Limitación: se aplica la jornada diurna a todos; la nocturna (42 h) y la mixta (45 h)
+# del art. 61 no se distinguen, así que los turnos nocturnos generan menos horas extra
+JORNADA_SEMANAL = 48       # horas ordinarias por semana (jornada diurna, art. 61)
+HORAS_JORNADA = 8          # horas de un día de salario
+MAX_HORAS_DOBLES = 9       # horas extra por semana que se pagan al doble (art. 67)
+FACTOR_HORAS_DOBLES = 2
+FACTOR_HORAS_TRIPLES = 3   # horas extra después de las nueve semanales (art. 68)
+DIAS_LABORALES = 6         # días trabajados que generan el séptimo día completo (arts. 69 y 72)
+PRIMA_DOMINICAL = 0.25     # sobre el salario del domingo trabajado (art. 71)
+FACTOR_FESTIVO = 2         # salario doble adicional por descanso obligatorio trabajado (art. 75)
+
+def enesimo_lunes(anio, mes, n):
+    """Fecha del n-ésimo lunes del mes"""
+    primero = datetime.date(anio, mes, 1)
+    return primero + datetime.timedelta(days=(7 - primero.weekday()) % 7 + 7 * (n - 1))
+
+def dias_festivos(anios):
+    """Días de descanso obligatorio (art. 74) de los años indicados"""
+    fechas = []
+    for anio in anios:
+        fechas += [
+            datetime.date(anio, 1, 1),
+            enesimo_lunes(anio, 2, 1),    # Constitución
+            enesimo_lunes(anio, 3, 3),    # Natalicio de Benito Juárez
+            datetime.date(anio, 5, 1),
+            datetime.date(anio, 9, 16),
+            enesimo_lunes(anio, 11, 3),   # Revolución
+            datetime.date(anio, 12, 25)
+        ]
+        # Transmisión del Poder Ejecutivo Federal (cada seis años)
+        if (anio - 2024) % 6 == 0:
+            fechas.append(datetime.date(anio, 10, 1) if anio >= 2024 else datetime.date(anio, 12, 1))
+    return pd.DatetimeIndex(fechas)
+
+def agregar_festivos(diario, trabajadores, fecha_inicio, fecha_fin):
+    """Agrega una fila sin horas por cada trabajador y día festivo del rango que no tenga registro
+    (el descanso obligatorio no trabajado también se paga con el salario del día, art. 74)"""
+    fecha_inicio, fecha_fin = pd.Timestamp(fecha_inicio), pd.Timestamp(fecha_fin)
+    festivos = dias_festivos(range(fecha_inicio.year, fecha_fin.year + 1))
+    festivos = festivos[(festivos >= fecha_inicio) & (festivos <= fecha_fin)]
+    if len(festivos) == 0 or len(trabajadores) == 0:
+        return diario
+
+    faltantes = pd.MultiIndex.from_product(
+        [pd.unique(np.asarray(trabajadores, dtype=object)), festivos], names=['Nombre', 'Fecha']
+    )
+    faltantes = faltantes[~faltantes.isin(diario.index)]
+    return pd.concat([
+        diario,
+        pd.DataFrame({'Horas': 0.0, 'Registros': 0}, index=faltantes)
+    ])
+
+def semanas_completas(fecha_inicio, fecha_fin):
+    """Lunes de la primera semana y domingo de la última que tocan el período"""
+    fecha_inicio, fecha_fin = pd.Timestamp(fecha_inicio), pd.Timestamp(fecha_fin)
+    return (
+        fecha_inicio - pd.Timedelta(days=fecha_inicio.dayofweek),
+        fecha_fin + pd.Timedelta(days=6 - fecha_fin.dayofweek)
+    )
+
+def bases_por_dia(diario):
+    """Bases de cada trabajador y día con los límites semanales (lunes a domingo) ya repartidos"""
+    datos = diario.reset_index().sort_values(['Nombre', 'Fecha'], kind='stable', ignore_index=True)
+    fechas = pd.DatetimeIndex(datos['Fecha'])
+    horas = datos['Horas'].to_numpy(dtype=float)
+    pago = datos['Pago'].fillna(0).to_numpy(dtype=float)
+
+    # Salario de cada día a la tarifa vigente ese día (un festivo no trabajado no tiene horas:
+    # su tarifa viene en la columna Sueldo_Hora, ver agregar_festivos)
+    if 'Sueldo_Hora' in datos.columns:
+        tarifa = datos['Sueldo_Hora'].fillna(0).to_numpy(dtype=float)
+    else:
+        tarifa = np.divide(pago, horas, out=np.zeros(len(horas)), where=horas > 0)
+    salario_dia = tarifa * HORAS_JORNADA
+
+    domingo = fechas.dayofweek == 6
+    anios = range(fechas.year.min(), fechas.year.max() + 1) if len(fechas) else []
+    festivo = fechas.isin(dias_festivos(anios))
+
+    semana = pd.Series(
+        (fechas - pd.to_timedelta(fechas.dayofweek, unit='D')).to_numpy(), name='Semana'
+    )
+    trabajado = horas > 0
+    # El festivo no trabajado cuenta para el séptimo día; si cae en domingo ya es el descanso
+    descanso_festivo = festivo & ~trabajado & ~domingo
+    cuenta = trabajado | descanso_festivo
+    acumulados = pd.DataFrame({'Horas': horas, 'Pago': pago, 'Dias': cuenta.astype('int64')})
+    grupos = acumulados.groupby([datos['Nombre'], semana], sort=False, observed=True)
+
+    # Horas extra: las últimas horas de la semana en orden cronológico, así que cada día
+    # recibe la parte de las dobles y triples que cae en sus propias horas
+    hasta_el_dia = grupos['Horas'].cumsum().to_numpy()
+    antes_del_dia = hasta_el_dia - horas
+
+    def extra_hasta(acumuladas, desde, tope=np.inf):
+        return np.clip(acumuladas - desde, 0, tope)
+
+    dobles = (
+        extra_hasta(hasta_el_dia, JORNADA_SEMANAL, MAX_HORAS_DOBLES)
+        - extra_hasta(antes_del_dia, JORNADA_SEMANAL, MAX_HORAS_DOBLES)
+    )
+    triples = (
+        extra_hasta(hasta_el_dia, JORNADA_SEMANAL + MAX_HORAS_DOBLES)
+        - extra_hasta(antes_del_dia, JORNADA_SEMANAL + MAX_HORAS_DOBLES)
+    )
+
+    # Tarifa promedio de la semana (ponderada si hubo un aumento); sin horas, la del día
+    horas_semana = grupos['Horas'].transform('sum').to_numpy()
+    tarifa_semana = np.divide(
+        grupos['Pago'].transform('sum').to_numpy(), horas_semana,
+        out=tarifa.copy(), where=horas_semana > 0
+    )
+
+    return pd.DataFrame({
+        'Registros': datos['Registros'].to_numpy(),
+        'Horas': horas,
+        'Pago': pago,
+        'Tarifa': tarifa_semana,
+        'Horas_Dobles': dobles,
+        'Horas_Triples': triples,
+        # Cada uno de los primeros seis días trabajados aporta un sexto del séptimo día
+        'Dias': (cuenta & (grupos['Dias'].cumsum().to_numpy() <= DIAS_LABORALES)).astype('int64'),
+        'Salario_Domingos': np.where(domingo & trabajado, salario_dia, 0.0),
+        'Salario_Festivos': np.where(festivo & trabajado, salario_dia, 0.0),
+        'Salario_Descanso_Festivo': np.where(descanso_festivo, salario_dia, 0.0)
+    }, index=pd.MultiIndex.from_arrays([datos['Nombre'], fechas], names=['Nombre', 'Fecha']))
+
+# Conceptos de pago: (nombre, función vectorizada sobre las bases por día)
+REGLAS_LFT = [
+    ('Sueldo Base', lambda b: b['Pago'] - (b['Horas_Dobles'] + b['Horas_Triples']) * b['Tarifa']),
+    ('Horas Extra Dobles', lambda b: b['Horas_Dobles'] * b['Tarifa'] * FACTOR_HORAS_DOBLES),
+    ('Horas Extra Triples', lambda b: b['Horas_Triples'] * b['Tarifa'] * FACTOR_HORAS_TRIPLES),
+    ('Séptimo Día', lambda b: b['Tarifa'] * HORAS_JORNADA * b['Dias'] / DIAS_LABORALES),
+    ('Prima Dominical', lambda b: b['Salario_Domingos'] * PRIMA_DOMINICAL),
+    ('Día Festivo', lambda b: b['Salario_Festivos'] * FACTOR_FESTIVO + b['Salario_Descanso_Festivo'])
+]
+CONCEPTOS_LFT = [concepto for concepto, _ in REGLAS_LFT]
+
+def evaluar_reglas(bases, reglas=REGLAS_LFT):
+    """Importe de cada concepto por trabajador y día, más el total"""
+    conceptos = pd.DataFrame(
+        {concepto: regla(bases) for concepto, regla in reglas}, index=bases.index
+    )
+    conceptos['Total a Pagar'] = conceptos.sum(axis=1)
+    return conceptos
+
+def nomina_por_trabajador(diario, fecha_inicio=None, fecha_fin=None, reglas=REGLAS_LFT):
+    """Bases y conceptos de los días del período acumulados por trabajador (índice Nombre)
+
+    diario debe cubrir las semanas completas del período (ver semanas_completas) para que
+    las horas extra y el séptimo día tomen en cuenta los días de la semana fuera de él.
+    """
+    bases = bases_por_dia(diario)
+    resultado = pd.concat([
+        bases[['Registros', 'Horas', 'Pago', 'Horas_Dobles', 'Horas_Triples']],
+        evaluar_reglas(bases, reglas)
+    ], axis=1)
+
+    fechas = resultado.index.get_level_values('Fecha')
+    dentro = np.ones(len(resultado), dtype=bool)
+    if fecha_inicio is not None:
+        dentro &= fechas >= pd.Timestamp(fecha_inicio)
+    if fecha_fin is not None:
+        dentro &= fechas <= pd.Timestamp(fecha_fin)
+    return resultado[dentro].groupby(level='Nombre', sort=False, observed=True).sum()
@@ -0,0 +1,43 @@
+# Agregados diarios ordenados por fecha: actualización incremental y corte por período
+import numpy as np
+import pandas as pd
+
+import nomina
+
+def registros_aleatorios(n, semilla, desde='2024-01-01', dias=90):
+    """Registros con fechas y trabajadores al azar"""
+    rng = np.random.default_rng(semilla)
+    fechas = pd.Timestamp(desde) + pd.to_timedelta(rng.integers(0, dias, n), unit='D')
+    return pd.DataFrame({
+        'Nombre': rng.choice(['Ana Ruiz', 'Luis Gómez', 'Eva Soto', 'Raúl Pérez'], n),
+        'Fecha': fechas,
+        'Total_Horas_Decimal': rng.uniform(4, 10, n).round(2)
+    })
+
+def comparar(obtenido, esperado):
+    """Mismas filas y valores sin importar el orden"""
+    pd.testing.assert_frame_equal(obtenido.sort_index(), esperado.sort_index(), check_exact=False)
+
+def test_actualizacion_igual_a_reconstruir():
+    historial = registros_aleatorios(500, 1)
+    # Lotes que caen dentro del historial, al final y en meses nuevos
+    lotes = [registros_aleatorios(40, 2, '2024-02-15', 10),
+             registros_aleatorios(40, 3, '2024-03-25', 20),
+             registros_aleatorios(40, 4, '2024-05-01', 5)]
+    
+    agregados = nomina.construir_agregados(historial)
+    for lote in lotes:
+        agregados = nomina.actualizar_agregados(agregados, lote)
+    esperado = nomina.construir_agregados(pd.concat([historial] + lotes))
+    
+    for nivel in ['dia', 'semana', 'mes']:
+        comparar(agregados[nivel], esperado[nivel])
+        fechas = agregados[nivel].index.get_level_values(1)
+        assert fechas.is_monotonic_increasing
+
+def test_corte_por_periodo():
+    diario = nomina.construir_agregados(registros_aleatorios(500, 5))['dia']
+    fechas = diario.index.get_level_values('Fecha')
+    mascara = (fechas >= '2024-01-10') & (fechas <= '2024-02-03')
+    comparar(nomina.agregado_en_periodo(diario, '2024-01-10', '2024-02-03'), diario[mascara])
+    assert nomina.agregado_en_periodo(diario, '2025-01-01', '2025-01-31').empty
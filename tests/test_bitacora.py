@@ -0,0 +1,59 @@
+# Compactación de la bitácora: un cierre inesperado no duplica registros ni altas
+import pandas as pd
+import pytest
+
+import nomina
+
+def preparar(directorio, monkeypatch):
+    """Archivos base con un trabajador y una bitácora con un alta y un lote de dos registros"""
+    monkeypatch.chdir(directorio)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', 'csv')
+    empleados = pd.DataFrame({
+        'ID': [1], 'Nombre': ['Ana Ruiz'], 'Sueldo_Semanal': [2100.0], 'Sueldo_Diario': [300.0],
+        'Sueldo_Hora': [37.5], 'Fecha_Alta': ['2024-01-01'], 'Activo': [True]
+    })
+    nomina.guardar_datos(empleados, pd.DataFrame(columns=nomina.COLUMNAS_REGISTROS))
+    
+    alta = dict(empleados.iloc[0], ID=2, Nombre='Luis Gómez')
+    nomina.registrar_cambio('alta_empleado', None, None, fila=alta)
+    registros = pd.DataFrame({
+        'ID_Trabajador': [1, 2], 'Nombre': ['Ana Ruiz', 'Luis Gómez'],
+        'Fecha': ['2024-01-02', '2024-01-02'],
+        'Hora_Entrada': ['2024-01-02 08:00:00', '2024-01-02 09:00:00'],
+        'Hora_Salida': ['2024-01-02 16:00:00', '2024-01-02 17:00:00'],
+        'Horas_Trabajadas': [8, 8], 'Minutos_Trabajados': [0, 0], 'Total_Horas_Decimal': [8.0, 8.0]
+    })
+    nomina.registrar_lote_registros([registros], 'lote1')
+    return nomina.cargar_datos()
+
+def verificar(empleados, registros):
+    """Cantidad de empleados y registros al volver a cargar (sin repeticiones)"""
+    empleados_df, registros_df = nomina.cargar_datos()
+    assert len(empleados_df) == empleados
+    assert len(registros_df) == registros
+
+def test_compactacion_completa(tmp_path, monkeypatch):
+    esperado = preparar(tmp_path, monkeypatch)
+    nomina.guardar_datos(*esperado)
+    assert not (tmp_path / nomina.BITACORA_CAMBIOS).exists()
+    assert not (tmp_path / nomina.BITACORA_COMPACTANDO).exists()
+    verificar(2, 2)
+
+@pytest.mark.parametrize('archivos_escritos', [0, 1, 2])
+def test_compactacion_interrumpida(tmp_path, monkeypatch, archivos_escritos):
+    """El proceso muere tras apartar la bitácora y reescribir 0, 1 o 2 archivos base"""
+    esperado = preparar(tmp_path, monkeypatch)
+    nomina.apartar_bitacora()
+    for df, ruta in list(zip(esperado, [nomina.EMPLEADOS_CSV, nomina.REGISTROS_CSV]))[:archivos_escritos]:
+        nomina.escribir_csv_atomico(df, ruta)
+    verificar(2, 2)
+    
+    # Los cambios posteriores se siguen aplicando y la siguiente compactación limpia todo
+    nuevo = esperado[1].head(1).assign(
+        Fecha=pd.Timestamp('2024-01-03'), Hora_Entrada=pd.Timestamp('2024-01-03 08:00')
+    )
+    nomina.registrar_lote_registros([nuevo], 'lote2')
+    verificar(2, 3)
+    nomina.guardar_datos(*nomina.cargar_datos())
+    assert not (tmp_path / nomina.BITACORA_COMPACTANDO).exists()
+    verificar(2, 3)
@@ -0,0 +1,45 @@
+# Emparejamiento de checadas crudas en turnos
+import pandas as pd
+
+from ingesta import emparejar_checadas, procesar_checadas
+
+def test_turno_diurno_con_comida():
+    """Cuatro checadas con una comida corta forman un solo turno"""
+    turnos, sueltas = emparejar_checadas(
+        pd.Series(['Ana'] * 4),
+        pd.Series(['2024-01-02 08:00', '2024-01-02 12:00', '2024-01-02 12:30', '2024-01-02 16:30'])
+    )
+    assert len(turnos) == 1 and sueltas.empty
+    assert turnos.loc[0, 'Segundos'] == 8 * 3600
+    assert turnos.loc[0, 'Checadas'] == 4
+
+def test_turno_nocturno():
+    """La salida del día siguiente cierra el turno que empezó la noche anterior"""
+    turnos, sueltas = emparejar_checadas(
+        pd.Series(['Ana', 'Ana']), pd.Series(['2024-01-02 22:00', '2024-01-03 06:00'])
+    )
+    assert sueltas.empty
+    assert turnos.loc[0, 'Fecha'] == pd.Timestamp('2024-01-02')
+    assert turnos.loc[0, 'Segundos'] == 8 * 3600
+
+def test_sin_pares_todo_queda_suelto():
+    """Una sola checada por trabajador no forma turnos y se devuelve para revisarla"""
+    turnos, sueltas = emparejar_checadas(
+        pd.Series(['A', 'B']), pd.Series(['2024-01-01 07:00', '2024-01-01 08:00'])
+    )
+    assert turnos.empty
+    assert list(turnos.columns) == ['Nombre', 'Fecha', 'Entrada', 'Salida', 'Segundos', 'Checadas']
+    assert sorted(sueltas['Nombre']) == ['A', 'B']
+
+def test_bloque_vacio():
+    """Un archivo sin checadas no falla"""
+    turnos, sueltas = emparejar_checadas(pd.Series([], dtype=object), pd.Series([], dtype=object))
+    assert turnos.empty and sueltas.empty
+
+def test_procesar_checadas_sin_pares():
+    """Sin turnos se devuelven cero registros y las checadas sueltas"""
+    empleados = pd.DataFrame({'ID': [1], 'Nombre': ['A']})
+    checadas = pd.DataFrame({'Nombre': ['A'], 'Momento': ['2024-01-01 07:00']})
+    registros, sueltas = procesar_checadas(checadas, 'Nombre', 'Momento', None, empleados)
+    assert registros.empty
+    assert len(sueltas) == 1
@@ -0,0 +1,49 @@
+# Deduplicación: un nombre confirmado después sigue reconociendo el archivo original
+import pandas as pd
+import pytest
+
+import nomina
+from ingesta import CAMPOS_MAPEO
+
+MAPEO = {campo: campo for campo in CAMPOS_MAPEO}
+ARCHIVO = ('checador.csv', "Nombre,Fecha,Entrada,Salida\n"
+                           "Ana Ruiz,2024-01-02,08:00,16:00\n"
+                           "LUIS GOMEZ Z,2024-01-03,08:00,16:00\n".encode())
+# Exportación posterior del checador: repite los días anteriores y agrega uno nuevo
+ARCHIVO_SIGUIENTE = ('checador.csv', ARCHIVO[1] + b"LUIS GOMEZ Z,2024-01-04,08:00,16:00\n")
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def almacen(request, tmp_path, monkeypatch):
+    """Almacén con dos trabajadores en un directorio temporal"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', request.param)
+    monkeypatch.setattr(nomina, 'BASE_DATOS_SQLITE', str(tmp_path / 'nomina.db'))
+    empleados = pd.DataFrame({
+        'ID': [1, 2], 'Nombre': ['Ana Ruiz', 'Luis Gómez'], 'Sueldo_Semanal': [2100.0, 2800.0],
+        'Sueldo_Diario': [300.0, 400.0], 'Sueldo_Hora': [37.5, 50.0],
+        'Fecha_Alta': ['2024-01-01', '2024-01-01'], 'Activo': [True, True]
+    })
+    nomina.guardar_datos(empleados, pd.DataFrame(columns=nomina.COLUMNAS_REGISTROS))
+    almacen = nomina.AlmacenDatos()
+    nomina.cargar_en_almacen(almacen)
+    return almacen
+
+def ingestar(almacen, archivo, lote):
+    """Carga un archivo en un lote (un solo proceso)"""
+    return nomina.ingestar_lote(almacen, lote, [archivo], {archivo[0]: MAPEO}, max_procesos=1)
+
+def test_archivo_repetido_despues_de_confirmar(almacen):
+    assert ingestar(almacen, ARCHIVO, 'L1')['nuevos'] == 2
+    assert nomina.asignar_trabajador(almacen, 'LUIS GOMEZ Z', 2) == 1
+    
+    # En la misma sesión y después de volver a cargar los datos
+    assert ingestar(almacen, ARCHIVO, 'L2')['nuevos'] == 0
+    nomina.cargar_en_almacen(almacen)
+    resultado = ingestar(almacen, ARCHIVO_SIGUIENTE, 'L3')
+    assert (resultado['nuevos'], resultado['omitidos']) == (1, 2)
+    
+    _, registros_df = nomina.cargar_datos()
+    luis = registros_df[registros_df['Nombre'] == 'Luis Gómez']
+    assert len(luis) == 1
+    assert luis['Nombre_Archivo'].iloc[0] == 'LUIS GOMEZ Z'
+    assert len(registros_df) == 3
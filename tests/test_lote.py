@@ -0,0 +1,95 @@
+# Ingesta por lote: archivos con el mismo nombre (los checadores repiten el nombre al exportar)
+import pandas as pd
+
+import nomina
+from ingesta import CAMPOS_MAPEO, nombres_unicos
+
+MAPEO = {campo: campo for campo in CAMPOS_MAPEO}
+
+def almacen_vacio(directorio, monkeypatch):
+    """Almacén CSV en un directorio temporal con un trabajador"""
+    monkeypatch.chdir(directorio)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', 'csv')
+    empleados = pd.DataFrame({
+        'ID': [1], 'Nombre': ['Ana Ruiz'], 'Sueldo_Semanal': [2100.0], 'Sueldo_Diario': [300.0],
+        'Sueldo_Hora': [37.5], 'Fecha_Alta': ['2024-01-01'], 'Activo': [True]
+    })
+    nomina.guardar_datos(empleados, pd.DataFrame(columns=nomina.COLUMNAS_REGISTROS))
+    almacen = nomina.AlmacenDatos()
+    nomina.cargar_en_almacen(almacen)
+    return almacen
+
+def test_nombres_unicos():
+    """Solo se renombran las repeticiones, conservando la extensión"""
+    archivos = [('asistencia.csv', b'1'), ('asistencia.csv', b'2'), ('otro.csv', b'3'),
+                ('asistencia.csv', b'4')]
+    assert [nombre for nombre, _ in nombres_unicos(archivos)] == [
+        'asistencia.csv', 'asistencia (2).csv', 'otro.csv', 'asistencia (3).csv'
+    ]
+
+def test_lote_con_nombres_repetidos(tmp_path, monkeypatch):
+    """Dos archivos distintos con el mismo nombre se cargan completos y ambos quedan registrados"""
+    almacen = almacen_vacio(tmp_path, monkeypatch)
+    archivos = [
+        ('asistencia.csv', b"Nombre,Fecha,Entrada,Salida\nAna Ruiz,2024-01-02,08:00,16:00\n"),
+        ('asistencia.csv', b"Nombre,Fecha,Entrada,Salida\nAna Ruiz,2024-01-03,08:00,16:00\n")
+    ]
+    resultado = nomina.ingestar_lote(
+        almacen, 'lote1', archivos, {'asistencia.csv': MAPEO}, max_procesos=1
+    )
+    
+    assert resultado['nuevos'] == 2
+    assert resultado['omitidos'] == 0
+    assert len(almacen.archivos_procesados) == 2
+
+def bloque_asistencia(*fechas):
+    """Registros de Ana Ruiz de 8 horas en las fechas dadas"""
+    return nomina.aplicar_esquema_registros(pd.DataFrame({
+        'ID_Trabajador': [1] * len(fechas), 'Nombre': ['Ana Ruiz'] * len(fechas),
+        'Fecha': list(fechas),
+        'Hora_Entrada': [f"{fecha} 08:00:00" for fecha in fechas],
+        'Hora_Salida': [f"{fecha} 16:00:00" for fecha in fechas],
+        'Horas_Trabajadas': [8] * len(fechas), 'Minutos_Trabajados': [0] * len(fechas),
+        'Total_Horas_Decimal': [8.0] * len(fechas)
+    }))
+
+def test_bloques_sin_confirmar_csv(tmp_path, monkeypatch):
+    """Cada bloque va a la bitácora al llegar, sobrevive a una compactación y cuenta solo al confirmar"""
+    almacen = almacen_vacio(tmp_path, monkeypatch)
+    ingesta = nomina.LoteIngesta(almacen, 'lote1')
+    assert ingesta.agregar(bloque_asistencia('2024-01-02', '2024-01-03')) == 2
+    assert len(nomina.cargar_datos()[1]) == 0
+    
+    # Una compactación a media ingesta conserva los bloques del lote abierto
+    nomina.guardar_datos(almacen.empleados, almacen.registros)
+    assert ingesta.agregar(bloque_asistencia('2024-01-03', '2024-01-04')) == 1
+    assert ingesta.bloques and ingesta.omitidos == 1
+    ingesta.confirmar([])
+    
+    assert not ingesta.bloques
+    assert len(almacen.registros) == 3
+    assert nomina.totales_registros(almacen) == (3, 24.0)
+    assert len(nomina.cargar_datos()[1]) == 3
+    assert ingesta.resultado()['vista']['Fecha'].dt.day.tolist() == [2, 3, 4]
+
+def test_bloques_sin_confirmar_sqlite(tmp_path, monkeypatch):
+    """En SQLite los bloques se insertan en una transacción abierta: descartar la deshace"""
+    almacen = almacen_vacio(tmp_path, monkeypatch)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', 'sqlite')
+    monkeypatch.setattr(nomina, 'BASE_DATOS_SQLITE', str(tmp_path / 'nomina.db'))
+    nomina.cargar_en_almacen(almacen)
+    
+    ingesta = nomina.LoteIngesta(almacen, 'lote1')
+    ingesta.agregar(bloque_asistencia('2024-01-02'))
+    assert ingesta.agregar(bloque_asistencia('2024-01-02', '2024-01-03')) == 1
+    assert not ingesta.bloques
+    assert nomina.contar_registros_sqlite()[0] == 0
+    ingesta.descartar()
+    assert nomina.contar_registros_sqlite()[0] == 0
+    
+    # Las claves se liberaron: el mismo archivo se puede volver a cargar
+    ingesta = nomina.LoteIngesta(almacen, 'lote2')
+    assert ingesta.agregar(bloque_asistencia('2024-01-02', '2024-01-03')) == 2
+    ingesta.confirmar([])
+    assert nomina.totales_registros(almacen) == (2, 16.0)
+    assert nomina.lotes_registrados(almacen) == ['lote2']
@@ -0,0 +1,24 @@
+# Resolución de nombres del mostrador contra los empleados registrados
+import pandas as pd
+
+from ingesta import construir_indice_nombres, resolver_nombres
+
+EMPLEADOS = pd.DataFrame(
+    {'Nombre': ['José Hernández López', 'María García', 'Juan Pérez', 'Juan Peres']},
+    index=[10, 11, 12, 13]
+)
+
+def test_estados_de_resolucion():
+    """Exacto y normalizado (también con otro orden de palabras) se asignan; los parecidos solo se proponen"""
+    resultado = resolver_nombres([
+        'José Hernández López', 'JOSE  HERNANDEZ lopez', 'García María',
+        'Jose Hernandes Lopez', 'Juan Perex', 'Pedro Sol', None
+    ], construir_indice_nombres(EMPLEADOS))
+    
+    assert resultado['Estado'].tolist() == [
+        'exacto', 'normalizado', 'normalizado', 'aproximado', 'ambiguo', 'sin coincidencia'
+    ]
+    assert resultado['Fila'].tolist()[:3] == [10, 10, 11]
+    assert resultado['Fila'].iloc[3:].isna().all()
+    assert resultado.loc['Jose Hernandes Lopez', 'Candidatos'] == ['José Hernández López']
+    assert resultado.loc['Juan Perex', 'Candidatos'] == ['Juan Pérez', 'Juan Peres']
@@ -0,0 +1,67 @@
+# Reglas de la LFT: límites semanales con períodos que parten la semana
+import numpy as np
+import pandas as pd
+
+from reglas_lft import CONCEPTOS_LFT, agregar_festivos, nomina_por_trabajador
+
+TARIFA = 50.0
+
+def diario(horas_por_dia, inicio='2024-01-08'):
+    """Agregado diario de un trabajador a partir de un lunes sin festivos"""
+    fechas = pd.date_range(inicio, periods=len(horas_por_dia), freq='D')
+    horas = np.asarray(horas_por_dia, dtype=float)
+    return pd.DataFrame({
+        'Registros': (horas > 0).astype('int64'),
+        'Horas': horas,
+        'Pago': horas * TARIFA
+    }, index=pd.MultiIndex.from_arrays([['Ana'] * len(fechas), fechas], names=['Nombre', 'Fecha']))
+
+def test_semana_completa():
+    """70 h en 7 días: 48 ordinarias, 9 dobles, 13 triples y séptimo día completo"""
+    resultado = nomina_por_trabajador(diario([10] * 7)).loc['Ana']
+    assert resultado['Horas_Dobles'] == 9
+    assert resultado['Horas_Triples'] == 13
+    assert resultado['Sueldo Base'] == 48 * TARIFA
+    assert resultado['Séptimo Día'] == 8 * TARIFA
+    assert resultado['Prima Dominical'] == 10 * TARIFA * 0.25 * 8 / 10
+
+def test_periodo_que_parte_la_semana():
+    """Dos reportes que parten la semana suman lo mismo que la semana completa"""
+    datos = diario([10] * 7)
+    completa = nomina_por_trabajador(datos)
+    primera = nomina_por_trabajador(datos, '2024-01-08', '2024-01-10')
+    segunda = nomina_por_trabajador(datos, '2024-01-11', '2024-01-14')
+    
+    columnas = ['Horas', 'Horas_Dobles', 'Horas_Triples'] + CONCEPTOS_LFT + ['Total a Pagar']
+    assert np.allclose(primera[columnas] + segunda[columnas], completa[columnas])
+    # Las horas extra son las últimas de la semana: caen en el segundo reporte
+    assert primera.loc['Ana', 'Horas_Dobles'] == 0
+    assert segunda.loc['Ana', 'Horas_Dobles'] == 9
+
+def test_septimo_dia_proporcional():
+    """Con tres días trabajados se paga la mitad del séptimo día"""
+    resultado = nomina_por_trabajador(diario([8, 8, 8, 0, 0, 0, 0])).loc['Ana']
+    assert np.isclose(resultado['Séptimo Día'], 8 * TARIFA * 3 / 6)
+
+def test_festivo_no_trabajado():
+    """El lunes 5 de febrero (festivo) sin horas se paga y cuenta para el séptimo día"""
+    semana = diario([0, 8, 8, 8, 8, 8, 0], inicio='2024-02-05')
+    semana = semana[semana['Horas'] > 0]
+    semana = agregar_festivos(semana, ['Ana'], '2024-02-05', '2024-02-11').assign(Sueldo_Hora=TARIFA)
+    semana['Pago'] = semana['Horas'] * TARIFA
+    
+    resultado = nomina_por_trabajador(semana).loc['Ana']
+    assert resultado['Registros'] == 5
+    assert resultado['Sueldo Base'] == 40 * TARIFA
+    assert resultado['Día Festivo'] == 8 * TARIFA
+    assert resultado['Séptimo Día'] == 8 * TARIFA
+
+def test_festivo_trabajado():
+    """El festivo trabajado conserva el salario doble adicional y no agrega otra fila"""
+    semana = diario([8, 8, 8, 8, 8, 8, 0], inicio='2024-02-05')
+    semana = agregar_festivos(semana, ['Ana'], '2024-02-05', '2024-02-11').assign(Sueldo_Hora=TARIFA)
+    
+    resultado = nomina_por_trabajador(semana).loc['Ana']
+    assert len(semana) == 7
+    assert resultado['Día Festivo'] == 2 * 8 * TARIFA
+    assert resultado['Séptimo Día'] == 8 * TARIFA
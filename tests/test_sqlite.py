@@ -0,0 +1,125 @@
+# Almacenamiento SQLite: importación de los CSV, cambios puntuales y consultas indexadas
+import pandas as pd
+import pytest
+
+import nomina
+
+EMPLEADOS = pd.DataFrame({
+    'ID': [1, 2], 'Nombre': ['Ana Ruiz', 'Luis Gómez'], 'Sueldo_Semanal': [2100.0, 2800.0],
+    'Sueldo_Diario': [300.0, 400.0], 'Sueldo_Hora': [37.5, 50.0],
+    'Fecha_Alta': ['2024-01-01', '2024-01-01'], 'Activo': [True, True]
+})
+
+def registro(id_trabajador, nombre, fecha, entrada='08:00', horas=8.0):
+    """Un registro de asistencia con salida calculada a partir de las horas"""
+    inicio = pd.Timestamp(f"{fecha} {entrada}")
+    return {
+        'ID_Trabajador': id_trabajador, 'Nombre': nombre, 'Fecha': fecha,
+        'Hora_Entrada': str(inicio), 'Hora_Salida': str(inicio + pd.Timedelta(hours=horas)),
+        'Horas_Trabajadas': int(horas), 'Minutos_Trabajados': 0, 'Total_Horas_Decimal': horas
+    }
+
+REGISTROS = pd.DataFrame([
+    registro(1, 'Ana Ruiz', '2024-01-01'),
+    registro(1, 'Ana Ruiz', '2024-01-02', horas=9.5),
+    registro(2, 'Luis Gómez', '2024-01-02'),
+    registro(None, 'ANA RUIZ Z', '2024-01-03', horas=6.0),
+    registro(2, 'Luis Gómez', '2024-01-09')
+])
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    """Directorio temporal con los CSV de siempre y SQLite como almacenamiento"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', 'csv')
+    nomina.guardar_datos(EMPLEADOS, REGISTROS)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', 'sqlite')
+    monkeypatch.setattr(nomina, 'BASE_DATOS_SQLITE', str(tmp_path / 'nomina.db'))
+    return tmp_path / 'nomina.db'
+
+def test_importa_los_csv_la_primera_vez(base):
+    empleados_df, registros_df = nomina.cargar_datos_sqlite(ruta=str(base))
+    assert empleados_df['Nombre'].tolist() == ['Ana Ruiz', 'Luis Gómez']
+    assert len(registros_df) == len(REGISTROS)
+    # Fecha ISO y horas HH:MM:SS para las consultas por rango
+    assert registros_df['Fecha'].iloc[0] == '2024-01-01'
+    assert registros_df['Hora_Entrada'].iloc[0] == '08:00:00'
+
+def test_importa_los_csv_una_sola_vez(base):
+    """Vaciar las tablas (limpiar registros y sueldos) no vuelve a importar los CSV"""
+    nomina.cargar_datos_sqlite(ruta=str(base))
+    nomina.guardar_datos_sqlite(
+        EMPLEADOS.head(0), pd.DataFrame(columns=nomina.COLUMNAS_REGISTROS), ruta=str(base)
+    )
+    pd.DataFrame({'ID': [1], 'Sueldo_Semanal': [2100.0], 'Sueldo_Diario': [300.0],
+                  'Sueldo_Hora': [37.5], 'Vigente_Desde': ['2024-01-01']}).to_csv(
+        nomina.HISTORIAL_SUELDOS_CSV, index=False
+    )
+    
+    empleados_df, registros_df = nomina.cargar_datos_sqlite(ruta=str(base))
+    assert empleados_df.empty and registros_df.empty
+    assert nomina.cargar_historial_sueldos().empty
+
+def test_consultas_por_periodo_y_trabajador(base):
+    nomina.cargar_datos_sqlite(ruta=str(base))
+    semana = nomina.consultar_registros_sqlite('2024-01-01', '2024-01-07', ruta=str(base))
+    assert len(semana) == 4
+    assert semana['Fecha'].is_monotonic_increasing
+    
+    ana = nomina.consultar_registros_sqlite('2024-01-01', '2024-01-07', id_trabajador=1, ruta=str(base))
+    assert ana['Total_Horas_Decimal'].tolist() == [8.0, 9.5]
+    
+    # Trabajador por ID más los registros sin asignar por su nombre
+    varios = nomina.contar_registros_sqlite(
+        id_trabajador=[1, 2], nombres=['ANA RUIZ Z'], ruta=str(base)
+    )
+    assert varios == (5, 39.5)
+    assert nomina.contar_registros_sqlite(nombres=['Ana Ruiz'], ruta=str(base))[0] == 0
+    
+    pagina = nomina.consultar_registros_sqlite(ruta=str(base), limite=2, desplazamiento=3)
+    assert pagina['Fecha'].tolist() == ['2024-01-03', '2024-01-09']
+    assert nomina.rango_fechas_sqlite(ruta=str(base)) == ('2024-01-01', '2024-01-09')
+
+def test_cambios_puntuales(base):
+    nomina.cargar_datos_sqlite(ruta=str(base))
+    nomina.aplicar_cambio_sqlite('alta_empleado', {'fila': dict(EMPLEADOS.iloc[0], ID=3, Nombre='Eva Soto')},
+                                 ruta=str(base))
+    nomina.aplicar_cambio_sqlite('actualizar_empleado', {'id': 3, 'campos': {'Sueldo_Hora': 40.0}},
+                                 ruta=str(base))
+    nomina.aplicar_cambio_sqlite('agregar_registros', {'filas': [registro(3, 'Eva Soto', '2024-01-04')]},
+                                 ruta=str(base))
+    nomina.aplicar_cambio_sqlite('asignar_trabajador',
+                                 {'nombre': 'ANA RUIZ Z', 'id': 1, 'nombre_registrado': 'Ana Ruiz'},
+                                 ruta=str(base))
+    
+    empleados_df, registros_df = nomina.cargar_datos_sqlite(ruta=str(base))
+    assert empleados_df.set_index('ID').loc[3, 'Sueldo_Hora'] == 40.0
+    assert len(registros_df) == len(REGISTROS) + 1
+    assert registros_df['ID_Trabajador'].notna().all()
+    assert nomina.contar_registros_sqlite(id_trabajador=1, ruta=str(base))[0] == 3
+
+def test_almacen_sin_registros_en_memoria(base):
+    almacen = nomina.AlmacenDatos()
+    nomina.cargar_en_almacen(almacen)
+    assert almacen.registros is None
+    
+    # El agregado diario calculado en la base es el mismo que con los registros en memoria
+    esperado = nomina.construir_agregados(nomina.registros_completos(almacen))
+    for nivel in ['dia', 'semana', 'mes']:
+        pd.testing.assert_frame_equal(almacen.agregados[nivel], esperado[nivel])
+    assert nomina.totales_registros(almacen) == (5, 39.5)
+    
+    # La deduplicación lee de la base las claves de las fechas nuevas
+    nuevos = nomina.aplicar_esquema_registros(pd.DataFrame([
+        registro(1, 'Ana Ruiz', '2024-01-02', horas=9.5), registro(1, 'Ana Ruiz', '2024-01-10')
+    ]))
+    ingesta = nomina.LoteIngesta(almacen, 'lote1')
+    assert ingesta.agregar(nuevos) == 1
+    assert ingesta.omitidos == 1
+    ingesta.confirmar([])
+    assert almacen.registros is None
+    assert nomina.totales_registros(almacen) == (6, 47.5)
+    assert nomina.lotes_registrados(almacen) == ['lote1']
+    
+    assert nomina.asignar_trabajador(almacen, 'ANA RUIZ Z', 1) == 1
+    assert nomina.registros_sin_trabajador(almacen).empty
@@ -0,0 +1,62 @@
+# Historial de sueldos: tarifa vigente por fecha y aumentos con fecha futura
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import nomina
+from ingesta import aplicar_esquema_empleados, aplicar_esquema_sueldos
+
+EMPLEADOS = aplicar_esquema_empleados(pd.DataFrame({
+    'ID': [1, 2], 'Nombre': ['Ana Ruiz', 'Luis Gómez'], 'Sueldo_Semanal': [2800.0, 3500.0],
+    'Sueldo_Diario': [400.0, 500.0], 'Sueldo_Hora': [50.0, 62.5],
+    'Fecha_Alta': ['2024-01-01', '2024-01-01'], 'Activo': [True, True]
+}))
+
+# Ana: 50 por hora desde el alta y 60 desde el jueves 11 de enero
+HISTORIAL = aplicar_esquema_sueldos(pd.DataFrame({
+    'ID': [1, 1], 'Sueldo_Semanal': [2800.0, 3360.0], 'Sueldo_Diario': [400.0, 480.0],
+    'Sueldo_Hora': [50.0, 60.0], 'Vigente_Desde': ['2024-01-08', '2024-01-11']
+}))
+
+def test_aumento_a_mitad_del_periodo():
+    """Cada día de la semana toma la tarifa vigente ese día; sin historial, el sueldo actual"""
+    fechas = pd.date_range('2024-01-08', '2024-01-14')
+    ana = nomina.sueldo_hora_vigente(['Ana Ruiz'] * 7, fechas, EMPLEADOS, HISTORIAL)
+    assert ana.tolist() == [50.0] * 3 + [60.0] * 4
+    luis = nomina.sueldo_hora_vigente(['Luis Gómez'] * 7, fechas, EMPLEADOS, HISTORIAL)
+    assert luis.tolist() == [62.5] * 7
+
+def test_fechas_anteriores_al_historial():
+    """Antes de la primera tarifa del historial aplica la primera; un nombre desconocido no tiene tarifa"""
+    tarifas = nomina.tabla_sueldos(EMPLEADOS, HISTORIAL)
+    assert tarifas.loc[tarifas['ID'] == 1, 'Vigente_Desde'].min() == nomina.FECHA_BASE_SUELDOS
+    
+    tarifa = nomina.sueldo_hora_vigente(
+        ['Ana Ruiz', 'Ana Ruiz', 'Pedro Sol'], ['2023-06-01', '2024-01-07', '2024-01-09'],
+        EMPLEADOS, HISTORIAL
+    )
+    assert tarifa[:2].tolist() == [50.0, 50.0]
+    assert np.isnan(tarifa[2])
+    assert nomina.sueldos_vigentes(HISTORIAL, '2023-06-01').loc[1, 'Sueldo_Hora'] == 50.0
+
+def test_aumento_con_fecha_futura(tmp_path, monkeypatch):
+    """El aumento registrado a futuro llega a la fila del trabajador al cargar después de su fecha"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(nomina, 'ALMACENAMIENTO', 'csv')
+    nomina.guardar_datos(EMPLEADOS, pd.DataFrame(columns=nomina.COLUMNAS_REGISTROS))
+    manana = datetime.date.today() + datetime.timedelta(days=1)
+    historial = nomina.registrar_sueldo(nomina.cargar_historial_sueldos(), 1, 2800.0, '2024-01-01')
+    nomina.registrar_sueldo(historial, 1, 3360.0, manana)
+    
+    almacen = nomina.AlmacenDatos()
+    nomina.cargar_en_almacen(almacen)
+    assert almacen.empleados.loc[0, 'Sueldo_Semanal'] == 2800.0
+    
+    assert nomina.aplicar_sueldos_vigentes(almacen, manana) == 1
+    assert almacen.empleados.loc[0, 'Sueldo_Hora'] == 60.0
+    assert nomina.aplicar_sueldos_vigentes(almacen, manana) == 0
+    
+    # El cambio quedó guardado: al volver a cargar ya no hay nada que pasar
+    empleados_df, _ = nomina.cargar_datos()
+    assert empleados_df.loc[0, 'Sueldo_Semanal'] == 3360.0